@@ -0,0 +1,281 @@
+import numpy as np
+
+from scheduler import month_starts
+from util import money
+
+from datetime import datetime
+
+
+class TStoredField(object):
+    # without a store the value lives in the slot '_<name>', which the owner declares
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = f"_{name}"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        store = instance.store
+        if store is None:
+            return getattr(instance, self.slot)
+        return store.get(self.name, instance.index)
+
+    def __set__(self, instance, value):
+        store = instance.store
+        if store is None:
+            setattr(instance, self.slot, value)
+        else:
+            store.set(self.name, instance.index, value)
+
+
+class TSettledField(TStoredField):
+    def __get__(self, instance, owner):
+        if instance is not None and instance.scheduler is not None:
+            instance.settle()
+        return TStoredField.__get__(self, instance, owner)
+
+
+class TAccountStore(object):
+    INITIAL_CAPACITY = 1024
+
+    FIRST_DAY_OF_THE_MONTH = 1
+
+    # values of EAccountType, kept here to avoid a circular import
+    DEBIT   = 1
+    DEPOSIT = 2
+    CREDIT  = 3
+
+    COLUMNS = {
+        'funds':              np.float64,
+        'unpaid_interest':    np.float64,
+        'interest_rate':      np.float64,
+        'dayly_fee':          np.float64,
+        'end_datetime':       'datetime64[us]',
+        'type':               np.int8,
+        'withdraw_available': np.bool_,
+    }
+
+    MUTABLE_COLUMNS = ('funds', 'unpaid_interest', 'withdraw_available')
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.size = 0
+        self.capacity = capacity
+        self.free = []
+
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, TAccountStore._empty_column(dtype, capacity))
+
+    @staticmethod
+    def _empty_column(dtype, capacity):
+        if np.dtype(dtype).kind == 'M':
+            return np.full(capacity, np.datetime64('NaT'), dtype=dtype)
+        return np.zeros(capacity, dtype=dtype)
+
+    def _grow(self, capacity):
+        for name, dtype in self.COLUMNS.items():
+            column = TAccountStore._empty_column(dtype, capacity)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+
+        self.capacity = capacity
+
+    @classmethod
+    def wrap(cls, records):
+        # columns become (possibly strided) views of records, e.g. a memory-mapped snapshot
+        store = cls.__new__(cls)
+        store.size = store.capacity = len(records)
+        store.free = []
+
+        for name in cls.COLUMNS:
+            setattr(store, name, records[name])
+
+        return store
+
+    def allocate(self, type: int) -> int:
+        if self.free:
+            index = self.free.pop()
+            self.type[index] = type
+            return index
+
+        if self.size == self.capacity:
+            self._grow(max(2 * self.capacity, TAccountStore.INITIAL_CAPACITY))
+
+        index = self.size
+        self.type[index] = type
+        self.size += 1
+
+        return index
+
+    def allocate_many(self, types) -> np.ndarray:
+        count = len(types)
+        reused = self.free[max(len(self.free) - count, 0):]
+        del self.free[len(self.free) - len(reused):]
+        reused.reverse()
+
+        fresh = count - len(reused)
+        if self.size + fresh > self.capacity:
+            self._grow(max(2 * self.capacity, self.size + fresh, TAccountStore.INITIAL_CAPACITY))
+
+        indices = np.concatenate([
+            np.array(reused, dtype=np.int64),
+            np.arange(self.size, self.size + fresh, dtype=np.int64),
+        ])
+        self.size += fresh
+        self.type[indices] = types
+
+        return indices
+
+    def release(self, index):
+        # a released row is blank, so the vectorized updates leave it alone until it is reused
+        for name, dtype in self.COLUMNS.items():
+            getattr(self, name)[index] = TAccountStore._empty_column(dtype, 1)[0]
+        self.free.append(index)
+
+    def column(self, name):
+        return getattr(self, name)[:self.size]
+
+    def values(self, name):
+        # the column in the units the accounts see
+        return self.column(name)
+
+    def get(self, name, index):
+        return getattr(self, name)[index].item()
+
+    def set(self, name, index, value):
+        getattr(self, name)[index] = value
+
+    def set_many(self, name, indices, values):
+        getattr(self, name)[indices] = values
+
+    def _accrual(self, funds, interest_rate):
+        return funds * interest_rate
+
+    def _capitalise(self, funds, unpaid_interest, capitalised):
+        funds[capitalised] += unpaid_interest[capitalised]
+        unpaid_interest[capitalised] = 0
+
+    @staticmethod
+    def gather(accounts):
+        store = TAccountStore(max(len(accounts), 1))
+        store.size = len(accounts)
+
+        store.column('type')[:] = [account.type.value for account in accounts]
+        for name in TAccountStore.COLUMNS.keys() - {'type'}:
+            column = store.column(name)
+            for row, account in enumerate(accounts):
+                value = getattr(account, name, None)
+                if value is not None:
+                    column[row] = value
+
+        return store
+
+    def scatter(self, accounts):
+        for name in TAccountStore.MUTABLE_COLUMNS:
+            column = self.column(name)
+            for row, account in enumerate(accounts):
+                if hasattr(account, name):
+                    setattr(account, name, column[row].item())
+
+    def update(self, datetime: datetime):
+        now = np.datetime64(datetime, 'us')
+
+        type = self.column('type')
+        funds = self.column('funds')
+        unpaid_interest = self.column('unpaid_interest')
+        end_datetime = self.column('end_datetime')
+
+        # credit accounts always have a zero interest rate
+        unpaid_interest += self._accrual(funds, self.column('interest_rate'))
+
+        if datetime.day == TAccountStore.FIRST_DAY_OF_THE_MONTH:
+            capitalised = (type == TAccountStore.DEBIT) | (
+                (type == TAccountStore.DEPOSIT) & (now <= end_datetime)
+            )
+            self._capitalise(funds, unpaid_interest, capitalised)
+
+        # end_datetime is NaT for everything but deposits, so the comparison is False there
+        self.column('withdraw_available')[now >= end_datetime] = True
+
+        in_debt = (type == TAccountStore.CREDIT) & (funds < 0)
+        funds[in_debt] -= self.column('dayly_fee')[in_debt]
+
+    def fast_forward(self, start: datetime, until: datetime):
+        # same result as one update() per day in (start, until], assuming no transactions meanwhile
+        if until.date() <= start.date():
+            return
+
+        type = self.column('type')
+        funds = self.column('funds')
+        unpaid_interest = self.column('unpaid_interest')
+        interest_rate = self.column('interest_rate')
+        end_datetime = self.column('end_datetime')
+
+        debit = type == TAccountStore.DEBIT
+        deposit = type == TAccountStore.DEPOSIT
+
+        in_debt = (type == TAccountStore.CREDIT) & (funds < 0)
+        funds[in_debt] -= self.column('dayly_fee')[in_debt] * (until.date() - start.date()).days
+
+        accrued_until = start.date()
+        for day in month_starts(start.date(), until.date()):
+            unpaid_interest += self._accrual(funds, interest_rate) * (day - accrued_until).days
+            accrued_until = day
+
+            capitalised = debit | (
+                deposit & (np.datetime64(datetime.combine(day, until.time()), 'us') <= end_datetime)
+            )
+            self._capitalise(funds, unpaid_interest, capitalised)
+
+        unpaid_interest += self._accrual(funds, interest_rate) * (until.date() - accrued_until).days
+
+        self.column('withdraw_available')[np.datetime64(until, 'us') >= end_datetime] = True
+
+
+class TFixedPointAccountStore(TAccountStore):
+    # money columns hold int64 minor units (unpaid interest: accrual units), exposed as floats.
+    # Accrual and capitalisation round half to even, so nightly runs are reproducible bit for bit.
+    UNITS = {
+        'funds':           money.MINOR_UNITS,
+        'unpaid_interest': money.ACCRUAL_UNITS,
+        'dayly_fee':       money.MINOR_UNITS,
+    }
+
+    COLUMNS = dict(TAccountStore.COLUMNS, **{name: np.int64 for name in UNITS})
+
+    @classmethod
+    def wrap(cls, records):
+        # unlike TAccountStore.wrap this converts, so the columns are copies
+        store = super().wrap(records)
+        for name, units in cls.UNITS.items():
+            setattr(store, name, money.to_units(records[name], units))
+        return store
+
+    def values(self, name):
+        units = TFixedPointAccountStore.UNITS.get(name)
+        column = self.column(name)
+        return column / units if units is not None else column
+
+    def get(self, name, index):
+        value = getattr(self, name)[index].item()
+        units = TFixedPointAccountStore.UNITS.get(name)
+        return value / units if units is not None else value
+
+    def set(self, name, index, value):
+        units = TFixedPointAccountStore.UNITS.get(name)
+        if units is not None:
+            value = money.to_units(value, units)
+        getattr(self, name)[index] = value
+
+    def set_many(self, name, indices, values):
+        units = TFixedPointAccountStore.UNITS.get(name)
+        if units is not None:
+            values = money.to_units(np.asarray(values, dtype=np.float64), units)
+        getattr(self, name)[indices] = values
+
+    def _accrual(self, funds, interest_rate):
+        return money.accrual(funds, interest_rate)
+
+    def _capitalise(self, funds, unpaid_interest, capitalised):
+        funds[capitalised] += money.capitalisation(unpaid_interest[capitalised])
+        unpaid_interest[capitalised] = 0
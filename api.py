@@ -1,65 +1,183 @@
-from bank_system import EAccountType, TAccount, TBankManager
-from client_system import TClientManager
+from bank_system import EAccountType, ESendResult, TAccount, TBankManager
+from client_system import TClient, TClientManager
+from concurrency import TShardedLocks
+from registry import TRegistry
 from time_system import ITimeManager
 from transaction import TTransactionManager
+from util.gc_pause import paused_gc
+from util.gen import TThreadSafeGenerator
 from util.status import Status
 
+import numpy as np
+
+
+ACCOUNT_TYPES = {
+    "debit":   EAccountType.DEBIT,
+    "deposit": EAccountType.DEPOSIT,
+    "credit":  EAccountType.CREDIT,
+}
+
 
 class API(object):
-    def __init__(self, time_manager: ITimeManager):
+    def __init__(self, time_manager: ITimeManager, journal=None, concurrent=False):
         self.time_manager = time_manager
 
-        self.transaction_manager = TTransactionManager(self.time_manager)
+        locks = None
+        if concurrent:
+            locks = TShardedLocks()
+            for owner in (TAccount, TClient):
+                if not isinstance(owner.IdsGen, TThreadSafeGenerator):
+                    owner.IdsGen = TThreadSafeGenerator(owner.IdsGen)
+
+        self.transaction_manager = TTransactionManager(self.time_manager, journal, locks)
         self.bank_manager = TBankManager(self.transaction_manager)
         self.client_manager = TClientManager()
+        self.registry = TRegistry(self.bank_manager, self.client_manager, self.time_manager)
 
     def new_client(self, kwargs: dict):
-        return self.client_manager.new_client(**kwargs)
+        client_id = self.client_manager.new_client(**kwargs)
+        self._record_clients([client_id])
+        return client_id
+
+    def _record_clients(self, client_ids):
+        if self.transaction_manager.logged:
+            clients = [self.client_manager.clients[client_id] for client_id in client_ids]
+            self.transaction_manager.record(
+                "clients",
+                ids=list(client_ids),
+                names=[client.name for client in clients],
+                surnames=[client.surname for client in clients],
+                optional_fields=[client.optional_fields for client in clients],
+            )
 
     def update_client_optional_info(self, client_id, fields):
         client = self.client_manager.get_client(client_id)
-        client.update_optional_fields(fields)
+        self.transaction_manager.record("client_fields", client_id=client_id, fields=dict(fields))
+        if not client.update_optional_fields(fields):
+            return
 
-        banks = self.bank_manager.get_all_banks()
-        for _, bank in banks.items():
-            bank.update_client_info(client.info)
+        client_info = client.info
+        for account_id in self.client_manager.get_accounts(client_id):
+            TAccount.all[account_id].update_client_info(client_info)
 
     def new_bank(self, kwargs: dict):
-        return self.bank_manager.new_bank(**kwargs, time_manager=self.time_manager)
+        # a bank may bring its own clock, e.g. one kept by clocks.TClockCoordinator
+        return self.bank_manager.new_bank(**{"time_manager": self.time_manager, **kwargs})
+
+    def new_clients(self, columns: dict) -> np.ndarray:
+        # columns: "name", "surname" and optional fields such as "address", "passport"
+        optional_fields = {field: column for field, column in columns.items() if not field in ("name", "surname")}
+        client_ids = self.client_manager.new_clients(columns["name"], columns["surname"], optional_fields)
+        self._record_clients(client_ids)
+        return np.array(client_ids, dtype=f'<U{TClient.IdSize}')
 
     def new_account(self, client_id, bank_name: str, type_str: str, kwargs={}):
-        type = EAccountType.DEBIT
-        if type_str == "debit":
-            type = EAccountType.DEBIT
-        elif type_str == "deposit":
-            type = EAccountType.DEPOSIT
-        elif type_str == "credit":
-            type = EAccountType.CREDIT
+        type = ACCOUNT_TYPES.get(type_str, EAccountType.DEBIT)
 
         client_info = self.client_manager.get_client(client_id).info
 
         bank = self.bank_manager.get_bank(bank_name)
-        return bank.Get().new_account(client_info, type, kwargs)
+        account_id = bank.Get().new_account(client_info, type, kwargs)
+
+        self.client_manager.add_account(client_id, account_id)
+        return account_id
+
+    def new_accounts(self, columns: dict) -> np.ndarray:
+        # columns: "client_id", "bank", "type" and "initial_funds"; "bank" and "type" may be single values
+        with paused_gc():
+            return self._new_accounts(columns)
+
+    def _new_accounts(self, columns):
+        client_ids = columns["client_id"]
+        client_ids = client_ids.tolist() if isinstance(client_ids, np.ndarray) else list(client_ids)
+        count = len(client_ids)
+
+        bank_names = columns["bank"]
+        bank_names = np.asarray([bank_names] if isinstance(bank_names, str) else bank_names)
+
+        type_strs = columns.get("type", "debit")
+        if isinstance(type_strs, str):
+            types = np.full(count, ACCOUNT_TYPES.get(type_strs, EAccountType.DEBIT).value, dtype=np.int8)
+        else:
+            codes = {type_str: ACCOUNT_TYPES.get(type_str, EAccountType.DEBIT).value for type_str in set(type_strs)}
+            types = np.array([codes[type_str] for type_str in type_strs], dtype=np.int8)
+
+        initial_funds = columns.get("initial_funds")
+        initial_funds = np.zeros(count) if initial_funds is None else np.asarray(initial_funds, dtype=np.float64)
+
+        clients = self.client_manager.clients
+        suspicious = {}
+        for client_id in dict.fromkeys(client_ids):
+            client = clients.get(client_id)
+            if client is None:
+                raise RuntimeError(f"No client with id {client_id}")
+            suspicious[client_id] = client.is_suspicious
+        is_suspicious = [suspicious[client_id] for client_id in client_ids]
+
+        banks = {name: self.bank_manager.get_bank(name).GetOrRaise() for name in dict.fromkeys(bank_names.tolist())}
+        account_ids = np.empty(count, dtype=f'<U{TAccount.IdSize}')
+        if len(bank_names) == 1:
+            account_ids[:] = banks[bank_names[0]].new_accounts(client_ids, is_suspicious, types, initial_funds)
+        else:
+            for name, bank in banks.items():
+                rows = np.flatnonzero(bank_names == name).tolist()
+                account_ids[rows] = bank.new_accounts(
+                    [client_ids[row] for row in rows],
+                    [is_suspicious[row] for row in rows],
+                    types[rows],
+                    initial_funds[rows],
+                )
+
+        self.client_manager.add_accounts(client_ids, account_ids.tolist())
+        return account_ids
+
+    # accounts are looked up under their locks, so an account closed in between is not written to
 
     def top_up(self, account_id, amount):
-        account = TAccount.all[account_id]
-        return account.top_up(amount)
+        with self.transaction_manager.locks.accounts(account_id):
+            return TAccount.all[account_id].top_up(amount)
 
     def withdraw(self, client_id, account_id, amount):
-        account = TAccount.all[account_id]
+        with self.transaction_manager.locks.accounts(account_id):
+            account = TAccount.all[account_id]
 
-        if client_id != account.client_id:
-            return Status.Error(f"account does not belong to client {client_id}")
+            if client_id != account.client_id:
+                return Status.Error(f"account does not belong to client {client_id}")
 
-        return account.withdraw(amount)
+            return account.withdraw(amount)
 
     def send(self, client_id, from_id, to_id, amount):
-        account = TAccount.all[from_id]
+        with self.transaction_manager.locks.accounts(from_id, to_id):
+            account = TAccount.all[from_id]
+
+            if client_id != account.client_id:
+                return Status.Error(f"account does not belong to client {client_id}")
 
-        if client_id != account.client_id:
+            return account.send(to_id, amount)
+
+    def send_many(self, client_ids, from_ids, to_ids, amounts):
+        amounts = list(amounts)
+        results = np.full(len(amounts), ESendResult.OK.value, dtype=np.int8)
+
+        with self.transaction_manager.locks.accounts(*from_ids, *to_ids):
+            accounts_from = [TAccount.all.get(from_id) for from_id in from_ids]
+            accounts_to = [TAccount.all.get(to_id) for to_id in to_ids]
+
+            for row, (client_id, account) in enumerate(zip(client_ids, accounts_from)):
+                if account is not None and client_id != account.client_id:
+                    results[row] = ESendResult.NOT_OWNER.value
+
+            return TAccount.send_batch(accounts_from, accounts_to, amounts, results)
+
+    def close_account(self, client_id, account_id):
+        account = TAccount.all.get(account_id)
+        if account is not None and client_id != account.client_id:
             return Status.Error(f"account does not belong to client {client_id}")
 
-        return account.send(to_id, amount)
+        return self.registry.close_account(account_id)
+
+    def close_client(self, client_id):
+        return self.registry.close_client(client_id)
 
     def add_to_black_list(self, bank_name, client_id):
-        self.bank_manager.get_bank(bank_name).add_to_black_list(client_id)
+        self.bank_manager.get_bank(bank_name).GetOrRaise().add_to_black_list(client_id)
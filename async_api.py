@@ -0,0 +1,140 @@
+from api import API
+from bank_system import send_status
+
+import numpy as np
+
+from collections import deque
+import asyncio
+import threading
+import time
+
+
+class TLatencyRecorder(object):
+    SAMPLES = 100000
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.latencies = {}
+
+    def record(self, operation, latency):
+        if not operation in self.latencies:
+            self.latencies[operation] = deque(maxlen=self.samples)
+        self.latencies[operation].append(latency)
+
+    def percentiles(self, operation, percentiles=(50, 90, 99)):
+        latencies = self.latencies.get(operation)
+        if not latencies:
+            return {}
+        return dict(zip(percentiles, np.percentile(latencies, percentiles).tolist()))
+
+
+class AsyncAPI(object):
+    BATCH_WINDOW = 0.0005
+    BATCH_SIZE = 512
+
+    def __init__(self, api: API, batch_window=BATCH_WINDOW, batch_size=BATCH_SIZE):
+        self.api = api
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+
+        self.latency = TLatencyRecorder()
+        self.lock = threading.Lock()
+
+        self.queue = None
+        self.worker = None
+
+    async def new_client(self, kwargs: dict):
+        return await self._submit("new_client", kwargs)
+
+    async def new_account(self, client_id, bank_name: str, type_str: str, kwargs={}):
+        return await self._submit("new_account", client_id, bank_name, type_str, kwargs)
+
+    async def top_up(self, account_id, amount):
+        return await self._submit("top_up", account_id, amount)
+
+    async def withdraw(self, client_id, account_id, amount):
+        return await self._submit("withdraw", client_id, account_id, amount)
+
+    async def send(self, client_id, from_id, to_id, amount):
+        return await self._submit("send", client_id, from_id, to_id, amount)
+
+    def latency_percentiles(self, operation, percentiles=(50, 90, 99)):
+        return self.latency.percentiles(operation, percentiles)
+
+    async def close(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def _submit(self, operation, *args):
+        if self.worker is None:
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((operation, args, future, time.perf_counter()))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) < self.batch_size:
+                await asyncio.sleep(self.batch_window)
+                self._drain(batch)
+
+            results = await loop.run_in_executor(None, self._apply, batch)
+
+            finished = time.perf_counter()
+            for (operation, _, future, started), (result, error) in zip(batch, results):
+                self.latency.record(operation, finished - started)
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _apply(self, batch):
+        results = []
+
+        with self.lock:
+            row = 0
+            while row < len(batch):
+                end = row
+                while end < len(batch) and batch[end][0] == "send":
+                    end += 1
+
+                if end > row:
+                    results.extend(self._apply_sends([args for _, args, _, _ in batch[row:end]]))
+                    row = end
+                    continue
+
+                operation, args, _, _ = batch[row]
+                try:
+                    results.append((getattr(self.api, operation)(*args), None))
+                except Exception as error:
+                    results.append((None, error))
+                row += 1
+
+        return results
+
+    def _apply_sends(self, sends):
+        client_ids, from_ids, to_ids, amounts = zip(*sends)
+
+        try:
+            codes = self.api.send_many(client_ids, from_ids, to_ids, amounts)
+        except Exception as error:
+            return [(None, error)] * len(sends)
+
+        return [(send_status(code, client_id), None) for client_id, code in zip(client_ids, codes.tolist())]
@@ -1,12 +1,18 @@
+from account_store import TAccountStore, TFixedPointAccountStore, TSettledField, TStoredField
 from client_system import TClient
+from reporting import TBankReport, TPortfolioReport
+from scheduler import TEventScheduler, next_month_start
 from time_system import ITimeManager
-from transaction import ETransactionType, TTransactionManager
+from transaction import ETransactionType, TTransaction, TTransactionManager
 
+from util.gc_pause import paused_gc
 from util.gen import TNoRepetitionGenerator
 from util.status import Status, ValueHolder
 
 from datetime import datetime, timedelta
 from enum import Enum
+import itertools
+import numpy as np
 
 
 class EAccountType(Enum):
@@ -15,9 +21,43 @@ class EAccountType(Enum):
     CREDIT  = 3
 
 
+class ESendResult(Enum):
+    OK               = 0
+    NOT_OWNER        = 1
+    UNKNOWN_ACCOUNT  = 2
+    NOT_ENOUGH_FUNDS = 3
+    NOT_VERIFIED     = 4
+    FLAGGED          = 5
+
+
+SEND_ERRORS = {
+    ESendResult.UNKNOWN_ACCOUNT.value:  "unknown account",
+    ESendResult.NOT_ENOUGH_FUNDS.value: "not enought funds",
+    ESendResult.NOT_VERIFIED.value:     "not verified",
+    ESendResult.FLAGGED.value:          "flagged as fraud",
+}
+
+
+def send_status(code, client_id) -> Status:
+    if code == ESendResult.OK.value:
+        return Status.Ok()
+    if code == ESendResult.NOT_OWNER.value:
+        return Status.Error(f"account does not belong to client {client_id}")
+    return Status.Error(SEND_ERRORS[code])
+
+
 class TAccount(object):
+    __slots__ = (
+        "bank", "client_id", "type", "id",
+        "store", "index", "scheduler", "settled_date",
+        "is_suspicious", "suspicious_limit",
+        "_funds", "__weakref__",
+    )
+
     all = {}
 
+    funds = TSettledField()
+
     FIRST_DAY_OF_THE_MONTH = 1
 
     IdsGen = TNoRepetitionGenerator()
@@ -28,24 +68,51 @@ class TAccount(object):
         bank,
         client_info: TClient.TInfo,
         type: EAccountType,
-        transaction_manager: TTransactionManager,
     ):
         self.bank = bank
         self.client_id = client_info.client_id
         self.type = type
-        self.transaction_manager = transaction_manager
         self.id = TAccount.IdsGen.gen(TAccount.IdSize)
 
+        self.store = bank.account_store
+        self.index = self.store.allocate(type.value) if self.store is not None else None
+
+        self.scheduler = bank.scheduler
+        self.settled_date = None
+        if self.scheduler is not None:
+            self.settled_date = self.scheduler.time_manager.get_datetime().date()
+
         self.is_suspicious = client_info.is_suspicious
         self.suspicious_limit = 0
 
         self.funds = 0
 
         TAccount.all[self.id] = self
-    
-    def __del__(self):
-        del TAccount.all[self.id]
-        TAccount.IdsGen.free(self.id)
+
+    @classmethod
+    def restore(
+        cls, bank, client_id, type: EAccountType, account_id, index, settled_date, is_suspicious, suspicious_limit, fields=(),
+    ):
+        # an account whose id and state come from elsewhere: a snapshot, the tiered store or a bulk onboarding.
+        # fields are (attribute, value) pairs, only set for a bank without a store
+        account = cls.__new__(cls)
+        account.bank = bank
+        account.client_id = client_id
+        account.type = type
+        account.id = account_id
+        account.store = bank.account_store
+        account.index = index
+        account.scheduler = bank.scheduler
+        account.settled_date = settled_date
+        account.is_suspicious = is_suspicious
+        account.suspicious_limit = suspicious_limit
+        for name, value in fields:
+            setattr(account, name, value)
+        return account
+
+    @property
+    def transaction_manager(self) -> TTransactionManager:
+        return self.bank.transaction_manager
 
     def set_suspicious_limit(self, suspicious_limit):
         self.suspicious_limit = suspicious_limit
@@ -73,6 +140,68 @@ class TAccount(object):
 
         return status
 
+    @staticmethod
+    def send_batch(accounts_from, accounts_to, amounts, results=None):
+        if results is None:
+            results = np.full(len(amounts), ESendResult.OK.value, dtype=np.int8)
+
+        balances = {}
+        accepted = []
+        verified = None
+
+        for row, (account_from, account_to, amount) in enumerate(zip(accounts_from, accounts_to, amounts)):
+            if results[row] != ESendResult.OK.value:
+                continue
+
+            if account_from is None or account_to is None:
+                results[row] = ESendResult.UNKNOWN_ACCOUNT.value
+                continue
+
+            for account in (account_from, account_to):
+                if not account.id in balances:
+                    balances[account.id] = [account, account.funds]
+
+            if balances[account_from.id][1] < amount:
+                results[row] = ESendResult.NOT_ENOUGH_FUNDS.value
+                continue
+
+            if verified is None:
+                verified = account_from.transaction_manager.black_lists.verify_many(accounts_from, accounts_to)
+            if not verified[row]:
+                results[row] = ESendResult.NOT_VERIFIED.value
+                continue
+
+            transaction_manager = account_from.transaction_manager
+            if transaction_manager.gates:
+                transaction = TTransaction(
+                    account_from.id, account_to.id,
+                    amount,
+                    ETransactionType.A2A,
+                    transaction_manager.time_manager.get_datetime(),
+                )
+                if not transaction_manager.admit(transaction, account_from, account_to).IsOk():
+                    results[row] = ESendResult.FLAGGED.value
+                    continue
+
+            balances[account_from.id][1] -= amount
+            balances[account_to.id][1] += amount
+            accepted.append(row)
+
+        if not accepted:
+            return results
+
+        accounts_from[accepted[0]].transaction_manager.new_transactions(
+            [accounts_from[row].id for row in accepted],
+            [accounts_to[row].id for row in accepted],
+            [amounts[row] for row in accepted],
+            ETransactionType.A2A,
+        )
+
+        for account, funds in balances.values():
+            account.funds = funds
+
+        return results
+
     def top_up(self, amount) -> Status:
         if self.is_suspicious and amount > self.suspicious_limit:
             return Status.Error(f"amount is higher then suspicious limit: {amount} > {self.suspicious_limit}")
@@ -108,10 +237,81 @@ class TAccount(object):
     def update(self, datetime: datetime):
         raise NotImplementedError("update must be implemented")
 
+    def settle(self):
+        days = (self.scheduler.date - self.settled_date).days
+        if days <= 0:
+            return
+
+        # settled_date moves first, so the field reads inside accrue() do not settle again
+        self.settled_date = self.scheduler.date
+        self.accrue(days)
+
+    def accrue(self, days):
+        raise NotImplementedError("accrue must be implemented")
+
+    def schedule_events(self):
+        pass
+
+    def event(self, method):
+        return TAccountEvent(self.id, method)
+
+    def detach(self):
+        # a closed account keeps its last values in its own slots and lets go of its store row,
+        # which goes to the next account: whoever still holds the object can not write into that one
+        values = {
+            name: getattr(self, name)
+            for name in TAccountStore.COLUMNS.keys() - {"type"}
+            if hasattr(type(self), name)
+        }
+
+        self.store = None
+        self.index = None
+        self.scheduler = None
+        for name, value in values.items():
+            setattr(self, name, value)
+
+
+class TAccountEvent(object):
+    # a scheduled call of an account method, held by account id and resolved when it fires,
+    # so a pending event neither keeps the account object alive nor outlives its eviction from TAccount.all
+    __slots__ = ("owner", "method")
+
+    def __init__(self, owner, method):
+        self.owner = owner
+        self.method = method
+
+    def __call__(self, day):
+        getattr(TAccount.all[self.owner], self.method)(day)
+
+
+class TAccountRefs(list):
+    # ids standing in for a client's accounts in a bank, resolved through TAccount.all on every read:
+    # a bank holds no account objects, so a closed account is gone once TAccount.all lets go of it
+    def append(self, account):
+        list.append(self, account.id)
+
+    def ids(self):
+        return list(list.__iter__(self))
+
+    def __iter__(self):
+        accounts = TAccount.all
+        for account_id in list.__iter__(self):
+            yield accounts[account_id]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [TAccount.all[account_id] for account_id in list.__getitem__(self, position)]
+        return TAccount.all[list.__getitem__(self, position)]
+
 
 class TDebitAccount(TAccount):
-    def __init__(self, bank, client_info, interest_rate, transaction_manager):
-        TAccount.__init__(self, bank, client_info, EAccountType.DEBIT, transaction_manager)
+    __slots__ = ("_interest_rate", "_unpaid_interest")
+
+    interest_rate = TStoredField()
+    unpaid_interest = TSettledField()
+
+    def __init__(self, bank, client_info, interest_rate):
+        TAccount.__init__(self, bank, client_info, EAccountType.DEBIT)
 
         self.interest_rate = interest_rate
 
@@ -130,15 +330,36 @@ class TDebitAccount(TAccount):
             self.funds += self.unpaid_interest
             self.unpaid_interest = 0
 
+    def accrue(self, days):
+        self.unpaid_interest += self.funds * self.interest_rate * days
+
+    def schedule_events(self):
+        if self.interest_rate != 0:
+            self.scheduler.schedule(next_month_start(self.settled_date), self.event("capitalise"))
+
+    def capitalise(self, day):
+        self.funds += self.unpaid_interest
+        self.unpaid_interest = 0
+
+        self.scheduler.schedule(next_month_start(day), self.event("capitalise"))
+
 
 class TDepositAccount(TAccount):
-    def __init__(self, bank, client_info, initial_funds, interest_rate, end_datetime: datetime, transaction_manager):
-        TAccount.__init__(self, bank, client_info, EAccountType.DEPOSIT, transaction_manager)
+    __slots__ = ("_interest_rate", "_unpaid_interest", "_end_datetime", "_withdraw_available")
+
+    interest_rate = TStoredField()
+    unpaid_interest = TSettledField()
+    end_datetime = TStoredField()
+    withdraw_available = TStoredField()
+
+    def __init__(self, bank, client_info, initial_funds, interest_rate, end_datetime: datetime):
+        TAccount.__init__(self, bank, client_info, EAccountType.DEPOSIT)
 
         self.funds = initial_funds
         self.interest_rate = interest_rate
         self.end_datetime = end_datetime
 
+        self.unpaid_interest = 0
         self.withdraw_available = False
 
     def withdraw(self, amount) -> Status:
@@ -159,10 +380,34 @@ class TDepositAccount(TAccount):
         if datetime >= self.end_datetime:
             self.withdraw_available = True
 
+    def accrue(self, days):
+        self.unpaid_interest += self.funds * self.interest_rate * days
+
+    def schedule_events(self):
+        self.schedule_capitalisation(next_month_start(self.settled_date))
+        self.scheduler.schedule(self.end_datetime.date(), self.event("mature"))
+
+    def schedule_capitalisation(self, day):
+        if self.interest_rate != 0 and day <= self.end_datetime.date():
+            self.scheduler.schedule(day, self.event("capitalise"))
+
+    def capitalise(self, day):
+        self.funds += self.unpaid_interest
+        self.unpaid_interest = 0
+
+        self.schedule_capitalisation(next_month_start(day))
+
+    def mature(self, day):
+        self.withdraw_available = True
+
 
 class TCreditAccount(TAccount):
-    def __init__(self, bank, client_info, transaction_manager, dayly_fee):
-        TAccount.__init__(self, bank, client_info, EAccountType.CREDIT, transaction_manager)
+    __slots__ = ("_dayly_fee",)
+
+    dayly_fee = TStoredField()
+
+    def __init__(self, bank, client_info, dayly_fee):
+        TAccount.__init__(self, bank, client_info, EAccountType.CREDIT)
 
         self.dayly_fee = dayly_fee
 
@@ -170,45 +415,91 @@ class TCreditAccount(TAccount):
         if self.funds < 0:
             self.funds -= self.dayly_fee
 
+    def accrue(self, days):
+        if self.funds < 0:
+            self.funds -= self.dayly_fee * days
+
 
 class TBank(object):
     ONE_YEAR = timedelta(days=365)
 
-    def __init__(self, name: str, time_manager: ITimeManager, transaction_manager):
+    def __init__(
+        self,
+        name: str,
+        time_manager: ITimeManager,
+        transaction_manager,
+        columnar=False,
+        scheduled=False,
+        fixed_point=False,
+    ):
         self.name = name
         self.time_manager = time_manager
         self.transaction_manager = transaction_manager
 
+        self.account_store = None
+        if fixed_point:
+            self.account_store = TFixedPointAccountStore()
+        elif columnar:
+            self.account_store = TAccountStore()
+        self.scheduler = TEventScheduler(time_manager) if scheduled else None
+
         self.accounts = {}
         self.interest_rate = 0
         self.credit_dayly_fee = 0
         self.limit_for_suspicious_accounts = 0
 
         self.black_list = set()
+        self.black_list_bit = transaction_manager.black_lists.register_bank(name)
+
+        # the last time the daily updates were applied up to, fast_forward carries on from it
+        self.updated = time_manager.get_datetime()
+
+        # moves whenever accounts change other than through transactions
+        self.revision = 0
+        self.reporting = None
 
     def set_interest_rate(self, interest_rate):
         self.interest_rate = interest_rate
+        self.transaction_manager.record("bank_setting", bank=self.name, setting="interest_rate", value=interest_rate)
     
     def set_credit_dayly_fee(self, dayle_fee):
         self.credit_dayly_fee = dayle_fee
+        self.transaction_manager.record("bank_setting", bank=self.name, setting="credit_dayly_fee", value=dayle_fee)
 
     def set_limit_for_suspicious_accounts(self, limit):
         self.limit_for_suspicious_accounts = limit
+        self.transaction_manager.record("bank_setting", bank=self.name, setting="limit_for_suspicious_accounts", value=limit)
+
+    def set_time_manager(self, time_manager: ITimeManager):
+        self.time_manager = time_manager
+        if self.scheduler is not None:
+            self.scheduler.time_manager = time_manager
+
+    def report(self) -> TBankReport:
+        if self.reporting is None:
+            self.reporting = TBankReport(self)
+        return self.reporting
 
     def add_to_black_list(self, client_id):
         self.black_list.add(client_id)
+        self.transaction_manager.black_lists.add(self, client_id)
+        self.transaction_manager.record("black_list", bank=self.name, client_id=client_id)
 
     def new_account(self, client_info: TClient.TInfo, type: EAccountType, kwargs={}):
-        if not client_info.client_id in self.accounts.keys():
-            self.accounts[client_info.client_id] = []
+        if self.account_store is None:
+            return self._new_account(client_info, type, kwargs)
 
+        # growing the store replaces its columns, so no transfer may write into them meanwhile
+        with self.transaction_manager.locks.all():
+            return self._new_account(client_info, type, kwargs)
+
+    def _new_account(self, client_info: TClient.TInfo, type: EAccountType, kwargs):
         account = None
         if type == EAccountType.DEBIT:
             account = TDebitAccount(
                 self,
                 client_info=client_info,
                 interest_rate=self.interest_rate,
-                transaction_manager=self.transaction_manager,
             )
         elif type == EAccountType.DEPOSIT:
             account = TDepositAccount(
@@ -217,21 +508,172 @@ class TBank(object):
                 kwargs['initial_funds'],
                 self.interest_rate,
                 self.time_manager.get_datetime() + TBank.ONE_YEAR,
-                self.transaction_manager
             )
         elif type == EAccountType.CREDIT:
             account = TCreditAccount(
                 self,
                 client_info,
-                self.transaction_manager,
                 self.credit_dayly_fee
             )
 
         account.set_suspicious_limit(self.limit_for_suspicious_accounts)
-        self.accounts[client_info.client_id].append(account)
-
+        if self.scheduler is not None:
+            account.schedule_events()
+        self.accounts.setdefault(client_info.client_id, TAccountRefs()).append(account)
+        self.revision += 1
+
+        if self.transaction_manager.logged:
+            initial_funds = kwargs['initial_funds'] if type == EAccountType.DEPOSIT else 0
+            self._record_accounts([account.id], [client_info.client_id], [client_info.is_suspicious], [type.value], [initial_funds])
         return account.id
     
+    def new_accounts(self, client_ids, is_suspicious, types, initial_funds=None, account_ids=None):
+        # columns, one row per account: types are EAccountType values, initial_funds only matters for deposits.
+        # account_ids are generated unless given, e.g. when a journal tail is replayed
+        with paused_gc():
+            if self.account_store is None:
+                return self._new_accounts(client_ids, is_suspicious, types, initial_funds, account_ids)
+
+            with self.transaction_manager.locks.all():
+                return self._new_accounts(client_ids, is_suspicious, types, initial_funds, account_ids)
+
+    def _record_accounts(self, account_ids, client_ids, is_suspicious, types, initial_funds):
+        self.transaction_manager.record(
+            "accounts",
+            bank=self.name,
+            datetime=self.time_manager.get_datetime().isoformat(),
+            ids=list(account_ids),
+            client_ids=list(client_ids),
+            is_suspicious=[bool(suspicious) for suspicious in is_suspicious],
+            types=np.asarray(types).tolist(),
+            initial_funds=np.asarray(initial_funds, dtype=np.float64).tolist(),
+        )
+
+    def _new_accounts(self, client_ids, is_suspicious, types, initial_funds, account_ids):
+        count = len(client_ids)
+        types = np.asarray(types, dtype=np.int8)
+        funds = np.zeros(count)
+        if initial_funds is not None:
+            deposit = types == EAccountType.DEPOSIT.value
+            funds[deposit] = np.asarray(initial_funds, dtype=np.float64)[deposit]
+
+        fields = {
+            EAccountType.DEBIT: {
+                "interest_rate": self.interest_rate,
+                "unpaid_interest": 0,
+            },
+            EAccountType.DEPOSIT: {
+                "interest_rate": self.interest_rate,
+                "end_datetime": self.time_manager.get_datetime() + TBank.ONE_YEAR,
+                "unpaid_interest": 0,
+                "withdraw_available": False,
+            },
+            EAccountType.CREDIT: {
+                "dayly_fee": self.credit_dayly_fee,
+            },
+        }
+
+        if account_ids is None:
+            account_ids = TAccount.IdsGen.gen_many(TAccount.IdSize, count)
+        else:
+            account_ids = list(account_ids)
+            TAccount.IdsGen.reserve(account_ids)
+
+        store = self.account_store
+        indices = store.allocate_many(types) if store is not None else None
+        scheduler = self.scheduler
+        settled_date = scheduler.time_manager.get_datetime().date() if scheduler is not None else None
+        suspicious_limit = self.limit_for_suspicious_accounts
+
+        # type value -> class, type and the slots new_account would set through the stored fields
+        kinds = {
+            type.value: (
+                ACCOUNT_CLASSES[type.value],
+                type,
+                () if store is not None else tuple((f"_{name}", value) for name, value in values.items()),
+            )
+            for type, values in fields.items()
+        }
+
+        accounts = []
+        rows = zip(
+            account_ids,
+            client_ids,
+            is_suspicious,
+            types.tolist(),
+            indices.tolist() if store is not None else itertools.repeat(None),
+            funds.tolist(),
+        )
+        for account_id, client_id, suspicious, type, index, row_funds in rows:
+            cls, account_type, slots = kinds[type]
+            account = cls.restore(
+                self, client_id, account_type, account_id, index, settled_date, suspicious, suspicious_limit, slots
+            )
+            if store is None:
+                account._funds = row_funds
+
+            accounts.append(account)
+
+        if store is not None:
+            store.set_many('funds', indices, funds)
+            for type, values in fields.items():
+                rows = indices[types == type.value]
+                for name, value in values.items():
+                    store.set_many(name, rows, value)
+
+        TAccount.all.update(zip(account_ids, accounts))
+        self._add_account_refs(client_ids, account_ids)
+
+        if scheduler is not None:
+            for account in accounts:
+                account.schedule_events()
+
+        self.revision += 1
+        if self.transaction_manager.logged:
+            self._record_accounts(account_ids, client_ids, is_suspicious, types, funds)
+        return account_ids
+
+    def _add_account_refs(self, client_ids, account_ids):
+        bank_accounts = self.accounts
+
+        # clients new to the bank with one account each, the usual onboarding, go in at once
+        if len(set(client_ids)) == len(client_ids) and bank_accounts.keys().isdisjoint(client_ids):
+            bank_accounts.update({
+                client_id: TAccountRefs((account_id,)) for client_id, account_id in zip(client_ids, account_ids)
+            })
+            return
+
+        for client_id, account_id in zip(client_ids, account_ids):
+            owned = bank_accounts.get(client_id)
+            if owned is None:
+                owned = bank_accounts[client_id] = TAccountRefs()
+            list.append(owned, account_id)
+
+    def close_accounts(self, accounts):
+        with self.transaction_manager.locks.all():
+            self._close_accounts(accounts)
+
+    def _close_accounts(self, accounts):
+        # the caller holds every account lock
+        if self.scheduler is not None:
+            self.scheduler.cancel(account.id for account in accounts)
+
+        closed = {account.id for account in accounts}
+        for client_id in {account.client_id for account in accounts}:
+            owned = TAccountRefs(account_id for account_id in self.accounts[client_id].ids() if not account_id in closed)
+            if owned:
+                self.accounts[client_id] = owned
+            else:
+                del self.accounts[client_id]
+
+        for account in accounts:
+            index = account.index
+            account.detach()
+            if self.account_store is not None:
+                self.account_store.release(index)
+
+        self.revision += 1
+
     def update_client_info(self, client_info: TClient.TInfo):
         if not client_info.client_id in self.accounts.keys():
             return
@@ -240,26 +682,94 @@ class TBank(object):
             account.update_client_info(client_info)
     
     def update_accounts(self):
-        for client_id in self.accounts.keys():
-            for account in self.accounts[client_id]:
-                account.update(self.time_manager.get_datetime())
+        datetime = self.time_manager.get_datetime()
+
+        with self.transaction_manager.locks.all():
+            self.revision += 1
+            self.updated = datetime
+            # accruals are no transactions, a journal tail replays them from this
+            self.transaction_manager.record("update", bank=self.name, datetime=datetime.isoformat())
+
+            if self.scheduler is not None:
+                self.scheduler.run_until(datetime.date())
+                return
+
+            if self.account_store is not None:
+                self.account_store.update(datetime)
+                return
+
+            for accounts in self.accounts.values():
+                for account in accounts:
+                    account.update(datetime)
+
+    def fast_forward(self, until: datetime, exact=True):
+        # exact: the result is the daily loop's to the bit. The closed form is only that for fixed-point banks,
+        # float banks otherwise run one update per day; exact=False takes the closed form anyway
+        start = self.updated
+        if until <= start:
+            return
+
+        with self.transaction_manager.locks.all():
+            self.revision += 1
+            self.updated = until
+            self.transaction_manager.record("fast_forward", bank=self.name, until=until.isoformat(), exact=exact)
+
+            if self.scheduler is not None:
+                self.scheduler.run_until(until.date())
+                return
+
+            if exact and not isinstance(self.account_store, TFixedPointAccountStore):
+                accounts = [account for accounts in self.accounts.values() for account in accounts]
+                for day in range(1, (until.date() - start.date()).days + 1):
+                    datetime = start + timedelta(days=day)
+                    if self.account_store is not None:
+                        self.account_store.update(datetime)
+                    else:
+                        for account in accounts:
+                            account.update(datetime)
+                return
+
+            if self.account_store is not None:
+                self.account_store.fast_forward(start, until)
+                return
+
+            accounts = [account for accounts in self.accounts.values() for account in accounts]
+            store = TAccountStore.gather(accounts)
+            store.fast_forward(start, until)
+            store.scatter(accounts)
 
     def verify(self, transaction):
-        return (
-            not transaction.id_from in self.black_list and
-            not transaction.id_to in self.black_list
+        return not any(
+            TAccount.all[account_id].client_id in self.black_list
+            for account_id in (transaction.id_from, transaction.id_to)
+            if account_id is not None
         )
 
+ACCOUNT_CLASSES = {
+    EAccountType.DEBIT.value:   TDebitAccount,
+    EAccountType.DEPOSIT.value: TDepositAccount,
+    EAccountType.CREDIT.value:  TCreditAccount,
+}
+
+
 class TBankManager(object):
     def __init__(self, transaction_manager: TTransactionManager):
         self.banks = {}
         self.transaction_manager = transaction_manager
     
-    def new_bank(self, name: str, time_manager: ITimeManager) -> Status:
+    def new_bank(self, name: str, time_manager: ITimeManager, columnar=False, scheduled=False, fixed_point=False) -> Status:
         if name in self.banks.keys():
             return Status.Error(f"Bank with the name '{name}' already exists")
 
-        self.banks[name] = TBank(name, time_manager, self.transaction_manager)
+        self.banks[name] = TBank(name, time_manager, self.transaction_manager, columnar, scheduled, fixed_point)
+        self.transaction_manager.record(
+            "bank",
+            name=name,
+            datetime=time_manager.get_datetime().isoformat(),
+            columnar=columnar,
+            scheduled=scheduled,
+            fixed_point=fixed_point,
+        )
         return Status.Ok()
 
     def get_bank(self, name) -> ValueHolder:
@@ -270,3 +780,16 @@ class TBankManager(object):
 
     def get_all_banks(self):
         return self.banks
+
+    def report(self) -> TPortfolioReport:
+        return TPortfolioReport(self)
+
+    def fast_forward(self, until: datetime, exact=True):
+        time_managers = {}
+        for bank in self.banks.values():
+            bank.fast_forward(until, exact)
+            time_managers[id(bank.time_manager)] = bank.time_manager
+
+        for time_manager in time_managers.values():
+            time_manager.set_datetime(until)
+        self.transaction_manager.record("clock", datetime=until.isoformat())
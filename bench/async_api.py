@@ -0,0 +1,83 @@
+from api import API
+from async_api import AsyncAPI
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import random
+import time
+
+
+def new_api(accounts):
+    api = API(
+        TToyTimeManager(start_datetime=datetime(year=2021, month=9, day=3), step=timedelta(days=1)),
+        concurrent=True,
+    )
+    api.new_bank({"name": "Sber"})
+
+    client_id = api.new_client({
+        "name": "Vasya",
+        "surname": "Beliy",
+        "optional_fields": {"address": "addr", "passport": "pas"},
+    })
+    account_ids = [api.new_account(client_id, "Sber", "debit") for _ in range(accounts)]
+    for account_id in account_ids:
+        api.top_up(account_id, 10 ** 9)
+
+    return api, client_id, account_ids
+
+
+def workload(account_ids, requests, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(account_ids), rng.choice(account_ids), rng.randint(1, 100))
+        for _ in range(requests)
+    ]
+
+
+async def thread_per_call(api, client_id, transfers):
+    await asyncio.gather(*[
+        asyncio.to_thread(api.send, client_id, from_id, to_id, amount)
+        for from_id, to_id, amount in transfers
+    ])
+
+
+async def batched(async_api, client_id, transfers):
+    await asyncio.gather(*[
+        async_api.send(client_id, from_id, to_id, amount)
+        for from_id, to_id, amount in transfers
+    ])
+    await async_api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AsyncAPI throughput against one thread per call")
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=AsyncAPI.BATCH_SIZE)
+    parser.add_argument("--batch-window", type=float, default=AsyncAPI.BATCH_WINDOW)
+    args = parser.parse_args()
+
+    api, client_id, account_ids = new_api(args.accounts)
+    transfers = workload(account_ids, args.requests)
+
+    start = time.perf_counter()
+    asyncio.run(thread_per_call(api, client_id, transfers))
+    threaded = time.perf_counter() - start
+
+    async_api = AsyncAPI(api, batch_window=args.batch_window, batch_size=args.batch_size)
+    start = time.perf_counter()
+    asyncio.run(batched(async_api, client_id, transfers))
+    coalesced = time.perf_counter() - start
+
+    print(f"thread per call: {args.requests / threaded:>12.0f} sends/sec")
+    print(f"AsyncAPI:        {args.requests / coalesced:>12.0f} sends/sec  ({threaded / coalesced:.1f}x)")
+    print("AsyncAPI send latency percentiles (ms):", {
+        percentile: round(latency * 1000, 3)
+        for percentile, latency in async_api.latency_percentiles("send").items()
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from bank_system import TAccount
+from bench.workload import START, new_api
+from clocks import TClockCoordinator
+
+from datetime import timedelta
+import argparse
+import time
+
+
+def new_world(banks, accounts, columnar):
+    names = [f"Bank{bank}" for bank in range(banks)]
+    api = new_api(banks=names, columnar=columnar)
+
+    client_ids = api.new_clients({"name": ["Vasya"] * accounts, "surname": ["Beliy"] * accounts})
+    for name in names:
+        api.new_accounts({"client_id": client_ids, "bank": name, "type": "deposit", "initial_funds": [100] * accounts})
+    return api, names
+
+
+def sweep(api, names, days):
+    # the nightly loop as it is run today: every bank, every day
+    start = time.perf_counter()
+    for _ in range(days):
+        api.time_manager.next()
+        for bank in api.bank_manager.get_all_banks().values():
+            bank.update_accounts()
+    return time.perf_counter() - start
+
+
+def coordinated(api, names, days, behind):
+    coordinator = TClockCoordinator(api.bank_manager, api.time_manager)
+    coordinator.track_all()
+
+    # the banks ahead already ran their nightly batch, the rest lag by days
+    until = START + timedelta(days=days)
+    coordinator.advance(until, banks=names[behind:])
+    api.time_manager.set_datetime(until)
+
+    start = time.perf_counter()
+    coordinator.advance()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="catching lagging banks up against the global nightly sweep")
+    parser.add_argument("--banks", type=int, default=8)
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'bank':<10}{'behind':>8}{'sweep, s':>12}{'catch-up, s':>14}{'speedup':>10}")
+    for columnar in (False, True):
+        api, names = new_world(args.banks, args.accounts, columnar)
+        swept = sweep(api, names, args.days)
+        TAccount.all = {}
+
+        for behind in (1, args.banks):
+            api, names = new_world(args.banks, args.accounts, columnar)
+            caught_up = coordinated(api, names, args.days, behind)
+            TAccount.all = {}
+
+            print(
+                f"{'columnar' if columnar else 'objects':<10}{behind:>8}{swept:>12.3f}{caught_up:>14.4f}"
+                f"{swept / caught_up:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+from api import API
+from bank_system import TAccount
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+START = datetime(year=2021, month=9, day=3)
+
+
+def new_world(accounts, columnar, seed=0):
+    rng = random.Random(seed)
+    api = API(TToyTimeManager(start_datetime=START, step=timedelta(days=1)))
+
+    api.new_bank({"name": "Sber", "columnar": columnar})
+    bank = api.bank_manager.get_bank("Sber").Get()
+    bank.set_interest_rate(0.0001)
+    bank.set_credit_dayly_fee(1)
+
+    client_id = api.new_client({
+        "name": "Vasya",
+        "surname": "Beliy",
+        "optional_fields": {"address": "addr", "passport": "pas"},
+    })
+
+    account_ids = []
+    for _ in range(accounts):
+        type_str = rng.choice(["debit", "deposit", "credit"])
+        account_id = api.new_account(client_id, "Sber", type_str, {"initial_funds": rng.randint(1, 10 ** 4)})
+        if type_str == "debit":
+            api.top_up(account_id, rng.randint(1, 10 ** 4))
+        elif type_str == "credit":
+            api.withdraw(client_id, account_id, rng.randint(0, 100))
+        account_ids.append(account_id)
+
+    return api, account_ids
+
+
+def daily(api, until):
+    bank = api.bank_manager.get_bank("Sber").Get()
+    while api.time_manager.get_datetime() < until:
+        api.time_manager.next()
+        bank.update_accounts()
+
+
+def forwarded(api, until):
+    # the closed form even for float banks, which is what the error column is about
+    api.bank_manager.fast_forward(until, exact=False)
+
+
+def max_relative_error(daily_ids, forwarded_ids):
+    error = 0
+    for daily_id, forwarded_id in zip(daily_ids, forwarded_ids):
+        expected = TAccount.all[daily_id].funds
+        actual = TAccount.all[forwarded_id].funds
+        error = max(error, abs(expected - actual) / max(abs(expected), 1))
+    return error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fast_forward against the day-by-day update loop")
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 10])
+    args = parser.parse_args()
+
+    print(f"{'bank':<10}{'years':>6}{'daily, s':>12}{'fast_forward, s':>18}{'speedup':>10}{'max rel error':>16}")
+    for columnar in (False, True):
+        for years in args.years:
+            until = START + timedelta(days=365 * years)
+
+            daily_api, daily_ids = new_world(args.accounts, columnar)
+            start = time.perf_counter()
+            daily(daily_api, until)
+            daily_time = time.perf_counter() - start
+
+            forwarded_api, forwarded_ids = new_world(args.accounts, columnar)
+            start = time.perf_counter()
+            forwarded(forwarded_api, until)
+            forwarded_time = time.perf_counter() - start
+
+            print(
+                f"{'columnar' if columnar else 'objects':<10}{years:>6}{daily_time:>12.3f}{forwarded_time:>18.4f}"
+                f"{daily_time / forwarded_time:>10.0f}{max_relative_error(daily_ids, forwarded_ids):>16.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from bank_system import TAccount
+from history import THistoryIndex, to_timestamp
+from journal import TMappedJournal
+from transaction import ETransactionType, TTransaction, TTransactionManager
+
+from datetime import datetime, timedelta
+import argparse
+import numpy as np
+from types import SimpleNamespace
+import shutil
+import tempfile
+import time
+
+START = datetime(year=2021, month=1, day=1)
+
+
+def populate(journal, index, accounts, banks, transactions, chunk, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"account-{number}" for number in range(accounts)]
+
+    # only the account -> bank resolution of the index needs the registry
+    for number, account_id in enumerate(ids):
+        TAccount.all[account_id] = SimpleNamespace(bank=SimpleNamespace(name=f"bank-{number % banks}"))
+
+    seconds_per_transaction = 365 * 24 * 3600 / transactions
+    for offset in range(0, transactions, chunk):
+        size = min(chunk, transactions - offset)
+        froms = rng.integers(0, accounts, size)
+        tos = rng.integers(0, accounts, size)
+        amounts = rng.integers(1, 1000, size)
+
+        batch = [
+            TTransaction(
+                ids[froms[row]], ids[tos[row]], int(amounts[row]), ETransactionType.A2A,
+                START + timedelta(seconds=(offset + row) * seconds_per_transaction),
+            )
+            for row in range(size)
+        ]
+        position = len(journal)
+        journal.extend(batch)
+        for offset, transaction in enumerate(batch):
+            index.add(transaction, position + offset)
+
+    return ids
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="indexed history queries against a linear journal scan")
+    parser.add_argument("--transactions", type=int, default=50_000_000)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--banks", type=int, default=10)
+    parser.add_argument("--chunk", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        journal = TMappedJournal(path)
+        index = THistoryIndex(TTransactionManager(None, journal))
+
+        start = time.perf_counter()
+        ids = populate(journal, index, args.accounts, args.banks, args.transactions, args.chunk)
+        print(f"built journal and index for {args.transactions} transactions in {time.perf_counter() - start:.1f}s")
+
+        account_id = ids[0]
+        account_index = journal.account_to_index(account_id)
+        march = datetime(year=2021, month=3, day=1)
+        april = datetime(year=2021, month=4, day=1)
+
+        def linear_statement():
+            low, high = to_timestamp(march), to_timestamp(april)
+            rows = []
+            for segment in journal.segments():
+                mask = (
+                    ((segment['id_from'] == account_index) | (segment['id_to'] == account_index)) &
+                    (segment['timestamp'] >= low) & (segment['timestamp'] < high)
+                )
+                rows.append(segment[mask])
+            return [journal.decode(record) for record in np.concatenate(rows)]
+
+        linear_time, linear = timed(linear_statement, args.repeat)
+        indexed_time, indexed = timed(lambda: index.statement(account_id, march, april), args.repeat)
+        assert len(linear) == len(indexed)
+
+        print(f"statement for one account in March: {len(indexed)} transactions")
+        print(f"  linear scan (vectorized): {linear_time * 1000:>10.2f} ms")
+        print(f"  posting list index:       {indexed_time * 1000:>10.2f} ms  ({linear_time / indexed_time:.0f}x)")
+
+        journal.close()
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from util.gen import TCounterGenerator, TNoRepetitionGenerator, new_generator
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+
+class TLegacyGenerator(TNoRepetitionGenerator):
+    def gen(self, len: int):
+        import numpy as np
+
+        while True:
+            seq = ''.join(np.random.choice(self.chars, size=len, replace=True))
+            if not seq in self.was:
+                break
+
+        self.was.add(seq)
+        return seq
+
+
+def measure(make_generator, count, size, trace):
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+
+    generator = make_generator()
+    ids = []
+
+    start = time.perf_counter()
+    for _ in range(count):
+        ids.append(generator.gen(size))
+    elapsed = time.perf_counter() - start
+
+    memory = 0
+    if trace:
+        # the ids themselves are owned by the caller, only the generator state is counted
+        del ids
+        gc.collect()
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="id allocation throughput and memory")
+    parser.add_argument("--count", type=int, default=10_000_000)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--legacy-count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    generators = [
+        ("legacy", TLegacyGenerator, args.legacy_count),
+        ("random", TNoRepetitionGenerator, args.count),
+        ("counter", TCounterGenerator, args.count),
+        ("scrambled", lambda: new_generator("scrambled"), args.count),
+    ]
+
+    print(f"{'generator':<12}{'ids':>12}{'ids/sec':>14}{'state bytes/id':>16}")
+    for name, make_generator, count in generators:
+        elapsed, _ = measure(make_generator, count, args.size, trace=False)
+        _, memory = measure(make_generator, count, args.size, trace=True)
+        print(f"{name:<12}{count:>12}{count / elapsed:>14.0f}{memory / count:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
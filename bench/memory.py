@@ -0,0 +1,81 @@
+from api import API
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import argparse
+import gc
+import tracemalloc
+
+
+def measure(action, count):
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = action()
+    gc.collect()
+    return (tracemalloc.get_traced_memory()[0] - before) / count, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bytes per client, account and transaction")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    api = API(TToyTimeManager(start_datetime=datetime(year=2021, month=9, day=3), step=timedelta(days=1)))
+    api.new_bank({"name": "Sber"})
+    api.new_bank({"name": "Tinkoff", "columnar": True})
+
+    tracemalloc.start()
+
+    per_client, client_ids = measure(
+        lambda: [
+            api.new_client({
+                "name": "Vasya",
+                "surname": "Beliy",
+                "optional_fields": {"address": "addr", "passport": "pas"},
+            })
+            for _ in range(args.count)
+        ],
+        args.count,
+    )
+
+    per_account, account_ids = measure(
+        lambda: [api.new_account(client_id, "Sber", "debit") for client_id in client_ids],
+        args.count,
+    )
+    per_columnar_account, _ = measure(
+        lambda: [api.new_account(client_id, "Tinkoff", "debit") for client_id in client_ids],
+        args.count,
+    )
+
+    per_transaction, _ = measure(
+        lambda: [api.top_up(account_id, 100) for account_id in account_ids],
+        args.count,
+    )
+
+    # what a closed account still costs once it sits in the archive
+    per_close, _ = measure(lambda: api.registry.close_accounts(account_ids), args.count)
+    per_closed_account = per_account + per_transaction + per_close
+
+    # the journal still names the account, so its id string stays alive even after the purge
+    per_purge, _ = measure(
+        lambda: (api.registry.purge(datetime.max), api.registry.recycle()),
+        args.count,
+    )
+    per_purged_account = per_closed_account + per_purge
+
+    tracemalloc.stop()
+
+    print(f"{'object':<20}{'bytes':>10}")
+    for name, size in (
+        ("client", per_client),
+        ("account", per_account),
+        ("columnar account", per_columnar_account),
+        ("transaction", per_transaction),
+        ("closed account", per_closed_account),
+        ("purged account", per_purged_account),
+    ):
+        print(f"{name:<20}{size:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from bank_system import TAccount
+from bench.workload import new_api
+
+import argparse
+import gc
+import time
+
+# the bulk path is meant to be this many times faster than the per-call one
+TARGET = 10.0
+
+
+def per_call(api, count, bank):
+    client_ids = [
+        api.new_client({"name": "Vasya", "surname": "Beliy", "optional_fields": {"address": "addr", "passport": "pas"}})
+        for _ in range(count)
+    ]
+    return [api.new_account(client_id, bank, "debit") for client_id in client_ids]
+
+
+def bulk(api, count, bank):
+    client_ids = api.new_clients({
+        "name": ["Vasya"] * count,
+        "surname": ["Beliy"] * count,
+        "address": ["addr"] * count,
+        "passport": ["pas"] * count,
+    })
+    return api.new_accounts({"client_id": client_ids, "bank": bank, "type": "debit"})
+
+
+def measure(onboard, count, columnar, repeats):
+    # the best of a few runs, single runs swing too much to compare the two paths
+    best = 0
+    for _ in range(repeats):
+        api = new_api(columnar=columnar)
+
+        gc.collect()
+        start = time.perf_counter()
+        onboard(api, count, "Sber")
+        elapsed = time.perf_counter() - start
+
+        TAccount.all = {}
+        best = max(best, count / elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clients with one account each, per call and in bulk")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'bank':<10}{'per call/s':>14}{'bulk/s':>14}{'speedup':>10}{'target':>10}")
+    for columnar in (False, True):
+        single = measure(per_call, args.count, columnar, args.repeats)
+        batched = measure(bulk, args.count, columnar, args.repeats)
+        met = "met" if batched / single >= TARGET else "missed"
+        print(
+            f"{'columnar' if columnar else 'objects':<10}{single:>14.0f}{batched:>14.0f}"
+            f"{batched / single:>9.1f}x{met:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from sharded import TShardedAPI
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+import time
+
+
+BANKS = 8
+
+
+def new_world(workers, accounts):
+    api = TShardedAPI(
+        TToyTimeManager(start_datetime=datetime(year=2021, month=9, day=3), step=timedelta(days=1)),
+        workers=workers,
+    )
+
+    banks = [f"bank-{bank}" for bank in range(BANKS)]
+    for name in banks:
+        api.new_bank({"name": name, "interest_rate": 0.0001})
+
+    client_id = api.new_client({
+        "name": "Vasya",
+        "surname": "Beliy",
+        "optional_fields": {"address": "addr", "passport": "pas"},
+    })
+    account_ids = [api.new_account(client_id, banks[row % BANKS], "debit") for row in range(accounts)]
+    for account_id in account_ids:
+        api.top_up(account_id, 10 ** 6)
+
+    return api, client_id, account_ids
+
+
+def workload(api, account_ids, transfers, cross_shard, seed=0):
+    rng = random.Random(seed)
+
+    by_shard = {}
+    for account_id in account_ids:
+        by_shard.setdefault(api.accounts[account_id][0], []).append(account_id)
+
+    rows = []
+    for _ in range(transfers):
+        from_id = rng.choice(account_ids)
+        if rng.random() < cross_shard:
+            to_id = rng.choice(account_ids)
+        else:
+            to_id = rng.choice(by_shard[api.accounts[from_id][0]])
+        rows.append((from_id, to_id, rng.randint(1, 100)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TShardedAPI scaling over worker processes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--transfers", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--cross-shard", type=float, default=0.1, help="share of transfers between shards")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cpus, {BANKS} banks, {args.accounts} accounts")
+    print(f"{'workers':<9}{'nightly s/day':>15}{'sends/sec':>14}{'total funds':>20}")
+
+    for workers in args.workers:
+        api, client_id, account_ids = new_world(workers, args.accounts)
+        with api:
+            transfers = workload(api, account_ids, args.transfers, args.cross_shard)
+
+            start = time.perf_counter()
+            api.advance(args.days)
+            nightly = (time.perf_counter() - start) / args.days
+
+            start = time.perf_counter()
+            for offset in range(0, len(transfers), args.batch):
+                batch = transfers[offset:offset + args.batch]
+                api.send_many(
+                    [client_id] * len(batch),
+                    [from_id for from_id, _, _ in batch],
+                    [to_id for _, to_id, _ in batch],
+                    [amount for _, _, amount in batch],
+                )
+            sends = len(transfers) / (time.perf_counter() - start)
+
+            print(f"{workers:<9}{nightly:>15.4f}{sends:>14.0f}{api.total_funds():>20.2f}")
+
+
+if __name__ == "__main__":
+    main()
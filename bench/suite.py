@@ -0,0 +1,256 @@
+from bench.workload import DEFAULT_MIX, fund, new_api, new_clients, open_accounts, operations, parse_mix
+from journal import TMappedJournal
+
+import numpy as np
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+LOWER = "lower"
+HIGHER = "higher"
+
+
+def metric(value, unit, better=LOWER):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def account_creation(args, mix):
+    rng = random.Random(args.seed)
+    api = new_api()
+    client_ids = new_clients(api, max(args.accounts // 10, 1), rng)
+
+    start = time.perf_counter()
+    open_accounts(api, client_ids, args.accounts, mix, rng)
+    elapsed = time.perf_counter() - start
+
+    return {"accounts_per_second": metric(args.accounts / elapsed, "1/s", HIGHER)}
+
+
+def latencies(args, mix):
+    rng = random.Random(args.seed)
+    api = new_api(banks=("Sber", "Tinkoff"))
+    opened = open_accounts(api, new_clients(api, 100, rng), 1000, mix, rng)
+    fund(api, opened, rng)
+
+    samples = {"top_up": [], "withdraw": [], "send": []}
+    for op, client_id, account_id, to_id, amount in operations(opened, args.operations, rng):
+        start = time.perf_counter()
+        if op == "top_up":
+            api.top_up(account_id, amount)
+        elif op == "withdraw":
+            api.withdraw(client_id, account_id, amount)
+        else:
+            api.send(client_id, account_id, to_id, amount)
+        samples[op].append(time.perf_counter() - start)
+
+    results = {}
+    for op, latencies in samples.items():
+        p50, p99 = np.percentile(latencies, (50, 99)) * 1e6
+        results[f"{op}_p50_us"] = metric(p50, "us")
+        results[f"{op}_p99_us"] = metric(p99, "us")
+    return results
+
+
+def nightly(args, mix):
+    results = {}
+    for size in args.sizes:
+        for mode in ("objects", "columnar"):
+            rng = random.Random(args.seed)
+            api = new_api(columnar=mode == "columnar")
+            opened = open_accounts(api, new_clients(api, max(size // 100, 1), rng), size, mix, rng)
+            fund(api, opened, rng)
+            bank = api.bank_manager.get_bank("Sber").Get()
+
+            best = float("inf")
+            for _ in range(args.repeats):
+                api.time_manager.next()
+                start = time.perf_counter()
+                bank.update_accounts()
+                best = min(best, time.perf_counter() - start)
+
+            results[f"nightly_{mode}_{size}_seconds"] = metric(best, "s")
+            del api, opened, bank
+            gc.collect()
+    return results
+
+
+def footprint(args, mix):
+    rng = random.Random(args.seed)
+    api = new_api()
+    client_ids = new_clients(api, 100, rng)
+
+    tracemalloc.start()
+
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    opened = open_accounts(api, client_ids, args.accounts, mix, rng)
+    gc.collect()
+    per_account = (tracemalloc.get_traced_memory()[0] - before) / args.accounts
+
+    transactions = len(api.transaction_manager.all_transactions)
+    before = tracemalloc.get_traced_memory()[0]
+    fund(api, opened, rng)
+    gc.collect()
+    transactions = len(api.transaction_manager.all_transactions) - transactions
+    per_transaction = (tracemalloc.get_traced_memory()[0] - before) / max(transactions, 1)
+
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as path:
+        journal = TMappedJournal(path)
+        mapped = new_api(journal=journal)
+        mapped_opened = open_accounts(mapped, new_clients(mapped, 100, rng), 1000, mix, rng)
+        for _ in range(max(args.operations // 1000, 1)):
+            fund(mapped, mapped_opened, rng)
+        journal.flush()
+        on_disk = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        per_record = on_disk / max(len(journal), 1)
+        journal.close()
+
+    return {
+        "account_bytes": metric(per_account, "B"),
+        "journal_bytes_per_transaction": metric(per_transaction, "B"),
+        "mapped_journal_bytes_per_transaction": metric(per_record, "B"),
+    }
+
+
+def reporting(args, mix):
+    # a dashboard polling the bank summary while transfers keep arriving
+    rng = random.Random(args.seed)
+    api = new_api(columnar=True)
+    opened = open_accounts(api, new_clients(api, max(args.accounts // 10, 1), rng), args.accounts, mix, rng)
+    fund(api, opened, rng)
+    report = api.bank_manager.get_bank("Sber").Get().report()
+
+    # the first summary and the one after a nightly update rebuild the columns
+    api.time_manager.next()
+    api.bank_manager.get_bank("Sber").Get().update_accounts()
+    start = time.perf_counter()
+    report.summary()
+    rebuild = time.perf_counter() - start
+
+    polls = []
+    ops = operations(opened, args.operations, rng, shares=(0.5, 0.5, 0))
+    for offset in range(0, len(ops), 1000):
+        for op, client_id, account_id, to_id, amount in ops[offset:offset + 1000]:
+            if op == "top_up":
+                api.top_up(account_id, amount)
+            else:
+                api.withdraw(client_id, account_id, amount)
+
+        start = time.perf_counter()
+        report.summary()
+        polls.append(time.perf_counter() - start)
+
+    return {
+        "report_rebuild_ms": metric(rebuild * 1e3, "ms"),
+        "report_poll_per_1000_transactions_ms": metric(float(np.median(polls)) * 1e3, "ms"),
+    }
+
+
+SCENARIOS = {
+    "creation": account_creation,
+    "latency": latencies,
+    "nightly": nightly,
+    "footprint": footprint,
+    "reporting": reporting,
+}
+
+
+def run(args):
+    mix = parse_mix(args.mix)
+    results = {}
+    for name in args.scenarios:
+        results.update(SCENARIOS[name](args, mix))
+
+    return {
+        "metrics": results,
+        "config": {
+            "accounts": args.accounts,
+            "operations": args.operations,
+            "sizes": args.sizes,
+            "mix": mix,
+            "seed": args.seed,
+        },
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # a metric regresses when it moved the wrong way by more than threshold (relative)
+    regressions = []
+    for name, current in results["metrics"].items():
+        previous = baseline["metrics"].get(name)
+        if previous is None or previous["value"] == 0:
+            continue
+
+        change = (current["value"] - previous["value"]) / previous["value"]
+        if current["better"] == HIGHER:
+            change = -change
+
+        if change > threshold:
+            regressions.append(
+                f"{name}: {previous['value']:.4g} -> {current['value']:.4g} {current['unit']} ({change:+.0%} worse)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="banking core benchmarks with JSON baselines")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--accounts", type=int, default=20_000)
+    parser.add_argument("--operations", type=int, default=20_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10 ** 4, 10 ** 5],
+                        help="account counts for the nightly update, up to 10**7 on a big machine")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--mix", default=",".join(f"{name}={share}" for name, share in DEFAULT_MIX.items()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="replace the baseline with these results")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    # without a baseline nothing would be checked, so the run fails up front instead of passing
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        sys.exit(f"no baseline at {args.baseline}, run with --save-baseline first")
+
+    results = run(args)
+
+    print(f"{'metric':<44}{'value':>14}  unit")
+    for name, current in results["metrics"].items():
+        print(f"{name:<44}{current['value']:>14.4g}  {current['unit']}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file), args.threshold)
+
+    if regressions:
+        print("regressions:")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+    print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from bank_system import TAccount
+from bench.workload import new_api
+from tiered import TTieredStorage
+from util.gc_pause import paused_gc
+
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+
+def onboard(api, count):
+    client_ids = api.new_clients({
+        "name": ["Vasya"] * count,
+        "surname": ["Beliy"] * count,
+        "address": ["addr"] * count,
+        "passport": ["pas"] * count,
+    })
+    return api.new_accounts({"client_id": client_ids, "bank": "Sber", "type": "debit"}).tolist()
+
+
+def top_ups(api, account_ids, count, rng: random.Random):
+    chosen = [rng.choice(account_ids) for _ in range(count)]
+
+    # with fewer resident objects the collector runs its full passes more often, which is not the lookup cost
+    with paused_gc():
+        start = time.perf_counter()
+        for account_id in chosen:
+            api.top_up(account_id, 1)
+        return (time.perf_counter() - start) / count * 1e6
+
+
+def measure(count, hot, capacity, path):
+    rng = random.Random(0)
+
+    tracemalloc.start()
+    api = new_api(columnar=True)
+    account_ids = onboard(api, count)
+    storage = TTieredStorage(api, path, accounts=capacity, clients=capacity) if path is not None else None
+
+    if storage is not None:
+        storage.flush()
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # the hot set is looked up once first, so the timings below are cache hits
+    hot_ids = account_ids[:hot]
+    for account_id in hot_ids:
+        api.top_up(account_id, 1)
+    hot_latency = top_ups(api, hot_ids, 100_000, rng)
+    cold_latency = top_ups(api, account_ids[hot:], 10_000, rng)
+
+    stats = storage.stats()["accounts"] if storage is not None else None
+    if storage is not None:
+        storage.close()
+    TAccount.all = {}
+    return memory / count, hot_latency, cold_latency, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="memory and top_up latency with the dormant accounts on disk")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--hot", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'storage':<12}{'bytes/account':>15}{'hot µs':>10}{'cold µs':>10}{'evictions':>12}{'writebacks':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, path in (("in memory", None), ("tiered", os.path.join(directory, "cold.sqlite"))):
+            per_account, hot, cold, stats = measure(args.count, args.hot, 2 * args.hot, path)
+            evictions, writebacks = (stats["evictions"], stats["writebacks"]) if stats is not None else ("-", "-")
+            print(f"{name:<12}{per_account:>15.0f}{hot:>10.2f}{cold:>10.2f}{evictions:>12}{writebacks:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from bench.workload import new_api, new_clients, open_accounts
+from wal import TWriteAheadLog
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def new_world(wal, accounts, concurrent=False):
+    rng = random.Random(0)
+    api = new_api(journal=wal, concurrent=concurrent)
+    opened = open_accounts(api, new_clients(api, 10, rng), accounts, {"debit": 1}, rng)
+    for _, account_id, _ in opened:
+        api.top_up(account_id, 10 ** 6)
+    if wal is not None:
+        wal.commit()
+    return api, opened
+
+
+def transfers(opened, count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        client_id, from_id, _ = rng.choice(opened)
+        rows.append((client_id, from_id, rng.choice(opened)[1], rng.randint(1, 100)))
+    return rows
+
+
+def run(api, rows, threads):
+    def send(part):
+        for client_id, from_id, to_id, amount in part:
+            api.send(client_id, from_id, to_id, amount)
+
+    workers = [threading.Thread(target=send, args=(rows[thread::threads],)) for thread in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(rows) / (time.perf_counter() - start)
+
+
+def measure(args, threads, **wal_kwargs):
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        wal = None if wal_kwargs.get("group_size") is None else TWriteAheadLog(os.path.join(directory, "wal"), **wal_kwargs)
+        api, opened = new_world(wal, args.accounts, concurrent=threads > 1)
+        syncs = wal.syncs if wal is not None else 0
+
+        sends = run(api, transfers(opened, args.transfers, seed=threads), threads)
+
+        if wal is None:
+            return sends, 0
+        wal.close()
+        return sends, args.transfers / max(wal.syncs - syncs, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="transfer throughput under the write-ahead log")
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[1, 8, 64, 512])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--group-timeout", type=float, default=0.0005)
+    parser.add_argument("--dir", help="where the log lives, its disk decides the fsync cost")
+    args = parser.parse_args()
+
+    print(f"{'mode':<34}{'sends/sec':>12}{'records/fsync':>16}")
+
+    sends, _ = measure(args, 1)
+    print(f"{'no log':<34}{sends:>12.0f}{'-':>16}")
+
+    # fsync every group_size records, the tail of a group may be lost in a crash
+    for group_size in args.group_sizes:
+        sends, per_sync = measure(args, 1, group_size=group_size, wait=False)
+        print(f"{f'batched, group {group_size}':<34}{sends:>12.0f}{per_sync:>16.1f}")
+
+    # every send is durable when it returns, concurrent senders share fsyncs
+    for threads in args.threads:
+        for group_timeout in (0.0, args.group_timeout):
+            sends, per_sync = measure(args, threads, group_size=max(args.group_sizes), group_timeout=group_timeout)
+            mode = f"durable, {threads} threads, wait {group_timeout * 1e3:g}ms"
+            print(f"{mode:<34}{sends:>12.0f}{per_sync:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from api import API
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import random
+
+START = datetime(year=2021, month=9, day=3)
+
+DEFAULT_MIX = {"debit": 0.6, "deposit": 0.3, "credit": 0.1}
+
+
+def parse_mix(text: str) -> dict:
+    # "debit=0.6,deposit=0.3,credit=0.1"
+    mix = {}
+    for part in text.split(","):
+        type_str, share = part.split("=")
+        mix[type_str.strip()] = float(share)
+
+    if sum(mix.values()) <= 0:
+        raise ValueError(f"account mix '{text}' has no weight")
+    return mix
+
+
+def new_api(banks=("Sber",), journal=None, concurrent=False, **bank_kwargs):
+    api = API(TToyTimeManager(start_datetime=START, step=timedelta(days=1)), journal, concurrent)
+    for name in banks:
+        api.new_bank({"name": name, **bank_kwargs})
+        bank = api.bank_manager.get_bank(name).Get()
+        bank.set_interest_rate(0.0001)
+        bank.set_credit_dayly_fee(1)
+        bank.set_limit_for_suspicious_accounts(1000)
+    return api
+
+
+def new_clients(api, count, rng: random.Random):
+    return [
+        api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            # roughly one client in ten is suspicious
+            "optional_fields": {"address": "addr", "passport": "pas"} if rng.random() > 0.1 else {},
+        })
+        for _ in range(count)
+    ]
+
+
+def open_accounts(api, client_ids, accounts, mix=DEFAULT_MIX, rng: random.Random = None):
+    rng = rng or random.Random(0)
+    types = list(mix)
+    weights = [mix[type_str] for type_str in types]
+    banks = list(api.bank_manager.get_all_banks())
+
+    opened = []
+    for type_str in rng.choices(types, weights, k=accounts):
+        client_id = rng.choice(client_ids)
+        account_id = api.new_account(client_id, rng.choice(banks), type_str, {"initial_funds": rng.randint(1, 10 ** 4)})
+        opened.append((client_id, account_id, type_str))
+    return opened
+
+
+def fund(api, opened, rng: random.Random):
+    for client_id, account_id, type_str in opened:
+        if type_str == "debit":
+            api.top_up(account_id, rng.randint(1, 10 ** 4))
+        elif type_str == "credit":
+            api.withdraw(client_id, account_id, rng.randint(0, 100))
+
+
+def operations(opened, count, rng: random.Random, shares=(0.3, 0.2, 0.5)):
+    # (op, client_id, account_id, to_id, amount) tuples; shares are top_up, withdraw, send
+    ops = rng.choices(("top_up", "withdraw", "send"), shares, k=count)
+    return [
+        (op, *rng.choice(opened)[:2], rng.choice(opened)[1], rng.randint(1, 100))
+        for op in ops
+    ]
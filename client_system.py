@@ -1,9 +1,13 @@
+from util.gc_pause import paused_gc
 from util.gen import TNoRepetitionGenerator
 
 from enum import Enum
+import itertools
 
 
 class TClient(object):
+    __slots__ = ("id", "name", "surname", "optional_fields", "is_suspicious", "cached_info", "__weakref__")
+
     IdsGen = TNoRepetitionGenerator()
     IdSize = 32
 
@@ -15,9 +19,11 @@ class TClient(object):
             return self.name.lower()
     
     class TInfo:
+        __slots__ = ("client_id", "is_suspicious")
+
         def __init__(self, client):
             self.client_id = client.id
-            self.is_suspicious = not client.has_all_fields()
+            self.is_suspicious = client.is_suspicious
 
     def __init__(self, name: str, surname: str):
         self.id = TClient.IdsGen.gen(TClient.IdSize)
@@ -27,27 +33,50 @@ class TClient(object):
 
         self.optional_fields = {}
 
+        self.is_suspicious = not self.has_all_fields()
+        self.cached_info = None
+
+    @classmethod
+    def restore(cls, client_id, name: str, surname: str, optional_fields: dict, is_suspicious=None):
+        # a client whose id was issued elsewhere, e.g. by a snapshot, a bulk onboarding or another shard
+        client = cls.__new__(cls)
+        client.id = client_id
+        client.name = name
+        client.surname = surname
+        client.optional_fields = optional_fields
+        client.is_suspicious = not client.has_all_fields() if is_suspicious is None else is_suspicious
+        client.cached_info = None
+        return client
+
     @property
     def info(self):
-        return TClient.TInfo(self)
+        if self.cached_info is None:
+            self.cached_info = TClient.TInfo(self)
+        return self.cached_info
 
-    def update_optional_fields(self, fields):
+    def update_optional_fields(self, fields) -> bool:
         for field, value in fields.items():
             self.optional_fields[field] = value
 
+        is_suspicious = not self.has_all_fields()
+        if is_suspicious == self.is_suspicious:
+            return False
+
+        self.is_suspicious = is_suspicious
+        self.cached_info = None
+        return True
+
     def has_all_fields(self) -> bool:
         for field in TClient.TOptionalFields:
             if not str(field) in self.optional_fields:
                 return False
         return True
 
-    def __del__(self):
-        TClient.IdsGen.free(self.id)
-
 
 class TClientManager(object):
     def __init__(self):
         self.clients = {}
+        self.client_accounts = {}
 
     def new_client(self, name: str, surname: str, optional_fields={}):
         client = TClient(name, surname)
@@ -56,10 +85,66 @@ class TClientManager(object):
         self.clients[client.id] = client
         return client.id
 
+    def restore_client(self, client_id, name: str, surname: str, optional_fields={}):
+        client = TClient.restore(client_id, name, surname, dict(optional_fields))
+        self.clients[client_id] = client
+        return client
+
+    def new_clients(self, names, surnames, optional_fields={}):
+        # optional_fields: field -> column, None or "" is a missing value
+        with paused_gc():
+            return self._new_clients(names, surnames, optional_fields)
+
+    def _new_clients(self, names, surnames, optional_fields):
+        client_ids = TClient.IdsGen.gen_many(TClient.IdSize, len(names))
+
+        required = {str(field) for field in TClient.TOptionalFields}
+        fields = list(optional_fields)
+        rows = zip(*optional_fields.values()) if fields else itertools.repeat(())
+
+        clients = self.clients
+        for client_id, name, surname, values in zip(client_ids, names, surnames, rows):
+            client_fields = {field: value for field, value in zip(fields, values) if value is not None and value != ""}
+            clients[client_id] = TClient.restore(
+                client_id, name, surname, client_fields, not required <= client_fields.keys()
+            )
+
+        return client_ids
+
     def is_client_suspicious(self, client_id):
         if not client_id in self.clients.keys():
             return None
-        return not self.clients[client_id].has_all_fields()
+        return self.clients[client_id].is_suspicious
+
+    def add_account(self, client_id, account_id):
+        self.client_accounts.setdefault(client_id, []).append(account_id)
+
+    def add_accounts(self, client_ids, account_ids):
+        client_accounts = self.client_accounts
+
+        # new clients with one account each, the usual onboarding, go in at once
+        owned = map(client_accounts.get, client_ids)
+        if len(set(client_ids)) == len(client_ids) and all(seen is None for seen in owned):
+            client_accounts.update({client_id: [account_id] for client_id, account_id in zip(client_ids, account_ids)})
+            return
+
+        for client_id, account_id in zip(client_ids, account_ids):
+            owned = client_accounts.get(client_id)
+            if owned is None:
+                owned = client_accounts[client_id] = []
+            owned.append(account_id)
+
+    def remove_accounts(self, client_id, closed):
+        account_ids = self.client_accounts.get(client_id)
+        if account_ids is not None:
+            self.client_accounts[client_id] = [account_id for account_id in account_ids if not account_id in closed]
+
+    def remove_client(self, client_id):
+        self.client_accounts.pop(client_id, None)
+        return self.clients.pop(client_id, None)
+
+    def get_accounts(self, client_id):
+        return self.client_accounts.get(client_id, [])
 
     def get_client(self, client_id) -> TClient:
         if not client_id in self.clients.keys():
@@ -0,0 +1,129 @@
+from bank_system import TBank, TBankManager
+from time_system import ITimeManager, TToyTimeManager
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+import time
+
+
+class TBankClock(object):
+    def __init__(self, bank: TBank, offset: timedelta):
+        self.bank = bank
+        # the bank's local time minus the coordinator's
+        self.offset = offset
+
+        self.runs = 0
+        self.days = 0
+        self.seconds = 0.0
+
+    @property
+    def processed(self) -> datetime:
+        return self.bank.time_manager.get_datetime()
+
+    def target(self, until: datetime) -> datetime:
+        return until + self.offset
+
+    def lag(self, until: datetime) -> timedelta:
+        return max(self.target(until) - self.processed, timedelta(0))
+
+
+class TClockCoordinator(object):
+    WORKERS = 4
+
+    # time_manager is the reference clock, every tracked bank runs on a clock of its own
+    def __init__(self, bank_manager: TBankManager, time_manager: ITimeManager, workers=WORKERS):
+        self.bank_manager = bank_manager
+        self.time_manager = time_manager
+        self.workers = workers
+
+        self.clocks = {}
+        self.running = set()
+        self.lock = threading.Lock()
+
+        self.advances = 0
+
+    def track(self, bank: TBank, offset=timedelta(0)) -> TBankClock:
+        # the bank keeps the time it has processed up to, however the reference clock moves later
+        bank.set_time_manager(TToyTimeManager(start_datetime=bank.time_manager.get_datetime(), step=timedelta(days=1)))
+
+        clock = self.clocks[bank.name] = TBankClock(bank, offset)
+        return clock
+
+    def track_all(self, offsets={}):
+        for name, bank in self.bank_manager.get_all_banks().items():
+            if not name in self.clocks:
+                self.track(bank, offsets.get(name, timedelta(0)))
+
+    def behind(self, until=None):
+        until = until or self.time_manager.get_datetime()
+        return [name for name, clock in self.clocks.items() if clock.lag(until) > timedelta(0)]
+
+    def advance(self, until=None, banks=None) -> dict:
+        # brings the banks that are behind up to until (their local time), returns the days each one ran
+        until = until or self.time_manager.get_datetime()
+        names = self.behind(until)
+        if banks is not None:
+            names = [name for name in names if name in banks]
+        clocks = [self.clocks[name] for name in names]
+
+        with self.lock:
+            self.advances += 1
+            self.running.update(names)
+
+        if len(clocks) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(min(self.workers, len(clocks))) as pool:
+                days = list(pool.map(lambda clock: self._catch_up(clock, clock.target(until)), clocks))
+        else:
+            days = [self._catch_up(clock, clock.target(until)) for clock in clocks]
+
+        return dict(zip(names, days))
+
+    def _catch_up(self, clock: TBankClock, target: datetime) -> int:
+        started = time.perf_counter()
+        start = clock.processed
+
+        try:
+            clock.bank.fast_forward(target)
+            clock.bank.time_manager.set_datetime(target)
+        finally:
+            with self.lock:
+                self.running.discard(clock.bank.name)
+
+        days = (target.date() - start.date()).days
+        clock.runs += 1
+        clock.days += days
+        clock.seconds += time.perf_counter() - started
+        return days
+
+    def lag(self, until=None) -> dict:
+        until = until or self.time_manager.get_datetime()
+        return {name: clock.lag(until) for name, clock in self.clocks.items()}
+
+    def stats(self, until=None) -> dict:
+        until = until or self.time_manager.get_datetime()
+        lags = self.lag(until)
+
+        with self.lock:
+            running = set(self.running)
+
+        banks = {
+            name: {
+                "processed": clock.processed.isoformat(),
+                "offset_seconds": clock.offset.total_seconds(),
+                "lag_days": lags[name].days,
+                "lag_seconds": lags[name].total_seconds(),
+                "running": name in running,
+                "runs": clock.runs,
+                "days": clock.days,
+                "seconds": clock.seconds,
+            }
+            for name, clock in self.clocks.items()
+        }
+        return {
+            "advances": self.advances,
+            "behind": sum(lag > timedelta(0) for lag in lags.values()),
+            "running": len(running),
+            "max_lag_seconds": max((lag.total_seconds() for lag in lags.values()), default=0.0),
+            "banks": banks,
+        }
@@ -0,0 +1,41 @@
+from contextlib import contextmanager, nullcontext
+import threading
+
+
+class TNoLocks(object):
+    def accounts(self, *account_ids):
+        return nullcontext()
+
+    def all(self):
+        return nullcontext()
+
+
+class TShardedLocks(object):
+    SHARDS = 64
+
+    def __init__(self, shards=SHARDS):
+        self.locks = [threading.Lock() for _ in range(shards)]
+
+    def shard(self, account_id) -> int:
+        return hash(account_id) % len(self.locks)
+
+    @contextmanager
+    def _acquire(self, shards):
+        # shards are always taken in ascending order, so two transfers can not deadlock
+        for shard in shards:
+            self.locks[shard].acquire()
+        try:
+            yield
+        finally:
+            for shard in reversed(shards):
+                self.locks[shard].release()
+
+    def accounts(self, *account_ids):
+        return self._acquire(sorted({
+            self.shard(account_id)
+            for account_id in account_ids
+            if account_id is not None
+        }))
+
+    def all(self):
+        return self._acquire(range(len(self.locks)))
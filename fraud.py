@@ -0,0 +1,281 @@
+from bank_system import TAccount
+from history import MICROSECOND, to_timestamp
+from transaction import ETransactionType, TTransaction
+from util.status import Status
+
+import numpy as np
+
+from array import array
+from collections import OrderedDict, deque
+from datetime import timedelta
+import threading
+
+
+class TSlidingSketch(object):
+    # count-min sketch over a sliding window: the window is cut into buckets with a table each,
+    # totals keeps the sum of the live tables and an expired table is subtracted from it in bulk.
+    # Estimates never undercount; timestamps must not go backwards.
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, window: timedelta, buckets=8, width=1024, depth=4):
+        self.span = max(window // MICROSECOND // buckets, 1)
+        self.buckets = buckets
+        self.width = width
+
+        # fixed (a, b) pairs of the universal hashes ((a * h + b) mod p) mod width, one per row
+        self.seeds = [(0x9E3779B97F4A7C15 * (row + 1) % TSlidingSketch.PRIME, row + 1) for row in range(depth)]
+
+        self.table_size = depth * width
+        self.tables = [array('d', bytes(8 * self.table_size)) for _ in range(buckets)]
+        self.totals = array('d', bytes(8 * self.table_size))
+        self.epochs = [None] * buckets
+        self.epoch = None
+
+        self.last_key = None
+        self.last_columns = None
+
+    def _columns(self, key):
+        if key == self.last_key:
+            return self.last_columns
+
+        h = hash(key) & TSlidingSketch.PRIME
+        width = self.width
+        columns = [
+            row * width + (a * h + b) % TSlidingSketch.PRIME % width
+            for row, (a, b) in enumerate(self.seeds)
+        ]
+        self.last_key, self.last_columns = key, columns
+        return columns
+
+    def _advance(self, epoch):
+        if epoch == self.epoch:
+            return
+        self.epoch = epoch
+
+        totals = None
+        for slot, bucket_epoch in enumerate(self.epochs):
+            if bucket_epoch is not None and bucket_epoch <= epoch - self.buckets:
+                if totals is None:
+                    totals = np.frombuffer(self.totals)
+                table = np.frombuffer(self.tables[slot])
+                totals -= table
+                table[:] = 0
+                self.epochs[slot] = None
+
+    def add(self, key, value, timestamp):
+        epoch = timestamp // self.span
+        self._advance(epoch)
+
+        slot = epoch % self.buckets
+        self.epochs[slot] = epoch
+
+        table = self.tables[slot]
+        totals = self.totals
+        for column in self._columns(key):
+            table[column] += value
+            totals[column] += value
+
+    def estimate(self, key, timestamp) -> float:
+        self._advance(timestamp // self.span)
+
+        totals = self.totals
+        return min(totals[column] for column in self._columns(key))
+
+
+class IFraudRule(object):
+    def check(self, transaction: TTransaction, client_from, client_to, timestamp):
+        # the reason to reject the transaction or None
+        raise NotImplementedError("check must be implemented")
+
+    def record(self, transaction: TTransaction, client_from, client_to, timestamp):
+        raise NotImplementedError("record must be implemented")
+
+
+class TVelocityRule(IFraudRule):
+    # limits what leaves an account (or all accounts of a client) within a sliding window
+    def __init__(self, window: timedelta, max_count=None, max_amount=None, by_client=False, **sketch):
+        self.name = "client velocity" if by_client else "account velocity"
+        self.max_count = max_count
+        self.max_amount = max_amount
+        self.by_client = by_client
+
+        self.counts = TSlidingSketch(window, **sketch) if max_count is not None else None
+        self.amounts = TSlidingSketch(window, **sketch) if max_amount is not None else None
+
+    def _key(self, transaction, client_from):
+        return client_from if self.by_client else transaction.id_from
+
+    def check(self, transaction, client_from, client_to, timestamp):
+        key = self._key(transaction, client_from)
+        if key is None:
+            return None
+
+        if self.counts is not None:
+            count = self.counts.estimate(key, timestamp) + 1
+            if count > self.max_count:
+                return f"{self.name}: {count:.0f} transfers > {self.max_count}"
+
+        if self.amounts is not None:
+            amount = self.amounts.estimate(key, timestamp) + transaction.amount
+            if amount > self.max_amount:
+                return f"{self.name}: {amount} > {self.max_amount}"
+
+        return None
+
+    def record(self, transaction, client_from, client_to, timestamp):
+        key = self._key(transaction, client_from)
+        if key is None:
+            return
+
+        if self.counts is not None:
+            self.counts.add(key, 1, timestamp)
+        if self.amounts is not None:
+            self.amounts.add(key, transaction.amount, timestamp)
+
+
+class TFanRule(IFraudRule):
+    # limits the number of distinct counterparts of an account in A2A transfers within a sliding window:
+    # fan-out catches dispersal to many accounts, fan-in collection from many
+    MAX_ACCOUNTS = 1 << 20
+
+    def __init__(self, window: timedelta, max_in=None, max_out=None, max_accounts=MAX_ACCOUNTS):
+        self.name = "fan"
+        self.window = window // MICROSECOND
+        self.max_in = max_in
+        self.max_out = max_out
+        # past this many tracked accounts the least recently active ones are forgotten, even inside the window
+        self.max_accounts = max_accounts
+
+        # account id -> counterpart id -> last timestamp, oldest first and at most max + 1 entries.
+        # Accounts are ordered by their last transfer, so the ones idle for a whole window are dropped from the front
+        self.incoming = OrderedDict()
+        self.outgoing = OrderedDict()
+
+    def _distinct(self, table, key, counterpart, timestamp) -> int:
+        seen = table.get(key)
+        if seen is None:
+            return 1
+
+        while seen and next(iter(seen.values())) <= timestamp - self.window:
+            seen.popitem(last=False)
+        if not seen:
+            del table[key]
+            return 1
+
+        return len(seen) + (not counterpart in seen)
+
+    def check(self, transaction, client_from, client_to, timestamp):
+        if transaction.type != ETransactionType.A2A:
+            return None
+
+        if self.max_out is not None:
+            count = self._distinct(self.outgoing, transaction.id_from, transaction.id_to, timestamp)
+            if count > self.max_out:
+                return f"fan-out: {count} receivers > {self.max_out}"
+
+        if self.max_in is not None:
+            count = self._distinct(self.incoming, transaction.id_to, transaction.id_from, timestamp)
+            if count > self.max_in:
+                return f"fan-in: {count} senders > {self.max_in}"
+
+        return None
+
+    def _remember(self, table, key, counterpart, timestamp, limit):
+        seen = table.get(key)
+        if seen is None:
+            seen = table[key] = OrderedDict()
+        else:
+            table.move_to_end(key)
+
+        seen[counterpart] = timestamp
+        seen.move_to_end(counterpart)
+        if len(seen) > limit + 1:
+            seen.popitem(last=False)
+
+        # accounts idle for a whole window have nothing left to count, past the cap the idlest go anyway
+        while table:
+            oldest = next(iter(table.values()))
+            if len(table) <= self.max_accounts and next(reversed(oldest.values())) > timestamp - self.window:
+                break
+            table.popitem(last=False)
+
+    def record(self, transaction, client_from, client_to, timestamp):
+        if transaction.type != ETransactionType.A2A:
+            return
+
+        if self.max_out is not None:
+            self._remember(self.outgoing, transaction.id_from, transaction.id_to, timestamp, self.max_out)
+        if self.max_in is not None:
+            self._remember(self.incoming, transaction.id_to, transaction.id_from, timestamp, self.max_in)
+
+
+class TFraudEngine(object):
+    ALERTS = 1024
+
+    def __init__(self, rules, block=True, alerts=ALERTS):
+        # block: a flagged transaction is rejected, otherwise it only raises an alert
+        self.rules = list(rules)
+        self.block = block
+
+        self.alerts = deque(maxlen=alerts)
+        self.checked = 0
+        self.flagged = {}
+
+        self.lock = threading.Lock()
+
+    def attach(self, transaction_manager):
+        transaction_manager.add_gate(self)
+
+    def add_rule(self, rule: IFraudRule):
+        with self.lock:
+            self.rules.append(rule)
+
+    def score(self, transaction: TTransaction, client_from, client_to):
+        timestamp = to_timestamp(transaction.datetime)
+
+        with self.lock:
+            self.checked += 1
+
+            reason = None
+            for rule in self.rules:
+                reason = rule.check(transaction, client_from, client_to, timestamp)
+                if reason is not None:
+                    self.flagged[rule.name] = self.flagged.get(rule.name, 0) + 1
+                    self.alerts.append((transaction, reason))
+                    if self.block:
+                        return reason
+                    break
+
+            for rule in self.rules:
+                rule.record(transaction, client_from, client_to, timestamp)
+
+        return reason
+
+    def admit(self, transaction: TTransaction, account_from, account_to) -> Status:
+        reason = self.score(
+            transaction,
+            account_from.client_id if account_from is not None else None,
+            account_to.client_id if account_to is not None else None,
+        )
+        if reason is not None and self.block:
+            return Status.Error(f"flagged as fraud: {reason}")
+        return Status.Ok()
+
+
+def client_of(account_id):
+    if account_id is None:
+        return None
+    account = TAccount.all.get(account_id)
+    return account.client_id if account is not None else None
+
+
+def rescore(journal, rules, client_of=client_of):
+    # replays the journal through fresh rules in clock order; gives (position, reason) for every flag
+    engine = TFraudEngine(rules, block=False, alerts=None)
+
+    flagged = []
+    for position, transaction in enumerate(journal):
+        reason = engine.score(transaction, client_of(transaction.id_from), client_of(transaction.id_to))
+        if reason is not None:
+            flagged.append((position, reason))
+    return flagged
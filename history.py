@@ -0,0 +1,123 @@
+from bank_system import TAccount
+from transaction import ETransactionType, TTransaction, TTransactionManager
+
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+import heapq
+
+
+EPOCH = datetime(year=1970, month=1, day=1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_timestamp(moment: datetime) -> int:
+    return (moment - EPOCH) // MICROSECOND
+
+
+class TPostingList(object):
+    def __init__(self):
+        self.positions = array('q')
+        self.timestamps = array('q')
+
+    def add(self, position, timestamp):
+        self.positions.append(position)
+        self.timestamps.append(timestamp)
+
+    def bounds(self, start: datetime = None, end: datetime = None):
+        # transactions are appended in clock order, so timestamps are sorted
+        low = 0 if start is None else bisect_left(self.timestamps, to_timestamp(start))
+        high = len(self.timestamps) if end is None else bisect_left(self.timestamps, to_timestamp(end))
+        return low, high
+
+    def range(self, start: datetime = None, end: datetime = None):
+        low, high = self.bounds(start, end)
+        return self.positions[low:high]
+
+    def __len__(self):
+        return len(self.positions)
+
+
+class THistoryIndex(object):
+    EMPTY = TPostingList()
+
+    def __init__(self, transaction_manager: TTransactionManager):
+        self.journal = transaction_manager.journal
+
+        self.accounts = {}
+        self.banks = {}
+        self.bank_pairs = {}
+        self.turnover = {}
+
+        for position, transaction in enumerate(self.journal):
+            self.add(transaction, position)
+        transaction_manager.subscribe(self.add)
+
+    @staticmethod
+    def _posting(postings, key) -> TPostingList:
+        posting = postings.get(key)
+        if posting is None:
+            posting = postings[key] = TPostingList()
+        return posting
+
+    @staticmethod
+    def _bank(account_id):
+        if account_id is None:
+            return None
+        account = TAccount.all.get(account_id)
+        return account.bank.name if account is not None else None
+
+    def add(self, transaction: TTransaction, position):
+        timestamp = to_timestamp(transaction.datetime)
+        day = transaction.datetime.date()
+
+        for account_id in {transaction.id_from, transaction.id_to} - {None}:
+            THistoryIndex._posting(self.accounts, account_id).add(position, timestamp)
+
+        bank_from = THistoryIndex._bank(transaction.id_from)
+        bank_to = THistoryIndex._bank(transaction.id_to)
+
+        for bank in {bank_from, bank_to} - {None}:
+            THistoryIndex._posting(self.banks, bank).add(position, timestamp)
+
+            daily = self.turnover.setdefault(bank, {})
+            daily[day] = daily.get(day, 0) + transaction.amount
+
+        if transaction.type == ETransactionType.A2A:
+            THistoryIndex._posting(self.bank_pairs, (bank_from, bank_to)).add(position, timestamp)
+
+    def _transactions(self, positions):
+        return [self.journal[position] for position in positions]
+
+    def statement(self, account_id, start: datetime = None, end: datetime = None):
+        posting = self.accounts.get(account_id, THistoryIndex.EMPTY)
+        return self._transactions(posting.range(start, end))
+
+    def history(self, account_id, page=0, page_size=50):
+        # newest first
+        posting = self.accounts.get(account_id, THistoryIndex.EMPTY)
+        high = len(posting) - page * page_size
+        low = max(high - page_size, 0)
+        if high <= 0:
+            return []
+        return self._transactions(reversed(posting.positions[low:high]))
+
+    def bank_transactions(self, bank_name, start: datetime = None, end: datetime = None):
+        posting = self.banks.get(bank_name, THistoryIndex.EMPTY)
+        return self._transactions(posting.range(start, end))
+
+    def between_banks(self, bank_a, bank_b, start: datetime = None, end: datetime = None):
+        directions = {(bank_a, bank_b), (bank_b, bank_a)}
+        positions = heapq.merge(*[
+            self.bank_pairs.get(direction, THistoryIndex.EMPTY).range(start, end)
+            for direction in directions
+        ])
+        return self._transactions(positions)
+
+    def daily_turnover(self, bank_name, start: date, end: date):
+        daily = self.turnover.get(bank_name, {})
+        days = (end - start).days
+        return {
+            day: daily.get(day, 0)
+            for day in (start + timedelta(days=offset) for offset in range(days + 1))
+        }
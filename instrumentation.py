@@ -0,0 +1,271 @@
+from api import API
+from bank_system import ESendResult, TAccount, TBank, TDebitAccount, TDepositAccount
+from transaction import TTransactionManager
+from util.status import Status
+
+import numpy as np
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cProfile
+import functools
+import io
+import json
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+
+
+def latency_bucket(latency) -> int:
+    # power-of-two buckets in microseconds: bucket b holds latencies in [2^(b-1), 2^b)
+    return int(latency * 1e6).bit_length()
+
+
+def rejection_reason(error: str) -> str:
+    # ids and amounts would make every message unique
+    error = re.sub(r"\b[0-9A-Za-z]{32}\b", "<id>", error)
+    return re.sub(r"-?\d+(\.\d+)?(e-?\d+)?", "<n>", error)
+
+
+class TMetrics(object):
+    def __init__(self):
+        self.counts = {}
+        self.rejected = {}
+        self.reasons = {}
+        self.histograms = {}
+
+        self.lock = threading.Lock()
+
+    def record(self, op, latency, ok=True, count=1, reason=None):
+        with self.lock:
+            self.counts[op] = self.counts.get(op, 0) + count
+            if not ok:
+                self.rejected[op] = self.rejected.get(op, 0) + count
+                if reason is not None:
+                    reasons = self.reasons.setdefault(op, {})
+                    reasons[reason] = reasons.get(reason, 0) + count
+
+            bucket = latency_bucket(latency)
+            histogram = self.histograms.setdefault(op, {})
+            histogram[bucket] = histogram.get(bucket, 0) + count
+
+    def observe(self, op, latency, result):
+        if isinstance(result, Status):
+            if result.IsOk():
+                self.record(op, latency)
+            else:
+                self.record(op, latency, ok=False, reason=rejection_reason(result.GetError()))
+        elif isinstance(result, np.ndarray) and result.dtype == np.int8:
+            # send_many: one code per transfer
+            codes, counts = np.unique(result, return_counts=True)
+            per_transfer = latency / max(len(result), 1)
+            for code, count in zip(codes.tolist(), counts.tolist()):
+                ok = code == ESendResult.OK.value
+                self.record(op, per_transfer, ok, count, None if ok else ESendResult(code).name)
+        else:
+            self.record(op, latency)
+
+    def operations(self):
+        operations = {}
+        with self.lock:
+            for op, count in self.counts.items():
+                stats = operations[op] = {
+                    "count": count,
+                    "rejected": self.rejected.get(op, 0),
+                    "latency_histogram_us": {
+                        f"<{1 << bucket}": hits for bucket, hits in sorted(self.histograms[op].items())
+                    },
+                }
+                if op in self.reasons:
+                    stats["reasons"] = dict(self.reasons[op])
+        return operations
+
+
+class TInstrumentation(object):
+    TARGETS = (
+        (API, ("new_client", "new_account", "top_up", "withdraw", "send", "send_many")),
+        (TAccount, ("top_up", "withdraw", "send")),
+        (TDebitAccount, ("withdraw",)),
+        (TDepositAccount, ("withdraw",)),
+        (TTransactionManager, ("new_transaction", "new_transactions")),
+        (TBank, ("update_accounts", "fast_forward")),
+    )
+
+    PROFILE_LINES = 25
+    TRACEMALLOC_LINES = 10
+
+    # the instrumentation that currently wraps the targets
+    active = None
+
+    def __init__(self):
+        self.metrics = TMetrics()
+        self.originals = {}
+
+        self.sample_rate = 0
+        self.profile = None
+        self.profile_lock = threading.Lock()
+
+        self.server = None
+
+    @property
+    def enabled(self) -> bool:
+        return TInstrumentation.active is self
+
+    def enable(self):
+        # the targets are wrapped only while enabled, so a disabled instrumentation costs nothing
+        if self.enabled:
+            return
+        if TInstrumentation.active is not None:
+            raise RuntimeError("another instrumentation is already enabled")
+
+        for cls, names in TInstrumentation.TARGETS:
+            for name in names:
+                method = cls.__dict__[name]
+                self.originals[(cls, name)] = method
+                setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", method))
+
+        TInstrumentation.active = self
+
+    def disable(self):
+        if not self.enabled:
+            return
+
+        for (cls, name), method in self.originals.items():
+            setattr(cls, name, method)
+        self.originals = {}
+
+        TInstrumentation.active = None
+
+    def reset(self):
+        self.metrics = TMetrics()
+        if self.profile is not None:
+            self.profile = cProfile.Profile()
+
+    def enable_profiling(self, sample_rate=0.01):
+        self.profile = self.profile or cProfile.Profile()
+        self.sample_rate = sample_rate
+
+    def disable_profiling(self):
+        self.sample_rate = 0
+
+    def enable_tracemalloc(self, frames=1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def disable_tracemalloc(self):
+        tracemalloc.stop()
+
+    def _wrap(self, op, method):
+        instrumentation = self
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                if instrumentation.sample_rate and random.random() < instrumentation.sample_rate:
+                    result = instrumentation._profiled(method, args, kwargs)
+                else:
+                    result = method(*args, **kwargs)
+            except Exception as error:
+                instrumentation.metrics.record(op, time.perf_counter() - started, ok=False, reason=type(error).__name__)
+                raise
+
+            instrumentation.metrics.observe(op, time.perf_counter() - started, result)
+            return result
+
+        return wrapper
+
+    def _profiled(self, method, args, kwargs):
+        # one sampled call at a time: nested or concurrent calls run unprofiled
+        if not self.profile_lock.acquire(blocking=False):
+            return method(*args, **kwargs)
+        try:
+            return self.profile.runcall(method, *args, **kwargs)
+        finally:
+            self.profile_lock.release()
+
+    def profile_stats(self, lines=PROFILE_LINES) -> str:
+        if self.profile is None:
+            return ""
+
+        output = io.StringIO()
+        with self.profile_lock:
+            stats = pstats.Stats(self.profile, stream=output)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(lines)
+        return output.getvalue()
+
+    def memory(self, lines=TRACEMALLOC_LINES):
+        if not tracemalloc.is_tracing():
+            return None
+
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics("lineno")[:lines]
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [{"site": str(statistic.traceback), "bytes": statistic.size} for statistic in statistics],
+        }
+
+    def report(self):
+        return {
+            "enabled": self.enabled,
+            "per_operation": self.metrics.operations(),
+            "profile": self.profile_stats(),
+            "memory": self.memory(),
+        }
+
+    def text(self) -> str:
+        lines = []
+        for op, stats in sorted(self.metrics.operations().items()):
+            lines.append(f'operation_count{{op="{op}"}} {stats["count"]}')
+            lines.append(f'operation_rejected{{op="{op}"}} {stats["rejected"]}')
+            for reason, count in sorted(stats.get("reasons", {}).items()):
+                lines.append(f'operation_rejected{{op="{op}",reason="{reason}"}} {count}')
+            for bucket, hits in stats["latency_histogram_us"].items():
+                lines.append(f'operation_latency_us{{op="{op}",bucket="{bucket}"}} {hits}')
+
+        memory = self.memory()
+        if memory is not None:
+            lines.append(f'traced_memory_bytes {memory["current_bytes"]}')
+            lines.append(f'traced_memory_peak_bytes {memory["peak_bytes"]}')
+
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host="127.0.0.1", port=0):
+        # GET /metrics gives text, /metrics.json the full report, /profile the sampled profile
+        instrumentation = self
+
+        class THandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics.json":
+                    body, content_type = json.dumps(instrumentation.report(), indent=2), "application/json"
+                elif self.path == "/profile":
+                    body, content_type = instrumentation.profile_stats(), "text/plain"
+                elif self.path in ("/", "/metrics"):
+                    body, content_type = instrumentation.text(), "text/plain"
+                else:
+                    self.send_error(404)
+                    return
+
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), THandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        self.disable()
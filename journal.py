@@ -0,0 +1,214 @@
+import numpy as np
+
+from transaction import ETransactionType, TTransaction
+
+from datetime import datetime, timedelta
+import os
+import threading
+
+
+class TMappedJournal(object):
+    RECORD = np.dtype([
+        ('id_from',   '<i8'),
+        ('id_to',     '<i8'),
+        ('amount',    '<f8'),
+        ('timestamp', '<i8'),
+        ('type',      'u1'),
+        ('padding',   'V7'),
+    ])
+
+    NO_ACCOUNT = -1
+    EPOCH = datetime(year=1970, month=1, day=1)
+    MICROSECOND = timedelta(microseconds=1)
+
+    SEGMENT_RECORDS = 1 << 20
+    SEGMENT_NAME = "segment-{:06d}.bin"
+    ACCOUNTS_NAME = "accounts.txt"
+
+    def __init__(self, path: str, segment_records=SEGMENT_RECORDS, fsync=True):
+        self.path = path
+        self.segment_records = segment_records
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+
+        self.account_ids = []
+        self.account_index = {}
+
+        # a crash may cut the last account id or the last record short, the torn tail is dropped
+        accounts_path = os.path.join(self.path, TMappedJournal.ACCOUNTS_NAME)
+        if os.path.exists(accounts_path):
+            with open(accounts_path, "rb+") as accounts:
+                data = accounts.read()
+                whole = data.rfind(b"\n") + 1
+                if whole != len(data):
+                    accounts.truncate(whole)
+            for line in data[:whole].decode().splitlines():
+                self._register(line)
+        self.accounts_file = open(accounts_path, "a")
+        self.accounts_dirty = False
+
+        self.sealed = []
+        self.segment = 0
+        while os.path.exists(self._segment_path(self.segment + 1)):
+            self.sealed.append(self._map(self.segment))
+            self.segment += 1
+
+        segment_path = self._segment_path(self.segment)
+        if os.path.exists(segment_path):
+            size = os.path.getsize(segment_path)
+            if size % TMappedJournal.RECORD.itemsize:
+                os.truncate(segment_path, size - size % TMappedJournal.RECORD.itemsize)
+
+            # so are the records that reached the disk before the account ids they point at
+            records = np.fromfile(segment_path, dtype=TMappedJournal.RECORD)
+            known = len(self.account_ids)
+            unknown = np.flatnonzero((records['id_from'] >= known) | (records['id_to'] >= known))
+            if len(unknown) > 0:
+                os.truncate(segment_path, int(unknown[0]) * TMappedJournal.RECORD.itemsize)
+
+        self.segment_file = open(self._segment_path(self.segment), "ab")
+        self.segment_size = self.segment_file.tell() // TMappedJournal.RECORD.itemsize
+        self.current = None
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, TMappedJournal.SEGMENT_NAME.format(segment))
+
+    def _map(self, segment):
+        path = self._segment_path(segment)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=TMappedJournal.RECORD)
+        return np.memmap(path, dtype=TMappedJournal.RECORD, mode="r")
+
+    def _register(self, account_id):
+        index = len(self.account_ids)
+        self.account_ids.append(account_id)
+        self.account_index[account_id] = index
+        return index
+
+    def account_to_index(self, account_id):
+        if account_id is None:
+            return TMappedJournal.NO_ACCOUNT
+
+        index = self.account_index.get(account_id)
+        if index is None:
+            index = self._register(account_id)
+            self.accounts_file.write(account_id + "\n")
+            self.accounts_dirty = True
+        return index
+
+    def index_to_account(self, index):
+        # an id the accounts file lost in a crash reads as no account
+        if index == TMappedJournal.NO_ACCOUNT or index >= len(self.account_ids):
+            return None
+        return self.account_ids[index]
+
+    def _seal(self):
+        self.segment_file.close()
+        self.sealed.append(self._map(self.segment))
+
+        self.segment += 1
+        self.segment_file = open(self._segment_path(self.segment), "ab")
+        self.segment_size = 0
+        self.current = None
+
+    def _encode(self, transactions):
+        records = np.zeros(len(transactions), dtype=TMappedJournal.RECORD)
+        records['id_from'] = [self.account_to_index(t.id_from) for t in transactions]
+        records['id_to'] = [self.account_to_index(t.id_to) for t in transactions]
+        records['amount'] = [t.amount for t in transactions]
+        records['timestamp'] = [
+            (t.datetime - TMappedJournal.EPOCH) // TMappedJournal.MICROSECOND
+            for t in transactions
+        ]
+        records['type'] = [t.type.value for t in transactions]
+        return records
+
+    def _write(self, records):
+        # the ids are on disk before the segment buffer holds a record that points at them
+        if self.accounts_dirty:
+            self._sync_accounts()
+
+        while len(records) > 0:
+            count = min(len(records), self.segment_records - self.segment_size)
+
+            self.segment_file.write(records[:count].tobytes())
+            self.segment_size += count
+            records = records[count:]
+
+            if self.segment_size == self.segment_records:
+                self._seal()
+
+    def append(self, transaction: TTransaction):
+        with self.lock:
+            self._write(self._encode([transaction]))
+
+    def extend(self, transactions):
+        transactions = list(transactions)
+        with self.lock:
+            self._write(self._encode(transactions))
+
+    def _sync_accounts(self):
+        self.accounts_file.flush()
+        if self.fsync:
+            os.fsync(self.accounts_file.fileno())
+        self.accounts_dirty = False
+
+    def _flush(self):
+        self._sync_accounts()
+        self.segment_file.flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        self.accounts_file.close()
+        self.segment_file.close()
+
+    def _current(self):
+        # the open segment is remapped only after it has grown
+        if self.current is None or len(self.current) != self.segment_size:
+            self._flush()
+            self.current = self._map(self.segment)
+        return self.current
+
+    def segments(self):
+        with self.lock:
+            return self.sealed + [self._current()]
+
+    def array(self):
+        return np.concatenate(self.segments())
+
+    def decode(self, record) -> TTransaction:
+        return TTransaction(
+            self.index_to_account(int(record['id_from'])),
+            self.index_to_account(int(record['id_to'])),
+            float(record['amount']),
+            ETransactionType(int(record['type'])),
+            TMappedJournal.EPOCH + int(record['timestamp']) * TMappedJournal.MICROSECOND,
+        )
+
+    def __getitem__(self, position):
+        # indexed like the list it replaces
+        size = len(self)
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError(f"journal position {position} out of range")
+
+        segment, offset = divmod(position, self.segment_records)
+        if segment < len(self.sealed):
+            return self.decode(self.sealed[segment][offset])
+        with self.lock:
+            return self.decode(self._current()[offset])
+
+    def __iter__(self):
+        for segment in self.segments():
+            for record in segment:
+                yield self.decode(record)
+
+    def __len__(self):
+        return len(self.sealed) * self.segment_records + self.segment_size
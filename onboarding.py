@@ -0,0 +1,58 @@
+from api import API
+from bank_system import TAccount
+from client_system import TClient
+
+import numpy as np
+
+import csv
+import itertools
+import json
+
+
+BATCH_SIZE = 65536
+
+
+def to_columns(rows) -> dict:
+    names = dict.fromkeys(name for row in rows for name in row)
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def read_rows(file, format: str):
+    if format == "csv":
+        return csv.DictReader(file)
+    if format == "jsonl":
+        return (json.loads(line) for line in file if line.strip())
+    raise ValueError(f"unknown format '{format}'")
+
+
+def read_batches(path: str, batch_size=BATCH_SIZE, format=None):
+    # columns of batch_size rows at a time from a CSV file with a header or a JSONL file
+    format = format or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+
+    with open(path, newline="") as file:
+        rows = read_rows(file, format)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            yield to_columns(batch)
+
+
+def concatenate(batches, size) -> np.ndarray:
+    batches = list(batches)
+    return np.concatenate(batches) if batches else np.empty(0, dtype=f'<U{size}')
+
+
+def onboard_clients(api: API, path: str, batch_size=BATCH_SIZE, format=None) -> np.ndarray:
+    return concatenate((api.new_clients(columns) for columns in read_batches(path, batch_size, format)), TClient.IdSize)
+
+
+def onboard_accounts(api: API, path: str, batch_size=BATCH_SIZE, format=None) -> np.ndarray:
+    def accounts():
+        for columns in read_batches(path, batch_size, format):
+            # CSV cells are strings and an empty cell means no initial funds
+            if "initial_funds" in columns:
+                columns["initial_funds"] = [float(value) if value not in (None, "") else 0 for value in columns["initial_funds"]]
+            yield api.new_accounts(columns)
+
+    return concatenate(accounts(), TAccount.IdSize)
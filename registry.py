@@ -0,0 +1,182 @@
+from bank_system import TAccount, TBankManager
+from client_system import TClient, TClientManager
+from time_system import ITimeManager
+from util.status import Status
+
+import numpy as np
+
+from datetime import datetime
+
+
+class TColdStore(object):
+    INITIAL_CAPACITY = 1024
+
+    RECORD = np.dtype([
+        ('id',              'S32'),
+        ('client_id',       'S32'),
+        ('bank',            '<i4'),
+        ('type',            'i1'),
+        ('funds',           '<f8'),
+        ('unpaid_interest', '<f8'),
+        ('closed_at',       'datetime64[us]'),
+    ])
+
+    def __init__(self):
+        self.records = np.zeros(TColdStore.INITIAL_CAPACITY, dtype=TColdStore.RECORD)
+        self.size = 0
+
+        self.banks = []
+        self.bank_indices = {}
+
+        # sorted positions of the ids, rebuilt on the first lookup after a change
+        self.order = None
+
+    def __len__(self):
+        return self.size
+
+    def _bank_index(self, name) -> int:
+        if not name in self.bank_indices:
+            self.bank_indices[name] = len(self.banks)
+            self.banks.append(name)
+        return self.bank_indices[name]
+
+    def add(self, accounts, closed_at: datetime):
+        if self.size + len(accounts) > len(self.records):
+            records = np.zeros(max(2 * len(self.records), self.size + len(accounts)), dtype=TColdStore.RECORD)
+            records[:self.size] = self.records[:self.size]
+            self.records = records
+
+        added = self.records[self.size:self.size + len(accounts)]
+        added['id'] = [account.id for account in accounts]
+        added['client_id'] = [account.client_id for account in accounts]
+        added['bank'] = [self._bank_index(account.bank.name) for account in accounts]
+        added['type'] = [account.type.value for account in accounts]
+        added['funds'] = [account.funds for account in accounts]
+        added['unpaid_interest'] = [getattr(account, "unpaid_interest", 0) for account in accounts]
+        added['closed_at'] = np.datetime64(closed_at, 'us')
+
+        self.size += len(accounts)
+        self.order = None
+
+    def find(self, account_id):
+        ids = self.records['id'][:self.size]
+        if self.order is None:
+            self.order = np.argsort(ids, kind="stable")
+
+        key = account_id.encode()
+        position = int(np.searchsorted(ids, key, sorter=self.order))
+        if position == self.size or ids[self.order[position]] != key:
+            return None
+
+        record = self.records[self.order[position]]
+        return {
+            "id": account_id,
+            "client_id": record['client_id'].decode(),
+            "bank": self.banks[record['bank']],
+            "type": int(record['type']),
+            "funds": record['funds'].item(),
+            "unpaid_interest": record['unpaid_interest'].item(),
+            "closed_at": record['closed_at'].item(),
+        }
+
+    def purge(self, before: datetime):
+        records = self.records[:self.size]
+        expired = records['closed_at'] < np.datetime64(before, 'us')
+
+        purged = [account_id.decode() for account_id in records['id'][expired]]
+        kept = records[~expired]
+
+        # the records are copied either way, so a mostly purged store also gives its memory back
+        capacity = len(self.records)
+        while capacity > TColdStore.INITIAL_CAPACITY and 4 * len(kept) < capacity:
+            capacity //= 2
+        self.records = np.zeros(capacity, dtype=TColdStore.RECORD)
+        self.records[:len(kept)] = kept
+
+        self.size = len(kept)
+        self.order = None
+
+        return purged
+
+
+class TRegistry(object):
+    RECYCLE_BATCH = 4096
+
+    def __init__(self, bank_manager: TBankManager, client_manager: TClientManager, time_manager: ITimeManager):
+        self.bank_manager = bank_manager
+        self.client_manager = client_manager
+        self.time_manager = time_manager
+
+        self.archive = TColdStore()
+
+        # ids waiting to go back to the generators
+        self.released_accounts = []
+        self.released_clients = []
+
+    def close_accounts(self, account_ids) -> Status:
+        account_ids = list(dict.fromkeys(account_ids))
+        accounts = [TAccount.all.get(account_id) for account_id in account_ids]
+        for account_id, account in zip(account_ids, accounts):
+            if account is None:
+                return Status.Error(f"No account with id {account_id}")
+
+        by_bank = {}
+        for account in accounts:
+            by_bank.setdefault(account.bank.name, (account.bank, []))[1].append(account)
+
+        # no transfer runs between the archived funds and the accounts going away
+        transaction_manager = self.bank_manager.transaction_manager
+        with transaction_manager.locks.all():
+            # funds are read before the bank forgets the accounts, so scheduled accounts settle first
+            self.archive.add(accounts, self.time_manager.get_datetime())
+
+            for bank, bank_accounts in by_bank.values():
+                bank._close_accounts(bank_accounts)
+
+            closed = set(account_ids)
+            for client_id in {account.client_id for account in accounts}:
+                self.client_manager.remove_accounts(client_id, closed)
+
+            for account_id in account_ids:
+                TAccount.all.pop(account_id)
+
+            transaction_manager.record(
+                "close_accounts", ids=account_ids, datetime=self.time_manager.get_datetime().isoformat()
+            )
+        return Status.Ok()
+
+    def close_account(self, account_id) -> Status:
+        return self.close_accounts([account_id])
+
+    def close_client(self, client_id) -> Status:
+        if self.client_manager.get_client(client_id) is None:
+            return Status.Error(f"No client with id {client_id}")
+
+        status = self.close_accounts(list(self.client_manager.get_accounts(client_id)))
+        if not status.IsOk():
+            return status
+
+        self.client_manager.remove_client(client_id)
+        self.released_clients.append(client_id)
+        self.bank_manager.transaction_manager.record("close_client", client_id=client_id)
+        self._maybe_recycle()
+
+        return Status.Ok()
+
+    def purge(self, before: datetime):
+        # archived accounts closed before `before` are dropped, their ids may be issued again
+        purged = self.archive.purge(before)
+        self.released_accounts.extend(purged)
+        self._maybe_recycle()
+        return len(purged)
+
+    def _maybe_recycle(self):
+        if len(self.released_accounts) + len(self.released_clients) >= TRegistry.RECYCLE_BATCH:
+            self.recycle()
+
+    def recycle(self):
+        TAccount.IdsGen.free_many(self.released_accounts)
+        TClient.IdsGen.free_many(self.released_clients)
+
+        self.released_accounts = []
+        self.released_clients = []
@@ -0,0 +1,227 @@
+from api import API
+from bank_system import ESendResult, TAccount
+from concurrency import TNoLocks
+from instrumentation import TInstrumentation, TMetrics
+from time_system import TToyTimeManager
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import time
+
+
+class TReplayStats(TMetrics):
+    def __init__(self):
+        TMetrics.__init__(self)
+
+        self.started = time.perf_counter()
+        self.elapsed = 0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def report(self, checksum):
+        total = sum(self.counts.values())
+        return {
+            "operations": total,
+            "seconds": self.elapsed,
+            "ops_per_second": total / self.elapsed if self.elapsed else 0,
+            "per_operation": self.operations(),
+            "checksum": checksum,
+        }
+
+
+class TReplayer(object):
+    CHUNK = 10000
+    WORKERS = 8
+
+    MODES = ("sequential", "batched", "parallel")
+    MONEY_OPERATIONS = ("top_up", "withdraw", "send")
+
+    def __init__(self, api: API, time_manager: TToyTimeManager, mode="sequential", chunk=CHUNK, workers=WORKERS):
+        if not mode in TReplayer.MODES:
+            raise ValueError(f"unknown replay mode '{mode}'")
+        if mode == "parallel" and isinstance(api.transaction_manager.locks, TNoLocks):
+            raise ValueError("parallel replay needs an API created with concurrent=True")
+
+        self.api = api
+        self.time_manager = time_manager
+        self.mode = mode
+        self.chunk = chunk
+        self.workers = workers
+
+        self.refs = {}
+        self.account_refs = []
+        self.stats = TReplayStats()
+
+    def resolve(self, ref):
+        return self.refs.get(ref, ref)
+
+    def replay(self, lines):
+        lines = iter(lines)
+        pool = ThreadPoolExecutor(self.workers) if self.mode == "parallel" else None
+
+        try:
+            while True:
+                operations = [json.loads(line) for line in itertools.islice(lines, self.chunk) if line.strip()]
+                if not operations:
+                    break
+                self._replay_chunk(operations, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stats.finish()
+        return self.stats.report(self.checksum())
+
+    def _replay_chunk(self, operations, pool):
+        start = 0
+        while start < len(operations):
+            end = start
+            while end < len(operations) and operations[end]["op"] in TReplayer.MONEY_OPERATIONS:
+                end += 1
+
+            if end == start:
+                self._apply(operations[start])
+                start += 1
+            elif self.mode == "batched":
+                self._apply_batched(operations[start:end])
+                start = end
+            elif self.mode == "parallel":
+                list(pool.map(self._apply, operations[start:end]))
+                start = end
+            else:
+                for operation in operations[start:end]:
+                    self._apply(operation)
+                start = end
+
+    def _apply(self, operation):
+        op = operation["op"]
+        started = time.perf_counter()
+        ok = True
+
+        if op == "new_client":
+            client_id = self.api.new_client({
+                "name": operation["name"],
+                "surname": operation["surname"],
+                "optional_fields": operation.get("optional_fields", {}),
+            })
+            self.refs[operation.get("ref", client_id)] = client_id
+        elif op == "new_bank":
+            kwargs = {key: value for key, value in operation.items() if key != "op"}
+            ok = self.api.new_bank(kwargs).IsOk()
+        elif op == "new_account":
+            account_id = self.api.new_account(
+                self.resolve(operation["client"]),
+                operation["bank"],
+                operation["type"],
+                operation.get("kwargs", {}),
+            )
+            ref = operation.get("ref", account_id)
+            self.refs[ref] = account_id
+            self.account_refs.append(ref)
+        elif op == "top_up":
+            ok = self.api.top_up(self.resolve(operation["account"]), operation["amount"]).IsOk()
+        elif op == "withdraw":
+            ok = self.api.withdraw(
+                self.resolve(operation["client"]),
+                self.resolve(operation["account"]),
+                operation["amount"],
+            ).IsOk()
+        elif op == "send":
+            ok = self.api.send(
+                self.resolve(operation["client"]),
+                self.resolve(operation["from"]),
+                self.resolve(operation["to"]),
+                operation["amount"],
+            ).IsOk()
+        elif op == "blacklist":
+            self.api.add_to_black_list(operation["bank"], self.resolve(operation["client"]))
+        elif op == "advance":
+            for _ in range(operation.get("days", 1)):
+                self.time_manager.next()
+                for bank in self.api.bank_manager.get_all_banks().values():
+                    bank.update_accounts()
+        else:
+            raise ValueError(f"unknown operation '{op}'")
+
+        self.stats.record(op, time.perf_counter() - started, ok)
+
+    def _apply_batched(self, operations):
+        start = 0
+        while start < len(operations):
+            if operations[start]["op"] != "send":
+                self._apply(operations[start])
+                start += 1
+                continue
+
+            end = start
+            while end < len(operations) and operations[end]["op"] == "send":
+                end += 1
+            sends = operations[start:end]
+
+            started = time.perf_counter()
+            results = self.api.send_many(
+                [self.resolve(send["client"]) for send in sends],
+                [self.resolve(send["from"]) for send in sends],
+                [self.resolve(send["to"]) for send in sends],
+                [send["amount"] for send in sends],
+            )
+            latency = (time.perf_counter() - started) / len(sends)
+
+            accepted = int((results == ESendResult.OK.value).sum())
+            self.stats.record("send", latency, ok=True, count=accepted)
+            self.stats.record("send", latency, ok=False, count=len(sends) - accepted)
+
+            start = end
+
+    def checksum(self):
+        # refs, not generated ids, so the same log always gives the same checksum
+        digest = hashlib.sha256()
+        for ref in sorted(self.account_refs):
+            digest.update(f"{ref}:{round(TAccount.all[self.refs[ref]].funds, 6)!r}\n".encode())
+        digest.update(str(len(self.api.transaction_manager.all_transactions)).encode())
+        return digest.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a JSONL operation log through api.API")
+    parser.add_argument("log", help="path to the JSONL log, '-' for stdin")
+    parser.add_argument("--mode", choices=TReplayer.MODES, default="sequential")
+    parser.add_argument("--chunk", type=int, default=TReplayer.CHUNK)
+    parser.add_argument("--workers", type=int, default=TReplayer.WORKERS)
+    parser.add_argument("--start", default="2021-09-03", help="clock start date")
+    parser.add_argument("--metrics-port", type=int, help="serve instrumentation on this local port while replaying")
+    parser.add_argument("--profile-rate", type=float, default=0, help="share of instrumented calls run under cProfile")
+    args = parser.parse_args()
+
+    instrumentation = None
+    if args.metrics_port is not None:
+        instrumentation = TInstrumentation()
+        instrumentation.enable()
+        if args.profile_rate:
+            instrumentation.enable_profiling(args.profile_rate)
+        host, port = instrumentation.serve(port=args.metrics_port)
+        print(f"metrics on http://{host}:{port}/metrics", file=sys.stderr)
+
+    time_manager = TToyTimeManager(start_datetime=datetime.fromisoformat(args.start), step=timedelta(days=1))
+    api = API(time_manager, concurrent=args.mode == "parallel")
+    replayer = TReplayer(api, time_manager, args.mode, args.chunk, args.workers)
+
+    log = sys.stdin if args.log == "-" else open(args.log)
+    with log:
+        report = replayer.replay(log)
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+    if instrumentation is not None:
+        instrumentation.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+from account_store import TAccountStore
+from transaction import ETransactionType
+
+import numpy as np
+
+import threading
+
+
+def percentiles(values, q):
+    if not len(values):
+        return dict.fromkeys(q)
+    return dict(zip(q, np.percentile(values, q).tolist()))
+
+
+class TBankReport(object):
+    # aggregates over one bank's accounts. The columns are rebuilt only when the bank's revision moves
+    # (accounts opened or closed, nightly updates); transactions are collected by a listener
+    # and folded in as deltas on the next query.
+    TYPES = {
+        TAccountStore.DEBIT:   "debit",
+        TAccountStore.DEPOSIT: "deposit",
+        TAccountStore.CREDIT:  "credit",
+    }
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.lock = threading.Lock()
+
+        self.revision = None
+        self.pending_ids = []
+        self.pending_deltas = []
+
+        # turnover by transaction kind: amounts and counts, from the whole journal
+        self.flows = {"top_up": 0, "withdraw": 0, "sent": 0, "received": 0}
+        self.flow_counts = dict.fromkeys(self.flows, 0)
+
+        self._rebuild()
+        for transaction in bank.transaction_manager.journal:
+            self._flow(transaction)
+        bank.transaction_manager.subscribe(self.observe)
+
+    def _rebuild(self):
+        accounts = [account for accounts in self.bank.accounts.values() for account in accounts]
+        store = self.bank.account_store
+        if store is None:
+            store = TAccountStore.gather(accounts)
+            rows = np.arange(len(accounts))
+        else:
+            # scheduled accounts accrue only when read, the raw columns lag behind until they settle
+            if self.bank.scheduler is not None:
+                for account in accounts:
+                    account.settle()
+            rows = np.array([account.index for account in accounts], dtype=np.int64)
+
+        self.rows = {account.id: row for row, account in enumerate(accounts)}
+        self.types = store.values('type')[rows].astype(np.int64) if len(accounts) else np.zeros(0, dtype=np.int64)
+        self.funds = store.values('funds')[rows] if len(accounts) else np.zeros(0)
+        self.unpaid_interest = store.values('unpaid_interest')[rows] if len(accounts) else np.zeros(0)
+
+        self.client_ids = list({account.client_id: None for account in accounts})
+        codes = {client_id: code for code, client_id in enumerate(self.client_ids)}
+        self.clients = np.array([codes[account.client_id] for account in accounts], dtype=np.int64)
+
+        self.credit = self.types == TAccountStore.CREDIT
+        self.type_counts = np.bincount(self.types, minlength=len(self.TYPES) + 1)
+        self.type_funds = np.bincount(self.types, weights=self.funds, minlength=len(self.TYPES) + 1)
+        self.client_funds = np.bincount(self.clients, weights=self.funds, minlength=len(self.client_ids))
+        self.type_unpaid_interest = np.bincount(self.types, weights=self.unpaid_interest, minlength=len(self.TYPES) + 1)
+        self.exposure = -np.minimum(self.funds[self.credit], 0).sum()
+
+        self.revision = self.bank.revision
+        self.pending_ids = []
+        self.pending_deltas = []
+
+    def _flow(self, transaction):
+        ours = self.rows
+        if transaction.type == ETransactionType.C2A:
+            kind = "top_up" if transaction.id_to in ours else None
+        elif transaction.type == ETransactionType.A2C:
+            kind = "withdraw" if transaction.id_from in ours else None
+        elif transaction.id_from in ours:
+            kind = "sent"
+        else:
+            kind = "received" if transaction.id_to in ours else None
+
+        if kind is not None:
+            self.flows[kind] += transaction.amount
+            self.flow_counts[kind] += 1
+
+    def observe(self, transaction, position):
+        # runs inline with every transaction of every bank, so it only appends
+        with self.lock:
+            if transaction.id_from in self.rows:
+                self.pending_ids.append(transaction.id_from)
+                self.pending_deltas.append(-transaction.amount)
+            if transaction.id_to in self.rows:
+                self.pending_ids.append(transaction.id_to)
+                self.pending_deltas.append(transaction.amount)
+            self._flow(transaction)
+
+    def refresh(self):
+        with self.lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self.revision != self.bank.revision:
+            self._rebuild()
+            return
+
+        if not self.pending_ids:
+            return
+
+        rows = np.array([self.rows[account_id] for account_id in self.pending_ids], dtype=np.int64)
+        deltas = np.array(self.pending_deltas)
+        self.pending_ids = []
+        self.pending_deltas = []
+
+        touched = np.unique(rows)
+        credit = touched[self.credit[touched]]
+        before = np.minimum(self.funds[credit], 0).sum()
+
+        np.add.at(self.funds, rows, deltas)
+        np.add.at(self.type_funds, self.types[rows], deltas)
+        np.add.at(self.client_funds, self.clients[rows], deltas)
+        self.exposure += before - np.minimum(self.funds[credit], 0).sum()
+
+    def summary(self):
+        with self.lock:
+            self._refresh()
+            return self._summary()
+
+    def _summary(self):
+        by_type = {
+            name: {
+                "accounts": int(self.type_counts[type]),
+                "funds": float(self.type_funds[type]),
+                "unpaid_interest": float(self.type_unpaid_interest[type]),
+            }
+            for type, name in self.TYPES.items()
+        }
+        return {
+            "accounts": len(self.rows),
+            "clients": len(self.client_ids),
+            "funds": float(self.type_funds.sum()),
+            "deposits": float(self.type_funds[TAccountStore.DEPOSIT]),
+            "credit_exposure": float(self.exposure),
+            "unpaid_interest": float(self.unpaid_interest.sum()),
+            "by_type": by_type,
+            "flows": dict(self.flows),
+            "flow_counts": dict(self.flow_counts),
+        }
+
+    def balances(self, type: str = None):
+        # a copy of the per-account funds, optionally of one account type
+        with self.lock:
+            self._refresh()
+            if type is None:
+                return self.funds.copy()
+            codes = {name: code for code, name in self.TYPES.items()}
+            return self.funds[self.types == codes[type]]
+
+    def percentiles(self, q=PERCENTILES, type: str = None):
+        return percentiles(self.balances(type), q)
+
+    def client_balances(self):
+        with self.lock:
+            self._refresh()
+            return dict(zip(self.client_ids, self.client_funds.tolist()))
+
+    def top_clients(self, count=10):
+        with self.lock:
+            self._refresh()
+            count = min(count, len(self.client_ids))
+            if not count:
+                return []
+
+            top = np.argpartition(-self.client_funds, count - 1)[:count]
+            top = top[np.argsort(-self.client_funds[top])]
+            return [(self.client_ids[code], float(self.client_funds[code])) for code in top]
+
+
+class TPortfolioReport(object):
+    # the same aggregates over every bank of a TBankManager
+    def __init__(self, bank_manager):
+        self.bank_manager = bank_manager
+
+    def summary(self):
+        banks = {name: bank.report().summary() for name, bank in self.bank_manager.get_all_banks().items()}
+
+        total = {
+            name: sum(summary[name] for summary in banks.values())
+            for name in ("accounts", "funds", "deposits", "credit_exposure", "unpaid_interest")
+        }
+        total["by_type"] = {
+            type: {
+                field: sum(summary["by_type"][type][field] for summary in banks.values())
+                for field in ("accounts", "funds", "unpaid_interest")
+            }
+            for type in TBankReport.TYPES.values()
+        }
+        total["banks"] = banks
+        return total
+
+    def percentiles(self, q=TBankReport.PERCENTILES, type: str = None):
+        funds = [bank.report().balances(type) for bank in self.bank_manager.get_all_banks().values()]
+        return percentiles(np.concatenate(funds) if funds else np.zeros(0), q)
+
+    def client_balances(self):
+        balances = {}
+        for bank in self.bank_manager.get_all_banks().values():
+            for client_id, funds in bank.report().client_balances().items():
+                balances[client_id] = balances.get(client_id, 0) + funds
+        return balances
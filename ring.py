@@ -0,0 +1,84 @@
+from multiprocessing import shared_memory
+import multiprocessing
+import pickle
+import struct
+import time
+
+
+class TSharedRing(object):
+    # single producer, single consumer queue of pickled messages in a shared memory block
+    CAPACITY = 1 << 22
+    POLL = 0.00005
+
+    HEADER = 16
+    LENGTH = struct.Struct("<I")
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.memory = shared_memory.SharedMemory(create=True, size=TSharedRing.HEADER + capacity)
+        self.owner = True
+
+        self.items = multiprocessing.Semaphore(0)
+        self._attach()
+
+    def _attach(self):
+        # counters[0] is the read position, written by the consumer only,
+        # counters[1] is the write position, written by the producer only
+        self.counters = self.memory.buf[:TSharedRing.HEADER].cast('Q')
+        self.data = self.memory.buf[TSharedRing.HEADER:TSharedRing.HEADER + self.capacity]
+
+    def __getstate__(self):
+        return {"name": self.memory.name, "capacity": self.capacity, "items": self.items}
+
+    def __setstate__(self, state):
+        self.capacity = state["capacity"]
+        self.memory = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+
+        self.items = state["items"]
+        self._attach()
+
+    def _write(self, position, data):
+        start = position % self.capacity
+        head = min(len(data), self.capacity - start)
+        self.data[start:start + head] = data[:head]
+        self.data[:len(data) - head] = data[head:]
+
+    def _read(self, position, size) -> bytes:
+        start = position % self.capacity
+        head = min(size, self.capacity - start)
+        return bytes(self.data[start:start + head]) + bytes(self.data[:size - head])
+
+    def put(self, message):
+        payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        size = TSharedRing.LENGTH.size + len(payload)
+        if size > self.capacity:
+            raise ValueError(f"message of {size} bytes does not fit into a ring of {self.capacity} bytes")
+
+        while self.capacity - (self.counters[1] - self.counters[0]) < size:
+            time.sleep(TSharedRing.POLL)
+
+        position = self.counters[1]
+        self._write(position, TSharedRing.LENGTH.pack(len(payload)))
+        self._write(position + TSharedRing.LENGTH.size, payload)
+        self.counters[1] = position + size
+
+        self.items.release()
+
+    def get(self, timeout=None):
+        if not self.items.acquire(timeout=timeout):
+            raise TimeoutError("ring is empty")
+
+        position = self.counters[0]
+        length, = TSharedRing.LENGTH.unpack(self._read(position, TSharedRing.LENGTH.size))
+        message = pickle.loads(self._read(position + TSharedRing.LENGTH.size, length))
+        self.counters[0] = position + TSharedRing.LENGTH.size + length
+
+        return message
+
+    def close(self):
+        self.counters.release()
+        self.data.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
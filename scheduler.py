@@ -0,0 +1,53 @@
+from time_system import ITimeManager
+
+from datetime import date, timedelta
+import heapq
+import itertools
+
+
+def next_month_start(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_starts(after: date, until: date):
+    day = next_month_start(after)
+    while day <= until:
+        yield day
+        day = next_month_start(day)
+
+
+class TEventScheduler(object):
+    def __init__(self, time_manager: ITimeManager):
+        self.time_manager = time_manager
+
+        # the last day whose events have been processed
+        self.date = time_manager.get_datetime().date()
+
+        self.events = []
+        self.sequence = itertools.count()
+
+    def schedule(self, day: date, callback):
+        heapq.heappush(self.events, (day, next(self.sequence), callback))
+
+    def cancel(self, owners):
+        # drops every event whose callback has one of owners as its owner
+        owners = set(owners)
+        self.events = [
+            event for event in self.events
+            if not getattr(event[2], "owner", None) in owners
+        ]
+        heapq.heapify(self.events)
+
+    def run_until(self, day: date):
+        while self.events and self.events[0][0] <= day:
+            event_day, _, callback = heapq.heappop(self.events)
+            self.date = max(self.date, event_day)
+            callback(event_day)
+
+        self.date = max(self.date, day)
+
+    def run_pending(self):
+        self.run_until(self.time_manager.get_datetime().date())
+
+    def __len__(self):
+        return len(self.events)
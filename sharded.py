@@ -0,0 +1,396 @@
+from api import API
+from bank_system import ESendResult, TAccount, send_status
+from client_system import TClientManager
+from ring import TSharedRing
+from time_system import TToyTimeManager
+from transaction import ETransactionType
+from util.gen import new_generator
+from util.status import Status
+
+import numpy as np
+
+from datetime import datetime, timedelta
+import itertools
+import multiprocessing
+
+
+class TShard(object):
+    BANK_SETTINGS = ("interest_rate", "credit_dayly_fee", "limit_for_suspicious_accounts")
+
+    def __init__(self, start_datetime: datetime, step: timedelta):
+        # forked workers inherit the parent's random state and pooled ids, so every shard would issue the same ids
+        np.random.seed()
+        TAccount.IdsGen = new_generator("random")
+
+        self.time_manager = TToyTimeManager(start_datetime=start_datetime, step=step)
+        self.api = API(self.time_manager)
+
+        # transfer id -> (from_id, to_id, amount) of prepared cross-shard transfers
+        self.outgoing = {}
+        self.incoming = {}
+
+    def new_bank(self, kwargs: dict, settings: dict) -> Status:
+        status = self.api.new_bank(kwargs)
+        if status.IsOk():
+            bank = self.api.bank_manager.get_bank(kwargs["name"]).Get()
+            for name, value in settings.items():
+                getattr(bank, f"set_{name}")(value)
+        return status
+
+    def new_account(self, client, bank_name: str, type_str: str, kwargs: dict):
+        client_id, name, surname, optional_fields = client
+        if self.api.client_manager.get_client(client_id) is None:
+            self.api.client_manager.restore_client(client_id, name, surname, optional_fields)
+        return self.api.new_account(client_id, bank_name, type_str, kwargs)
+
+    def update_client_optional_info(self, client_id, fields):
+        if self.api.client_manager.get_client(client_id) is not None:
+            self.api.update_client_optional_info(client_id, fields)
+
+    def add_to_black_list(self, bank_name, client_id):
+        self.api.add_to_black_list(bank_name, client_id)
+
+    def top_up(self, account_id, amount) -> Status:
+        return self.api.top_up(account_id, amount)
+
+    def withdraw(self, client_id, account_id, amount) -> Status:
+        return self.api.withdraw(client_id, account_id, amount)
+
+    def send_many(self, client_ids, from_ids, to_ids, amounts):
+        return self.api.send_many(client_ids, from_ids, to_ids, amounts)
+
+    def _is_blocked(self, account, client_ids) -> bool:
+        black_lists = self.api.transaction_manager.black_lists
+        return any(black_lists.is_blocked(account.bank, client_id) for client_id in client_ids)
+
+    def prepare_sends(self, transfers):
+        # phase one on the sender side: the amount leaves the account and is held until commit or abort
+        codes = []
+        for transfer_id, from_id, to_id, to_client_id, amount in transfers:
+            account = TAccount.all[from_id]
+            if account.funds < amount:
+                codes.append(ESendResult.NOT_ENOUGH_FUNDS.value)
+            elif self._is_blocked(account, (account.client_id, to_client_id)):
+                codes.append(ESendResult.NOT_VERIFIED.value)
+            else:
+                account.funds -= amount
+                self.outgoing[transfer_id] = (from_id, to_id, amount)
+                codes.append(ESendResult.OK.value)
+        return codes
+
+    def prepare_receives(self, transfers):
+        codes = []
+        for transfer_id, from_id, to_id, from_client_id, amount in transfers:
+            account = TAccount.all[to_id]
+            if self._is_blocked(account, (from_client_id, account.client_id)):
+                codes.append(ESendResult.NOT_VERIFIED.value)
+            else:
+                self.incoming[transfer_id] = (from_id, to_id, amount)
+                codes.append(ESendResult.OK.value)
+        return codes
+
+    def _journal(self, transfers):
+        if transfers:
+            ids_from, ids_to, amounts = zip(*transfers)
+            self.api.transaction_manager.new_transactions(ids_from, ids_to, amounts, ETransactionType.A2A)
+
+    def commit_sends(self, transfer_ids):
+        self._journal([self.outgoing.pop(transfer_id) for transfer_id in transfer_ids])
+
+    def commit_receives(self, transfer_ids):
+        transfers = [self.incoming.pop(transfer_id) for transfer_id in transfer_ids]
+        for _, to_id, amount in transfers:
+            TAccount.all[to_id].funds += amount
+        self._journal(transfers)
+
+    def abort_sends(self, transfer_ids):
+        for transfer_id in transfer_ids:
+            from_id, _, amount = self.outgoing.pop(transfer_id)
+            TAccount.all[from_id].funds += amount
+
+    def abort_receives(self, transfer_ids):
+        for transfer_id in transfer_ids:
+            del self.incoming[transfer_id]
+
+    def advance(self, days):
+        for _ in range(days):
+            self.time_manager.next()
+            for bank in self.api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+
+    def fast_forward(self, until: datetime):
+        self.api.bank_manager.fast_forward(until)
+
+    def funds(self, account_ids):
+        return [TAccount.all[account_id].funds for account_id in account_ids]
+
+    def total_funds(self):
+        funds = sum(
+            account.funds
+            for bank in self.api.bank_manager.get_all_banks().values()
+            for accounts in bank.accounts.values()
+            for account in accounts
+        )
+        # money held by prepared transfers is still owned by this shard
+        return funds + sum(amount for _, _, amount in self.outgoing.values())
+
+    def transactions_count(self):
+        return len(self.api.transaction_manager.all_transactions)
+
+
+def serve(start_datetime, step, requests: TSharedRing, responses: TSharedRing):
+    shard = TShard(start_datetime, step)
+
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+
+        method, args = message
+        try:
+            responses.put((getattr(shard, method)(*args), None))
+        except Exception as error:
+            responses.put((None, error))
+
+
+class TShardedAPI(object):
+    WORKERS = 4
+
+    def __init__(self, time_manager: TToyTimeManager, workers=WORKERS, ring_capacity=TSharedRing.CAPACITY):
+        self.time_manager = time_manager
+        self.client_manager = TClientManager()
+
+        self.bank_shards = {}
+        # account id -> (shard, client id)
+        self.accounts = {}
+        self.transfer_ids = itertools.count()
+
+        self.requests = []
+        self.responses = []
+        self.processes = []
+        for _ in range(workers):
+            requests, responses = TSharedRing(ring_capacity), TSharedRing(ring_capacity)
+            process = multiprocessing.Process(
+                target=serve,
+                args=(time_manager.get_datetime(), time_manager.step, requests, responses),
+                daemon=True,
+            )
+            process.start()
+
+            self.requests.append(requests)
+            self.responses.append(responses)
+            self.processes.append(process)
+
+    @property
+    def workers(self):
+        return len(self.processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for requests in self.requests:
+            requests.put(None)
+        for process in self.processes:
+            process.join()
+        for ring in self.requests + self.responses:
+            ring.close()
+
+        self.requests, self.responses, self.processes = [], [], []
+
+    def _submit(self, shard, method, *args):
+        self.requests[shard].put((method, args))
+
+    def _result(self, shard):
+        result, error = self.responses[shard].get()
+        if error is not None:
+            raise error
+        return result
+
+    def _call(self, shard, method, *args):
+        self._submit(shard, method, *args)
+        return self._result(shard)
+
+    def _pipeline(self, calls):
+        # every call is submitted before the first result is read, so the shards work at the same time;
+        # each shard answers in submission order
+        for shard, method, args in calls:
+            self._submit(shard, method, *args)
+        return [self._result(shard) for shard, _, _ in calls]
+
+    def _scatter(self, calls):
+        # calls: shard -> (method, args)
+        results = self._pipeline([(shard, method, args) for shard, (method, args) in calls.items()])
+        return dict(zip(calls, results))
+
+    def _broadcast(self, method, *args):
+        return self._scatter({shard: (method, args) for shard in range(self.workers)})
+
+    def new_client(self, kwargs: dict):
+        return self.client_manager.new_client(**kwargs)
+
+    def update_client_optional_info(self, client_id, fields):
+        client = self.client_manager.get_client(client_id)
+        if not client.update_optional_fields(fields):
+            return
+
+        shards = {self.accounts[account_id][0] for account_id in self.client_manager.get_accounts(client_id)}
+        self._scatter({shard: ("update_client_optional_info", (client_id, fields)) for shard in shards})
+
+    def new_bank(self, kwargs: dict):
+        if kwargs["name"] in self.bank_shards:
+            return Status.Error(f"Bank with the name '{kwargs['name']}' already exists")
+
+        settings = {name: kwargs[name] for name in TShard.BANK_SETTINGS if name in kwargs}
+        kwargs = {name: value for name, value in kwargs.items() if not name in TShard.BANK_SETTINGS}
+
+        # banks are spread round robin, so every worker gets its share
+        shard = len(self.bank_shards) % self.workers
+        status = self._call(shard, "new_bank", kwargs, settings)
+        if status.IsOk():
+            self.bank_shards[kwargs["name"]] = shard
+        return status
+
+    def new_account(self, client_id, bank_name: str, type_str: str, kwargs={}):
+        client = self.client_manager.get_client(client_id)
+        shard = self.bank_shards[bank_name]
+
+        account_id = self._call(
+            shard,
+            "new_account",
+            (client.id, client.name, client.surname, client.optional_fields),
+            bank_name,
+            type_str,
+            kwargs,
+        )
+
+        self.accounts[account_id] = (shard, client_id)
+        self.client_manager.add_account(client_id, account_id)
+        return account_id
+
+    def add_to_black_list(self, bank_name, client_id):
+        self._call(self.bank_shards[bank_name], "add_to_black_list", bank_name, client_id)
+
+    def top_up(self, account_id, amount):
+        return self._call(self.accounts[account_id][0], "top_up", account_id, amount)
+
+    def withdraw(self, client_id, account_id, amount):
+        shard, owner_id = self.accounts[account_id]
+        if client_id != owner_id:
+            return Status.Error(f"account does not belong to client {client_id}")
+        return self._call(shard, "withdraw", client_id, account_id, amount)
+
+    def send(self, client_id, from_id, to_id, amount):
+        return send_status(int(self.send_many([client_id], [from_id], [to_id], [amount])[0]), client_id)
+
+    def send_many(self, client_ids, from_ids, to_ids, amounts):
+        # rows keep their order: a run of transfers inside shards goes as one batch, a run across shards in two phases
+        amounts = list(amounts)
+        results = np.full(len(amounts), ESendResult.OK.value, dtype=np.int8)
+
+        local, remote, received = {}, [], set()
+        for row, (client_id, from_id, to_id) in enumerate(zip(client_ids, from_ids, to_ids)):
+            sender = self.accounts.get(from_id)
+            receiver = self.accounts.get(to_id)
+
+            if sender is not None and client_id != sender[1]:
+                results[row] = ESendResult.NOT_OWNER.value
+            elif sender is None or receiver is None:
+                results[row] = ESendResult.UNKNOWN_ACCOUNT.value
+            elif sender[0] == receiver[0]:
+                if remote:
+                    self._send_across_shards(remote, from_ids, to_ids, amounts, results)
+                    remote, received = [], set()
+                local.setdefault(sender[0], []).append(row)
+            else:
+                if local:
+                    self._send_inside_shards(local, client_ids, from_ids, to_ids, amounts, results)
+                    local = {}
+                # a prepared receive is credited only on commit, so spending it waits for the next round
+                if from_id in received:
+                    self._send_across_shards(remote, from_ids, to_ids, amounts, results)
+                    remote, received = [], set()
+                remote.append(row)
+                received.add(to_id)
+
+        if local:
+            self._send_inside_shards(local, client_ids, from_ids, to_ids, amounts, results)
+        if remote:
+            self._send_across_shards(remote, from_ids, to_ids, amounts, results)
+        return results
+
+    def _send_inside_shards(self, local, client_ids, from_ids, to_ids, amounts, results):
+        codes = self._scatter({
+            shard: ("send_many", (
+                [client_ids[row] for row in rows],
+                [from_ids[row] for row in rows],
+                [to_ids[row] for row in rows],
+                [amounts[row] for row in rows],
+            ))
+            for shard, rows in local.items()
+        })
+        for shard, rows in local.items():
+            results[rows] = codes[shard]
+
+    def _send_across_shards(self, rows, from_ids, to_ids, amounts, results):
+        transfers = {}
+        sends, receives = {}, {}
+        for row in rows:
+            transfer_id = next(self.transfer_ids)
+            (from_shard, from_client), (to_shard, to_client) = self.accounts[from_ids[row]], self.accounts[to_ids[row]]
+
+            transfers[transfer_id] = (row, from_shard, to_shard)
+            sends.setdefault(from_shard, []).append((transfer_id, from_ids[row], to_ids[row], to_client, amounts[row]))
+            receives.setdefault(to_shard, []).append((transfer_id, from_ids[row], to_ids[row], from_client, amounts[row]))
+
+        calls = [(shard, "prepare_sends", (batch,)) for shard, batch in sends.items()]
+        calls += [(shard, "prepare_receives", (batch,)) for shard, batch in receives.items()]
+
+        send_codes, receive_codes = {}, {}
+        for (_, method, (batch,)), codes in zip(calls, self._pipeline(calls)):
+            prepared = send_codes if method == "prepare_sends" else receive_codes
+            for transfer, code in zip(batch, codes):
+                prepared[transfer[0]] = code
+
+        decisions = {
+            "commit_sends": {}, "abort_sends": {},
+            "commit_receives": {}, "abort_receives": {},
+        }
+        for transfer_id, (row, from_shard, to_shard) in transfers.items():
+            send_code, receive_code = send_codes[transfer_id], receive_codes[transfer_id]
+            committed = send_code == receive_code == ESendResult.OK.value
+
+            if send_code == ESendResult.OK.value:
+                decisions["commit_sends" if committed else "abort_sends"].setdefault(from_shard, []).append(transfer_id)
+            if receive_code == ESendResult.OK.value:
+                decisions["commit_receives" if committed else "abort_receives"].setdefault(to_shard, []).append(transfer_id)
+
+            results[row] = send_code if send_code != ESendResult.OK.value else receive_code
+
+        # every shard learns the outcome of all its prepared transfers in one round
+        self._pipeline([
+            (shard, method, (transfer_ids,))
+            for method, shards in decisions.items()
+            for shard, transfer_ids in shards.items()
+        ])
+
+    def advance(self, days=1):
+        self._broadcast("advance", days)
+        for _ in range(days):
+            self.time_manager.next()
+
+    def fast_forward(self, until: datetime):
+        self._broadcast("fast_forward", until)
+        self.time_manager.set_datetime(until)
+
+    def funds(self, account_id):
+        return self._call(self.accounts[account_id][0], "funds", [account_id])[0]
+
+    def total_funds(self):
+        return sum(self._broadcast("total_funds").values())
+
+    def transactions_count(self):
+        return sum(self._broadcast("transactions_count").values())
@@ -0,0 +1,532 @@
+import numpy as np
+
+from account_store import TFixedPointAccountStore
+from api import API
+from bank_system import ACCOUNT_CLASSES, EAccountType, TAccount, TAccountRefs
+from client_system import TClient
+from time_system import ITimeManager
+from util.gen import restore_generator
+
+from datetime import date, datetime
+import bisect
+import itertools
+import json
+import mmap
+import struct
+
+
+MAGIC = b"BANKSNP1"
+SECTION_HEADER = struct.Struct("<16sQ")
+ALIGNMENT = 8
+
+ACCOUNT_RECORD = np.dtype([
+    ('id',                 'S32'),
+    ('client_id',          'S32'),
+    ('funds',              '<f8'),
+    ('unpaid_interest',    '<f8'),
+    ('interest_rate',      '<f8'),
+    ('dayly_fee',          '<f8'),
+    ('end_datetime',       '<M8[us]'),
+    ('suspicious_limit',   '<f8'),
+    ('type',               'i1'),
+    ('withdraw_available', '?'),
+    ('is_suspicious',      '?'),
+    ('padding',            'V5'),
+])
+
+STORED_FIELDS = ('funds', 'unpaid_interest', 'interest_rate', 'dayly_fee', 'end_datetime', 'withdraw_available')
+
+
+class TSnapshotWriter(object):
+    CHUNK = 1 << 16
+
+    def __init__(self, path: str):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+
+        self.section_name = None
+        self.section_offset = None
+        self.section_length = 0
+
+    def begin_section(self, name: str):
+        if len(name) > SECTION_HEADER.size - 8:
+            raise ValueError(f"section name '{name}' is too long")
+
+        self.section_name = name.encode()
+        self.section_offset = self.file.tell()
+        self.section_length = 0
+        self.file.write(SECTION_HEADER.pack(self.section_name, 0))
+
+    def write(self, data: bytes):
+        self.file.write(data)
+        self.section_length += len(data)
+
+    def end_section(self):
+        self.file.write(b"\0" * (-self.section_length % ALIGNMENT))
+
+        end = self.file.tell()
+        self.file.seek(self.section_offset)
+        self.file.write(SECTION_HEADER.pack(self.section_name, self.section_length))
+        self.file.seek(end)
+
+    def close(self):
+        self.file.close()
+
+
+def _bank_accounts(bank):
+    accounts = [account for accounts in bank.accounts.values() for account in accounts]
+    if bank.account_store is not None:
+        accounts.sort(key=lambda account: account.index)
+    return accounts
+
+
+def _encode_accounts(accounts):
+    records = np.zeros(len(accounts), dtype=ACCOUNT_RECORD)
+    records['end_datetime'] = np.datetime64('NaT')
+
+    for row, account in enumerate(accounts):
+        record = records[row:row + 1]
+        record['id'] = account.id
+        record['client_id'] = account.client_id
+        record['type'] = account.type.value
+        record['is_suspicious'] = account.is_suspicious
+        record['suspicious_limit'] = account.suspicious_limit
+
+        for name in STORED_FIELDS:
+            value = getattr(account, name, None)
+            if value is not None:
+                record[name] = value
+
+    return records
+
+
+def write_snapshot(api: API, path: str, chunk=TSnapshotWriter.CHUNK):
+    writer = TSnapshotWriter(path)
+
+    writer.begin_section("clients")
+    clients = iter(api.client_manager.clients.values())
+    while True:
+        lines = [
+            json.dumps([client.id, client.name, client.surname, client.optional_fields]) + "\n"
+            for client in itertools.islice(clients, chunk)
+        ]
+        if not lines:
+            break
+        writer.write("".join(lines).encode())
+    writer.end_section()
+
+    banks = []
+    ids = []
+    client_ids = []
+    row = 0
+
+    writer.begin_section("accounts")
+    for bank in api.bank_manager.get_all_banks().values():
+        start = row
+
+        accounts = _bank_accounts(bank)
+        for offset in range(0, len(accounts), chunk):
+            records = _encode_accounts(accounts[offset:offset + chunk])
+            writer.write(records.tobytes())
+            ids.append(records['id'].copy())
+            client_ids.append(records['client_id'].copy())
+            row += len(records)
+
+        banks.append({
+            "name": bank.name,
+            "interest_rate": bank.interest_rate,
+            "credit_dayly_fee": bank.credit_dayly_fee,
+            "limit_for_suspicious_accounts": bank.limit_for_suspicious_accounts,
+            "black_list": sorted(bank.black_list),
+            "columnar": bank.account_store is not None,
+            "scheduled": bank.scheduler is not None,
+            "fixed_point": isinstance(bank.account_store, TFixedPointAccountStore),
+            "scheduler_date": bank.scheduler.date.isoformat() if bank.scheduler is not None else None,
+            "updated": bank.updated.isoformat(),
+            "start": start,
+            "end": row,
+        })
+    writer.end_section()
+
+    for name, keys in (("index", ids), ("client", client_ids)):
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype='S32')
+        order = np.argsort(keys, kind="stable")
+
+        writer.begin_section(f"{name}_ids")
+        writer.write(keys[order].tobytes())
+        writer.end_section()
+
+        writer.begin_section(f"{name}_rows")
+        writer.write(order.astype('<i8').tobytes())
+        writer.end_section()
+
+    # the position may only count records that survive a crash, so buffered ones go to disk first
+    journal = api.transaction_manager.journal
+    durable = getattr(journal, "commit", None) or getattr(journal, "flush", None)
+    if durable is not None:
+        durable()
+
+    writer.begin_section("meta")
+    writer.write(json.dumps({
+        "datetime": api.time_manager.get_datetime().isoformat(),
+        "journal_position": len(journal),
+        "event_position": len(getattr(journal, "events", ())),
+        "accounts": row,
+        "banks": banks,
+        "generators": {
+            "account": TAccount.IdsGen.get_state(),
+            "client": TClient.IdsGen.get_state(),
+        },
+    }).encode())
+    writer.end_section()
+
+    writer.close()
+
+
+class TSnapshot(object):
+    def __init__(self, path: str):
+        self.path = path
+        self.sections = {}
+
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise RuntimeError(f"{path} is not a banking snapshot")
+
+            while True:
+                header = file.read(SECTION_HEADER.size)
+                if not header:
+                    break
+                name, length = SECTION_HEADER.unpack(header)
+                self.sections[name.rstrip(b"\0").decode()] = (file.tell(), length)
+                file.seek(length + (-length % ALIGNMENT), 1)
+
+        self.meta = json.loads(self._read("meta"))
+
+        self.accounts = self._map("accounts", ACCOUNT_RECORD, mode="c")
+        self.index_ids = self._map("index_ids", np.dtype('S32'))
+        self.index_rows = self._map("index_rows", np.dtype('<i8'))
+        self.client_index_ids = self._map("client_ids", np.dtype('S32'))
+        self.client_index_rows = self._map("client_rows", np.dtype('<i8'))
+
+    def _read(self, name):
+        offset, length = self.sections[name]
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return file.read(length)
+
+    def _map(self, name, dtype, mode="r"):
+        offset, length = self.sections[name]
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode=mode, offset=offset, shape=(length // dtype.itemsize,))
+
+    def clients(self):
+        offset, length = self.sections["clients"]
+        if length == 0:
+            return
+
+        with open(self.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                position = offset
+                while position < offset + length:
+                    end = data.find(b"\n", position, offset + length)
+                    yield json.loads(data[position:end])
+                    position = end + 1
+
+    def find(self, account_id):
+        key = account_id.encode()
+        position = int(np.searchsorted(self.index_ids, key))
+        if position == len(self.index_ids) or self.index_ids[position] != key:
+            return None
+        return int(self.index_rows[position])
+
+    def client_account_ids(self, client_id):
+        key = client_id.encode()
+        low = int(np.searchsorted(self.client_index_ids, key, side="left"))
+        high = int(np.searchsorted(self.client_index_ids, key, side="right"))
+        rows = np.sort(self.client_index_rows[low:high])
+        return [account_id.decode() for account_id in self.accounts['id'][rows]]
+
+
+class TLazyAccountRegistry(dict):
+    def __init__(self, snapshot: TSnapshot):
+        dict.__init__(self)
+
+        self.snapshot = snapshot
+        self.starts = []
+        self.banks = []
+
+        # closed accounts, which must not come back from the snapshot
+        self.removed = set()
+
+    def add_bank(self, start, bank):
+        self.starts.append(start)
+        self.banks.append(bank)
+
+    def materialize(self, row):
+        record = self.snapshot.accounts[row]
+        account_id = record['id'].decode()
+
+        account = dict.get(self, account_id)
+        if account is not None or account_id in self.removed:
+            return account
+
+        position = bisect.bisect_right(self.starts, row) - 1
+        bank = self.banks[position]
+
+        cls = ACCOUNT_CLASSES[int(record['type'])]
+        stored = bank.account_store is not None
+        account = cls.restore(
+            bank,
+            record['client_id'].decode(),
+            EAccountType(int(record['type'])),
+            account_id,
+            row - self.starts[position] if stored else None,
+            bank.scheduler.date if bank.scheduler is not None else None,
+            bool(record['is_suspicious']),
+            record['suspicious_limit'].item(),
+            () if stored else [(name, record[name].item()) for name in STORED_FIELDS if hasattr(cls, name)],
+        )
+
+        dict.__setitem__(self, account_id, account)
+        return account
+
+    def __missing__(self, account_id):
+        row = self.snapshot.find(account_id) if not account_id in self.removed else None
+        if row is None:
+            raise KeyError(account_id)
+        return self.materialize(row)
+
+    def __contains__(self, account_id):
+        if dict.__contains__(self, account_id):
+            return True
+        return not account_id in self.removed and self.snapshot.find(account_id) is not None
+
+    def pop(self, account_id, *default):
+        account = self.get(account_id)
+        self.removed.add(account_id)
+        if account is None:
+            return dict.pop(self, account_id, *default)
+        return dict.pop(self, account_id)
+
+    def get(self, account_id, default=None):
+        try:
+            return self[account_id]
+        except KeyError:
+            return default
+
+    def materialize_all(self):
+        for row in range(len(self.snapshot.accounts)):
+            self.materialize(row)
+
+
+class TLazyBankAccounts(dict):
+    def __init__(self, registry: TLazyAccountRegistry, start, end):
+        dict.__init__(self)
+
+        self.registry = registry
+        self.start = start
+        self.end = end
+        self.loaded = False
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+
+        for row in range(self.start, self.end):
+            account = self.registry.materialize(row)
+            if account is not None:
+                dict.setdefault(self, account.client_id, TAccountRefs()).append(account)
+
+    def __getitem__(self, client_id):
+        self.load()
+        return dict.__getitem__(self, client_id)
+
+    def __contains__(self, client_id):
+        self.load()
+        return dict.__contains__(self, client_id)
+
+    def __iter__(self):
+        self.load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load()
+        return dict.__len__(self)
+
+    def get(self, client_id, default=None):
+        self.load()
+        return dict.get(self, client_id, default)
+
+    def setdefault(self, client_id, default=None):
+        self.load()
+        return dict.setdefault(self, client_id, default)
+
+    def keys(self):
+        self.load()
+        return dict.keys(self)
+
+    def values(self):
+        self.load()
+        return dict.values(self)
+
+    def items(self):
+        self.load()
+        return dict.items(self)
+
+
+class TLazyClientAccounts(dict):
+    def __init__(self, snapshot: TSnapshot):
+        dict.__init__(self)
+
+        self.snapshot = snapshot
+
+    def load(self, client_id):
+        if not dict.__contains__(self, client_id):
+            account_ids = self.snapshot.client_account_ids(client_id)
+            if not account_ids:
+                return None
+            dict.__setitem__(self, client_id, account_ids)
+        return dict.__getitem__(self, client_id)
+
+    def get(self, client_id, default=None):
+        account_ids = self.load(client_id)
+        return default if account_ids is None else account_ids
+
+    def setdefault(self, client_id, default=None):
+        account_ids = self.load(client_id)
+        if account_ids is None:
+            dict.__setitem__(self, client_id, default)
+            return default
+        return account_ids
+
+
+def replay_event(api: API, event: dict):
+    kind = event["kind"]
+    if kind == "clients":
+        TClient.IdsGen.reserve(event["ids"])
+        for client_id, name, surname, optional_fields in zip(
+            event["ids"], event["names"], event["surnames"], event["optional_fields"]
+        ):
+            api.client_manager.restore_client(client_id, name, surname, optional_fields)
+    elif kind == "client_fields":
+        api.update_client_optional_info(event["client_id"], event["fields"])
+    elif kind == "bank":
+        api.bank_manager.new_bank(event["name"], api.time_manager, event["columnar"], event["scheduled"], event["fixed_point"])
+    elif kind == "bank_setting":
+        getattr(api.bank_manager.get_bank(event["bank"]).GetOrRaise(), "set_" + event["setting"])(event["value"])
+    elif kind == "black_list":
+        api.bank_manager.get_bank(event["bank"]).GetOrRaise().add_to_black_list(event["client_id"])
+    elif kind == "accounts":
+        bank = api.bank_manager.get_bank(event["bank"]).GetOrRaise()
+        bank.new_accounts(
+            event["client_ids"],
+            event["is_suspicious"],
+            event["types"],
+            event["initial_funds"],
+            account_ids=event["ids"],
+        )
+        api.client_manager.add_accounts(event["client_ids"], event["ids"])
+    elif kind == "update":
+        api.bank_manager.get_bank(event["bank"]).GetOrRaise().update_accounts()
+    elif kind == "fast_forward":
+        bank = api.bank_manager.get_bank(event["bank"]).GetOrRaise()
+        bank.fast_forward(datetime.fromisoformat(event["until"]), event["exact"])
+    elif kind == "clock":
+        # the clock alone moved, which replaying the event's time has done
+        pass
+    elif kind == "close_accounts":
+        api.registry.close_accounts(event["ids"])
+    elif kind == "close_client":
+        api.registry.close_client(event["client_id"])
+    else:
+        raise RuntimeError(f"unknown journal event '{kind}'")
+
+
+def replay_journal_tail(api: API, journal, start, event_start=0):
+    # events go in where they happened between the transactions, each at the time it was recorded;
+    # the clock ends at the latest of those times
+    events = iter(getattr(journal, "events", [])[event_start:])
+    event = next(events, None)
+    latest = api.time_manager.get_datetime()
+
+    def replay(event):
+        nonlocal latest
+        if "datetime" in event:
+            api.time_manager.set_datetime(datetime.fromisoformat(event["datetime"]))
+            latest = max(latest, api.time_manager.get_datetime())
+        replay_event(api, event)
+
+    with api.transaction_manager.unlogged():
+        for position, transaction in enumerate(itertools.islice(iter(journal), start, None), start):
+            while event is not None and event["position"] <= position:
+                replay(event)
+                event = next(events, None)
+
+            latest = max(latest, transaction.datetime)
+            if transaction.id_from is not None:
+                TAccount.all[transaction.id_from].funds -= transaction.amount
+            if transaction.id_to is not None:
+                TAccount.all[transaction.id_to].funds += transaction.amount
+
+        while event is not None:
+            replay(event)
+            event = next(events, None)
+
+    api.time_manager.set_datetime(latest)
+
+
+def restore_snapshot(path: str, time_manager: ITimeManager, journal=None) -> API:
+    snapshot = TSnapshot(path)
+    meta = snapshot.meta
+
+    time_manager.set_datetime(datetime.fromisoformat(meta["datetime"]))
+    TAccount.IdsGen = restore_generator(meta["generators"]["account"])
+    TClient.IdsGen = restore_generator(meta["generators"]["client"])
+
+    api = API(time_manager, journal)
+
+    # rebuilding the state changes nothing, so none of it is logged as an event again
+    with api.transaction_manager.unlogged():
+        for client_id, name, surname, optional_fields in snapshot.clients():
+            api.client_manager.restore_client(client_id, name, surname, optional_fields)
+        api.client_manager.client_accounts = TLazyClientAccounts(snapshot)
+
+        registry = TLazyAccountRegistry(snapshot)
+        TAccount.all = registry
+
+        for bank_meta in meta["banks"]:
+            api.bank_manager.new_bank(
+                bank_meta["name"],
+                time_manager,
+                bank_meta["columnar"],
+                bank_meta["scheduled"],
+                bank_meta.get("fixed_point", False),
+            )
+            bank = api.bank_manager.get_bank(bank_meta["name"]).Get()
+
+            bank.set_interest_rate(bank_meta["interest_rate"])
+            bank.set_credit_dayly_fee(bank_meta["credit_dayly_fee"])
+            bank.set_limit_for_suspicious_accounts(bank_meta["limit_for_suspicious_accounts"])
+            bank.updated = datetime.fromisoformat(bank_meta.get("updated", meta["datetime"]))
+            for client_id in bank_meta["black_list"]:
+                bank.add_to_black_list(client_id)
+
+            start, end = bank_meta["start"], bank_meta["end"]
+            if bank.account_store is not None:
+                bank.account_store = type(bank.account_store).wrap(snapshot.accounts[start:end])
+
+            registry.add_bank(start, bank)
+            bank.accounts = TLazyBankAccounts(registry, start, end)
+
+            if bank.scheduler is not None:
+                bank.scheduler.date = date.fromisoformat(bank_meta["scheduler_date"])
+                for accounts in bank.accounts.values():
+                    for account in accounts:
+                        account.schedule_events()
+
+        if journal is not None:
+            replay_journal_tail(api, journal, meta["journal_position"], meta.get("event_position", 0))
+
+    return api
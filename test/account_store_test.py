@@ -0,0 +1,83 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import math
+
+
+class TestAccountStore:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def open_accounts(self, bank_name, client_id):
+        debit_id = self.api.new_account(client_id, bank_name, "debit")
+        deposit_id = self.api.new_account(client_id, bank_name, "deposit", {"initial_funds": 1000})
+        credit_id = self.api.new_account(client_id, bank_name, "credit")
+
+        self.api.top_up(debit_id, 500)
+        self.api.withdraw(client_id, credit_id, 100)
+
+        return [debit_id, deposit_id, credit_id]
+
+    def test_columnar_update_matches_per_account_update(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        for name, columnar in [("Sber", False), ("Tinkoff", True)]:
+            self.api.new_bank({"name": name, "columnar": columnar})
+            bank = self.api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.0001)
+            bank.set_credit_dayly_fee(2)
+
+        legacy_ids = self.open_accounts("Sber", client_id)
+        columnar_ids = self.open_accounts("Tinkoff", client_id)
+
+        banks = self.api.bank_manager.get_all_banks()
+        for _ in range(400):
+            self.time_manager.next()
+            for bank in banks.values():
+                bank.update_accounts()
+
+        for legacy_id, columnar_id in zip(legacy_ids, columnar_ids):
+            legacy = TAccount.all[legacy_id]
+            columnar = TAccount.all[columnar_id]
+
+            assert(columnar.store is not None)
+            assert(math.isclose(legacy.funds, columnar.funds))
+
+        deposit = TAccount.all[columnar_ids[1]]
+        assert(deposit.withdraw_available)
+        assert(math.isclose(TAccount.all[legacy_ids[1]].unpaid_interest, deposit.unpaid_interest))
+        assert(deposit.end_datetime == TAccount.all[legacy_ids[1]].end_datetime)
+
+    def test_store_grows(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+        })
+
+        self.api.new_bank({"name": "Sber", "columnar": True})
+        store = self.api.bank_manager.get_bank("Sber").Get().account_store
+
+        ids = [
+            self.api.new_account(client_id, "Sber", "debit")
+            for _ in range(store.capacity + 1)
+        ]
+
+        assert(store.size == len(ids))
+        assert(TAccount.all[ids[-1]].index == store.size - 1)
@@ -0,0 +1,58 @@
+from async_api import AsyncAPI
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import asyncio
+import math
+
+
+class TestAsyncAPI:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+        self.async_api = AsyncAPI(self.api, batch_window=0.001, batch_size=64)
+
+    def teardown(self):
+        TAccount.all = {}
+
+    async def scenario(self):
+        client_id = await self.async_api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({"name": "Sber"})
+
+        from_id = await self.async_api.new_account(client_id, "Sber", "debit")
+        to_id = await self.async_api.new_account(client_id, "Sber", "debit")
+        await self.async_api.top_up(from_id, 100)
+
+        statuses = await asyncio.gather(*[
+            self.async_api.send(client_id, from_id, to_id, 15)
+            for _ in range(10)
+        ])
+        withdraw = await self.async_api.withdraw("stranger", to_id, 1)
+
+        await self.async_api.close()
+        return from_id, to_id, statuses, withdraw
+
+    def test_concurrent_sends_are_batched(self):
+        from_id, to_id, statuses, withdraw = asyncio.run(self.scenario())
+
+        assert(sum(status.IsOk() for status in statuses) == 6)
+        assert(statuses[-1].GetError() == "not enought funds")
+        assert(not withdraw.IsOk())
+
+        assert(math.isclose(TAccount.all[from_id].funds, 10))
+        assert(math.isclose(TAccount.all[to_id].funds, 90))
+
+        assert(50 in self.async_api.latency_percentiles("send"))
@@ -0,0 +1,96 @@
+from bank_system import TAccount
+from clocks import TClockCoordinator
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+
+
+BANKS = (("Sber", {}), ("Tinkoff", {"columnar": True}), ("Alfa", {"fixed_point": True}), ("VTB", {"scheduled": True}))
+
+
+class TestClocks:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {"address": "addr", "passport": "pas"},
+        })
+
+        # every bank twice: caught up by the coordinator and updated night by night
+        self.accounts = {}
+        for name, kwargs in BANKS:
+            for bank_name in (name, name + "Daily"):
+                self.api.new_bank({"name": bank_name, **kwargs})
+                bank = self.api.bank_manager.get_bank(bank_name).Get()
+                bank.set_interest_rate(0.001)
+                bank.set_credit_dayly_fee(3)
+
+                self.accounts[bank_name] = [
+                    self.api.new_account(self.client_id, bank_name, type_str, {"initial_funds": 100})
+                    for type_str in ("debit", "deposit", "credit")
+                ]
+                self.api.withdraw(self.client_id, self.accounts[bank_name][2], 50)
+
+        self.coordinator = TClockCoordinator(self.api.bank_manager, self.time_manager)
+        for name, _ in BANKS:
+            self.coordinator.track(self.api.bank_manager.get_bank(name).Get())
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def nightly(self, days):
+        for _ in range(days):
+            self.time_manager.next()
+            for name, _ in BANKS:
+                self.api.bank_manager.get_bank(name + "Daily").Get().update_accounts()
+
+    def funds(self, bank_name):
+        return [TAccount.all[account_id].funds for account_id in self.accounts[bank_name]]
+
+    def test_catch_up_matches_nightly(self):
+        self.nightly(75)
+        assert(sorted(self.coordinator.behind()) == sorted(name for name, _ in BANKS))
+        assert(all(lag == timedelta(days=75) for lag in self.coordinator.lag().values()))
+
+        days = self.coordinator.advance()
+        assert(days == {name: 75 for name, _ in BANKS})
+        assert(self.coordinator.behind() == [])
+
+        for name, _ in BANKS:
+            for funds, expected in zip(self.funds(name), self.funds(name + "Daily")):
+                assert(abs(funds - expected) <= 1e-9 * abs(expected))
+
+        # nothing is behind, so nothing runs
+        assert(self.coordinator.advance() == {})
+        stats = self.coordinator.stats()
+        assert(stats["advances"] == 2 and stats["behind"] == 0 and stats["running"] == 0)
+        assert(all(bank["runs"] == 1 and bank["days"] == 75 for bank in stats["banks"].values()))
+
+    def test_banks_advance_on_their_own(self):
+        coordinator = TClockCoordinator(self.api.bank_manager, self.time_manager)
+        vladivostok = coordinator.track(self.api.bank_manager.get_bank("Tinkoff").Get(), offset=timedelta(hours=7))
+        coordinator.track(self.api.bank_manager.get_bank("Sber").Get())
+
+        before = self.funds("Sber")
+        self.nightly(3)
+        assert(coordinator.advance(banks=["Tinkoff"]) == {"Tinkoff": 3})
+        assert(vladivostok.processed == self.time_manager.get_datetime() + timedelta(hours=7))
+
+        # Sber has not run since: it lags, its accounts have not moved
+        stats = coordinator.stats()
+        assert(stats["behind"] == 1)
+        assert(stats["banks"]["Sber"]["lag_days"] == 3 and stats["banks"]["Tinkoff"]["lag_seconds"] == 0)
+        assert(self.funds("Sber") == before)
+
+        # the reference clock moving alone does not count as processing
+        self.nightly(1)
+        assert(coordinator.advance() == {"Tinkoff": 1, "Sber": 4})
+        for funds, expected in zip(self.funds("Sber"), self.funds("SberDaily")):
+            assert(abs(funds - expected) <= 1e-9 * abs(expected))
@@ -0,0 +1,118 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import math
+import random
+import sys
+
+
+class TestConcurrency:
+    THREADS = 8
+    OPERATIONS = 2000
+    ACCOUNTS = 10
+
+    def setup(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager, concurrent=True)
+
+    def teardown(self):
+        sys.setswitchinterval(self.switch_interval)
+        TAccount.all = {}
+
+    def hammer(self, client_id, account_ids, seed):
+        rng = random.Random(seed)
+        balance_change = 0
+
+        for _ in range(TestConcurrency.OPERATIONS):
+            operation = rng.randrange(3)
+            account_id = rng.choice(account_ids)
+            amount = rng.randint(1, 20)
+
+            if operation == 0:
+                if self.api.top_up(account_id, amount).IsOk():
+                    balance_change += amount
+            elif operation == 1:
+                if self.api.withdraw(client_id, account_id, amount).IsOk():
+                    balance_change -= amount
+            else:
+                self.api.send(client_id, account_id, rng.choice(account_ids), amount)
+
+        return balance_change
+
+    def check_money_is_conserved(self, columnar):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({"name": "Sber", "columnar": columnar})
+
+        account_ids = [
+            self.api.new_account(client_id, "Sber", "debit")
+            for _ in range(TestConcurrency.ACCOUNTS)
+        ]
+        for account_id in account_ids:
+            self.api.top_up(account_id, 100)
+
+        with ThreadPoolExecutor(TestConcurrency.THREADS) as pool:
+            changes = pool.map(
+                lambda seed: self.hammer(client_id, account_ids, seed),
+                range(TestConcurrency.THREADS),
+            )
+            balance_change = sum(changes)
+
+        total = sum(TAccount.all[account_id].funds for account_id in account_ids)
+        assert(math.isclose(total, 100 * TestConcurrency.ACCOUNTS + balance_change))
+        assert(all(TAccount.all[account_id].funds >= 0 for account_id in account_ids))
+
+    def test_money_is_conserved(self):
+        self.check_money_is_conserved(columnar=False)
+
+    def test_money_is_conserved_in_columnar_bank(self):
+        self.check_money_is_conserved(columnar=True)
+
+    def test_close_keeps_money(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({"name": "Sber", "columnar": True})
+
+        account_ids = [self.api.new_account(client_id, "Sber", "debit") for _ in range(2 * TestConcurrency.ACCOUNTS)]
+        for account_id in account_ids:
+            self.api.top_up(account_id, 100)
+
+        def transfers(seed):
+            rng = random.Random(seed)
+            for _ in range(TestConcurrency.OPERATIONS):
+                from_id, to_id = rng.sample(account_ids, 2)
+                self.api.send_many([client_id], [from_id], [to_id], [1])
+
+        # whatever a transfer moved either made it into the archive or stays with the open accounts
+        with ThreadPoolExecutor(TestConcurrency.THREADS) as pool:
+            futures = [pool.submit(transfers, seed) for seed in range(TestConcurrency.THREADS - 1)]
+            for account_id in account_ids[::2]:
+                assert(self.api.close_account(client_id, account_id).IsOk())
+            for future in futures:
+                future.result()
+
+        archived = sum(self.api.registry.archive.find(account_id)["funds"] for account_id in account_ids[::2])
+        total = sum(TAccount.all[account_id].funds for account_id in account_ids[1::2])
+        assert(archived + total == 100 * len(account_ids))
@@ -0,0 +1,96 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import math
+
+
+class TestFastForward:
+    START = datetime(year=2021, month=9, day=3)
+    BANKS = [("Sber", {}), ("Tinkoff", {"columnar": True}), ("Alfa", {"scheduled": True})]
+
+    def setup(self):
+        self.daily, self.daily_ids = self.new_world()
+        self.forwarded, self.forwarded_ids = self.new_world()
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def new_world(self):
+        api = API(TToyTimeManager(start_datetime=TestFastForward.START, step=timedelta(days=1)))
+
+        client_id = api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        account_ids = []
+        for name, kwargs in TestFastForward.BANKS:
+            api.new_bank({"name": name, **kwargs})
+            bank = api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.0002)
+            bank.set_credit_dayly_fee(3)
+
+            debit_id = api.new_account(client_id, name, "debit")
+            deposit_id = api.new_account(client_id, name, "deposit", {"initial_funds": 1000})
+            credit_id = api.new_account(client_id, name, "credit")
+
+            api.top_up(debit_id, 500)
+            api.withdraw(client_id, credit_id, 10)
+            account_ids += [debit_id, deposit_id, credit_id]
+
+        return api, account_ids
+
+    def test_fast_forward_matches_daily_updates(self):
+        until = TestFastForward.START + timedelta(days=3 * 365)
+
+        banks = self.daily.bank_manager.get_all_banks().values()
+        while self.daily.time_manager.get_datetime() < until:
+            self.daily.time_manager.next()
+            for bank in banks:
+                bank.update_accounts()
+
+        self.forwarded.bank_manager.fast_forward(until)
+        assert(self.forwarded.time_manager.get_datetime() == until)
+
+        for daily_id, forwarded_id in zip(self.daily_ids, self.forwarded_ids):
+            daily = TAccount.all[daily_id]
+            forwarded = TAccount.all[forwarded_id]
+
+            assert(daily.funds == forwarded.funds)
+            assert(getattr(daily, "unpaid_interest", 0) == getattr(forwarded, "unpaid_interest", 0))
+            assert(getattr(daily, "withdraw_available", None) == getattr(forwarded, "withdraw_available", None))
+
+    def test_closed_form_is_close(self):
+        until = TestFastForward.START + timedelta(days=3 * 365)
+
+        self.daily.bank_manager.fast_forward(until)
+        self.forwarded.bank_manager.fast_forward(until, exact=False)
+
+        for daily_id, forwarded_id in zip(self.daily_ids, self.forwarded_ids):
+            daily = TAccount.all[daily_id]
+            forwarded = TAccount.all[forwarded_id]
+
+            assert(math.isclose(daily.funds, forwarded.funds))
+            assert(math.isclose(
+                getattr(daily, "unpaid_interest", 0),
+                getattr(forwarded, "unpaid_interest", 0),
+            ))
+
+    def test_bank_fast_forward_is_idempotent(self):
+        until = TestFastForward.START + timedelta(days=400)
+
+        for name, _ in TestFastForward.BANKS:
+            self.daily.bank_manager.get_bank(name).Get().fast_forward(until)
+            for _ in range(2):
+                self.forwarded.bank_manager.get_bank(name).Get().fast_forward(until, exact=False)
+
+        # the bank's own clock did not move, the applied days are remembered by the bank
+        assert(self.forwarded.time_manager.get_datetime() == TestFastForward.START)
+        for daily_id, forwarded_id in zip(self.daily_ids, self.forwarded_ids):
+            assert(math.isclose(TAccount.all[daily_id].funds, TAccount.all[forwarded_id].funds))
@@ -0,0 +1,126 @@
+from bank_system import ESendResult, TAccount
+from transaction import ETransactionType, TTransaction
+from fraud import TFanRule, TFraudEngine, TSlidingSketch, TVelocityRule, rescore
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+
+
+class TestFraud:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(hours=1),
+        )
+
+        self.api = API(self.time_manager)
+        self.api.new_bank({"name": "Sber"})
+
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.account_ids = [self.api.new_account(self.client_id, "Sber", "debit") for _ in range(6)]
+        for account_id in self.account_ids:
+            self.api.top_up(account_id, 1000)
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def test_sketch_window(self):
+        sketch = TSlidingSketch(timedelta(hours=4), buckets=4, width=64)
+        hour = 3600 * 10 ** 6
+
+        for key in range(100):
+            sketch.add(key, 1, 0)
+        sketch.add(7, 5, hour)
+
+        assert(sketch.estimate(7, hour) >= 6)
+        assert(sketch.estimate("other", hour) >= 0)
+        assert(sketch.estimate(7, 4 * hour) >= 5)
+        assert(sketch.estimate(7, 5 * hour) == 0)
+
+    def test_velocity_blocks_transfers(self):
+        engine = TFraudEngine([TVelocityRule(timedelta(hours=2), max_count=3, max_amount=250)])
+        engine.attach(self.api.transaction_manager)
+        sender, receiver = self.account_ids[:2]
+
+        for _ in range(3):
+            assert(self.api.send(self.client_id, sender, receiver, 10).IsOk())
+        status = self.api.send(self.client_id, sender, receiver, 10)
+        assert(not status.IsOk())
+        assert("account velocity" in status.GetError())
+        assert(TAccount.all[sender].funds == 970)
+
+        # another account of the same client is not affected
+        assert(not self.api.withdraw(self.client_id, self.account_ids[2], 300).IsOk())
+        assert(self.api.withdraw(self.client_id, self.account_ids[2], 200).IsOk())
+
+        self.time_manager.next()
+        self.time_manager.next()
+        self.time_manager.next()
+        assert(self.api.send(self.client_id, sender, receiver, 10).IsOk())
+        assert(engine.flagged == {"account velocity": 2})
+
+    def test_client_velocity_and_batches(self):
+        engine = TFraudEngine([TVelocityRule(timedelta(days=1), max_count=4, by_client=True)])
+        engine.attach(self.api.transaction_manager)
+
+        senders = self.account_ids[:3] * 2
+        results = self.api.send_many(
+            [self.client_id] * len(senders),
+            senders,
+            [self.account_ids[5]] * len(senders),
+            [1] * len(senders),
+        )
+        assert(results.tolist() == [ESendResult.OK.value] * 4 + [ESendResult.FLAGGED.value] * 2)
+        assert(TAccount.all[self.account_ids[5]].funds == 1004)
+
+    def test_fan_out_and_in(self):
+        engine = TFraudEngine([TFanRule(timedelta(hours=1), max_in=3, max_out=2)], block=False)
+        engine.attach(self.api.transaction_manager)
+        hub = self.account_ids[0]
+
+        for receiver in self.account_ids[1:4]:
+            assert(self.api.send(self.client_id, hub, receiver, 1).IsOk())
+        for sender in self.account_ids[1:6]:
+            assert(self.api.send(self.client_id, sender, hub, 1).IsOk())
+
+        reasons = [reason for _, reason in engine.alerts]
+        assert(len(reasons) == 3)
+        assert(reasons[0].startswith("fan-out: 3"))
+        assert(reasons[1].startswith("fan-in: 4"))
+
+    def test_fan_state_is_bounded(self):
+        rule = TFanRule(timedelta(hours=1), max_in=3, max_out=3, max_accounts=500)
+        minute = 60 * 10 ** 6
+
+        # a new pair of accounts every minute, so about 60 are active within the window at any time
+        for step in range(5000):
+            transfer = TTransaction(f"from{step}", f"to{step}", 1, ETransactionType.A2A, None)
+            rule.record(transfer, None, None, step * minute)
+        assert(len(rule.outgoing) == len(rule.incoming) == 60)
+
+        # within the window the cap holds
+        for step in range(2000):
+            transfer = TTransaction(f"burst{step}", "hub", 1, ETransactionType.A2A, None)
+            rule.record(transfer, None, None, 5000 * minute)
+        assert(len(rule.outgoing) == 500)
+        assert(len(rule.incoming) == 60)
+
+    def test_rescore(self):
+        hub = self.account_ids[0]
+        for receiver in self.account_ids[1:]:
+            self.api.send(self.client_id, hub, receiver, 1)
+        self.time_manager.next()
+        self.time_manager.next()
+        self.api.send(self.client_id, hub, self.account_ids[1], 1)
+
+        flagged = rescore(self.api.transaction_manager.journal, [TFanRule(timedelta(hours=1), max_out=3)])
+        positions = [position for position, _ in flagged]
+        assert(positions == [9, 10])
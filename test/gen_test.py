@@ -0,0 +1,47 @@
+from util.gen import CHARS, TCounterGenerator, TNoRepetitionGenerator, decode_id, encode_id, restore_generator
+
+
+class TestGenerators:
+    def test_alphabet_is_uniform(self):
+        assert(len(CHARS) == len(set(CHARS)))
+
+    def test_random_generator_does_not_repeat(self):
+        generator = TNoRepetitionGenerator(batch_size=16)
+        ids = [generator.gen(3) for _ in range(1000)]
+
+        assert(len(set(ids)) == len(ids))
+        assert(all(len(seq) == 3 for seq in ids))
+
+    def test_counter_generator_recycles_freed_ids(self):
+        generator = TCounterGenerator()
+        first = generator.gen(32)
+        second = generator.gen(32)
+        assert(first != second)
+
+        generator.free(first)
+        assert(generator.gen(32) == first)
+
+    def test_counter_generator_ignores_bad_frees(self):
+        for scramble in (False, True):
+            generator = TCounterGenerator(scramble=scramble, key=42)
+            first, second = generator.gen_many(32, 2)
+
+            # a double free and ids that were never handed out change nothing
+            generator.free(first)
+            generator.free(first)
+            generator.free_many([second, second, encode_id(generator.counter + 5, 32), "9" * 32])
+            assert(sorted(generator.released) == sorted(decode_id(seq) for seq in (first, second)))
+
+            generator = restore_generator(generator.get_state())
+            generator.free(first)
+            ids = [generator.gen(32) for _ in range(4)] + generator.gen_many(32, 4)
+            assert(len(set(ids)) == len(ids))
+            assert(sorted(ids[:2]) == sorted((first, second)))
+
+    def test_scrambled_ids_round_trip(self):
+        generator = TCounterGenerator(scramble=True, key=42)
+        values = [generator.gen_int() for _ in range(1000)]
+
+        assert(len(set(values)) == len(values))
+        for value in values:
+            assert(decode_id(encode_id(value, 32)) == value)
@@ -0,0 +1,102 @@
+from bank_system import TAccount
+from history import THistoryIndex
+from time_system import TToyTimeManager
+from transaction import ETransactionType
+from api import API
+
+from datetime import date, datetime, timedelta
+import sys
+import threading
+
+
+class TestHistoryIndex:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({"name": "Sber"})
+        self.api.new_bank({"name": "Tinkoff"})
+
+        self.sber_id = self.api.new_account(self.client_id, "Sber", "debit")
+        self.tinkoff_id = self.api.new_account(self.client_id, "Tinkoff", "debit")
+
+        # transactions recorded before the index exists are picked up too
+        self.api.top_up(self.sber_id, 100)
+        self.index = THistoryIndex(self.api.transaction_manager)
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def test_queries(self):
+        for _ in range(10):
+            self.time_manager.next()
+            self.api.send(self.client_id, self.sber_id, self.tinkoff_id, 5)
+            self.api.send(self.client_id, self.tinkoff_id, self.sber_id, 1)
+        self.api.send_many([self.client_id], [self.sber_id], [self.tinkoff_id], [7])
+
+        statement = self.index.statement(
+            self.sber_id,
+            datetime(year=2021, month=9, day=5),
+            datetime(year=2021, month=9, day=7),
+        )
+        assert(len(statement) == 4)
+        assert(all(t.type == ETransactionType.A2A for t in statement))
+
+        newest = self.index.history(self.sber_id, page=0, page_size=3)
+        assert(newest[0].amount == 7)
+        assert(len(self.index.history(self.sber_id, page=7, page_size=3)) == 1)
+        assert(self.index.history(self.sber_id, page=8, page_size=3) == [])
+
+        between = self.index.between_banks("Tinkoff", "Sber")
+        assert(len(between) == 21)
+        assert([t.amount for t in between[:2]] == [5, 1])
+
+        assert(len(self.index.bank_transactions("Sber")) == 22)
+
+        turnover = self.index.daily_turnover("Sber", date(year=2021, month=9, day=3), date(year=2021, month=9, day=4))
+        assert(turnover == {date(year=2021, month=9, day=3): 100, date(year=2021, month=9, day=4): 6})
+
+    def test_concurrent_positions(self):
+        api = API(self.time_manager, concurrent=True)
+        api.new_bank({"name": "Alfa"})
+        client_id = api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {"address": "addr", "passport": "pas"},
+        })
+        account_ids = [api.new_account(client_id, "Alfa", "debit") for _ in range(8)]
+        index = THistoryIndex(api.transaction_manager)
+
+        def top_ups(account_id):
+            for _ in range(2000):
+                api.top_up(account_id, 1)
+
+        # threads switch often enough to interleave the journal append with the listeners
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=top_ups, args=(account_id,)) for account_id in account_ids]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        # every statement row is one of the account's own transactions
+        for account_id in account_ids:
+            statement = index.statement(account_id)
+            assert(len(statement) == 2000)
+            assert(all(transaction.id_to == account_id for transaction in statement))
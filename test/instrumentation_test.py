@@ -0,0 +1,81 @@
+from bank_system import TAccount
+from instrumentation import TInstrumentation
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import json
+import urllib.request
+
+
+class TestInstrumentation:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+        self.instrumentation = TInstrumentation()
+
+        self.api.new_bank({"name": "Sber"})
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.account_ids = [self.api.new_account(self.client_id, "Sber", "debit") for _ in range(2)]
+
+    def teardown(self):
+        self.instrumentation.close()
+        TAccount.all = {}
+
+    def test_disabled_leaves_methods_alone(self):
+        send = API.send
+        self.instrumentation.enable()
+        assert(API.send is not send)
+
+        self.instrumentation.disable()
+        assert(API.send is send)
+
+        self.api.top_up(self.account_ids[0], 10)
+        assert(self.instrumentation.metrics.operations() == {})
+
+    def test_counts_and_reasons(self):
+        self.instrumentation.enable()
+
+        self.api.top_up(self.account_ids[0], 10)
+        self.api.send(self.client_id, self.account_ids[0], self.account_ids[1], 4)
+        self.api.send(self.client_id, self.account_ids[0], self.account_ids[1], 400)
+        self.api.send_many([self.client_id] * 2, self.account_ids, self.account_ids[::-1], [1, 100])
+        self.api.bank_manager.get_bank("Sber").Get().update_accounts()
+
+        operations = self.instrumentation.metrics.operations()
+        assert(operations["API.send"]["count"] == 2)
+        assert(operations["API.send"]["reasons"] == {"not enought funds": 1})
+        assert(operations["TAccount.send"]["rejected"] == 1)
+        assert(operations["TTransactionManager.new_transaction"]["count"] == 2)
+        assert(operations["API.send_many"]["reasons"] == {"NOT_ENOUGH_FUNDS": 1})
+        assert(operations["TBank.update_accounts"]["count"] == 1)
+
+        withdraw = self.api.withdraw(self.client_id, self.account_ids[1], 1000)
+        assert(withdraw.GetError() == "Insufficient funds")
+        assert("TDebitAccount.withdraw" in self.instrumentation.metrics.operations())
+
+    def test_endpoint(self):
+        self.instrumentation.enable()
+        self.instrumentation.enable_profiling(sample_rate=1)
+        host, port = self.instrumentation.serve()
+
+        self.api.top_up(self.account_ids[0], 10)
+
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics.json") as response:
+            report = json.load(response)
+        assert(report["per_operation"]["API.top_up"]["count"] == 1)
+        assert("new_transaction" in report["profile"])
+
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            assert('operation_count{op="API.top_up"} 1' in response.read().decode())
@@ -1,5 +1,5 @@
 from numpy import select
-from bank_system import EAccountType, TAccount
+from bank_system import EAccountType, ESendResult, TAccount
 from time_system import TToyTimeManager
 from api import API
 
@@ -55,6 +55,32 @@ class TestScenarios:
         assert(client_info.client_id == client_id)
         assert(not client_info.is_suspicious)
 
+    def test_update_client_info_reaches_accounts(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+        })
+
+        self.api.new_bank({
+            "name": "Sber"
+        })
+        self.api.new_bank({
+            "name": "Tinkoff"
+        })
+
+        account_ids = [
+            self.api.new_account(client_id, "Sber", "debit"),
+            self.api.new_account(client_id, "Tinkoff", "credit"),
+        ]
+        assert(self.api.client_manager.get_accounts(client_id) == account_ids)
+        assert(all(TAccount.all[account_id].is_suspicious for account_id in account_ids))
+
+        self.api.update_client_optional_info(client_id, {"address": "moscow"})
+        assert(all(TAccount.all[account_id].is_suspicious for account_id in account_ids))
+
+        self.api.update_client_optional_info(client_id, {"passport": "123456789"})
+        assert(not any(TAccount.all[account_id].is_suspicious for account_id in account_ids))
+
     def test_create_bank(self):
         result = self.api.new_bank({
             "name": "Sber"
@@ -201,3 +227,116 @@ class TestScenarios:
 
         assert(math.isclose(TAccount.all[vasya_account_id].funds, 5))
         assert(math.isclose(TAccount.all[petya_account_id].funds, 5.5))
+
+    def test_send_many(self):
+        vasya_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        petya_id = self.api.new_client({
+            "name": "Petya",
+            "surname": "Volkov",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        self.api.new_bank({
+            "name": "Sber"
+        })
+
+        vasya_account_id = self.api.new_account(vasya_id, "Sber", "debit")
+        self.api.top_up(vasya_account_id, 10)
+        petya_account_id = self.api.new_account(petya_id, "Sber", "debit")
+
+        results = self.api.send_many(
+            [vasya_id, vasya_id, petya_id, vasya_id, vasya_id],
+            [vasya_account_id, vasya_account_id, vasya_account_id, vasya_account_id, "unknown"],
+            [petya_account_id, petya_account_id, petya_account_id, petya_account_id, petya_account_id],
+            [6, 6, 1, 4, 1],
+        )
+
+        assert(list(results) == [
+            ESendResult.OK.value,
+            ESendResult.NOT_ENOUGH_FUNDS.value,
+            ESendResult.NOT_OWNER.value,
+            ESendResult.OK.value,
+            ESendResult.UNKNOWN_ACCOUNT.value,
+        ])
+        assert(math.isclose(TAccount.all[vasya_account_id].funds, 0))
+        assert(math.isclose(TAccount.all[petya_account_id].funds, 10))
+        assert(len(self.api.transaction_manager.all_transactions) == 3)
+
+    def test_black_list(self):
+        vasya_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        petya_id = self.api.new_client({
+            "name": "Petya",
+            "surname": "Volkov",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        self.api.new_bank({
+            "name": "Sber"
+        })
+        self.api.new_bank({
+            "name": "Tinkoff"
+        })
+
+        vasya_sber_id = self.api.new_account(vasya_id, "Sber", "debit")
+        vasya_tinkoff_id = self.api.new_account(vasya_id, "Tinkoff", "debit")
+        petya_tinkoff_id = self.api.new_account(petya_id, "Tinkoff", "debit")
+        self.api.top_up(vasya_sber_id, 10)
+        self.api.top_up(vasya_tinkoff_id, 10)
+
+        self.api.add_to_black_list("Sber", petya_id)
+
+        assert(not self.api.send(vasya_id, vasya_sber_id, petya_tinkoff_id, 1).IsOk())
+        assert(self.api.send(vasya_id, vasya_tinkoff_id, petya_tinkoff_id, 1).IsOk())
+
+        results = self.api.send_many(
+            [vasya_id, vasya_id],
+            [vasya_sber_id, vasya_tinkoff_id],
+            [petya_tinkoff_id, petya_tinkoff_id],
+            [1, 1],
+        )
+        assert(list(results) == [ESendResult.NOT_VERIFIED.value, ESendResult.OK.value])
+        assert(math.isclose(TAccount.all[petya_tinkoff_id].funds, 2))
+
+    def test_compact_objects(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({
+            "name": "Sber"
+        })
+        account_id = self.api.new_account(client_id, "Sber", "deposit", {"initial_funds": 10})
+
+        assert(self.api.top_up(account_id, 1) is self.api.top_up(account_id, 2))
+
+        account = TAccount.all[account_id]
+        transaction = self.api.transaction_manager.all_transactions[0]
+        for value in (account, transaction, self.api.client_manager.get_client(client_id)):
+            assert(not hasattr(value, "__dict__"))
+
+        assert(account.transaction_manager is self.api.transaction_manager)
+        assert(account.funds == 13)
@@ -0,0 +1,127 @@
+from bank_system import TAccount
+from journal import TMappedJournal
+from time_system import TToyTimeManager
+from transaction import ETransactionType
+from api import API
+
+from datetime import datetime, timedelta
+import os
+import shutil
+import tempfile
+
+
+class TestMappedJournal:
+    def setup(self):
+        self.path = tempfile.mkdtemp()
+
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.journal = TMappedJournal(self.path, segment_records=4)
+        self.api = API(self.time_manager, self.journal)
+
+    def teardown(self):
+        TAccount.all = {}
+        self.journal.close()
+        shutil.rmtree(self.path)
+
+    def test_transactions_are_journaled(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.api.new_bank({"name": "Sber"})
+
+        from_id = self.api.new_account(client_id, "Sber", "debit")
+        to_id = self.api.new_account(client_id, "Sber", "debit")
+
+        for _ in range(5):
+            self.api.top_up(from_id, 10)
+            self.time_manager.next()
+        self.api.send(client_id, from_id, to_id, 7.5)
+
+        assert(len(self.journal) == 6)
+        assert(len(self.journal.sealed) == 1)
+
+        transactions = list(self.api.transaction_manager.all_transactions)
+        assert(transactions[0].id_from is None)
+        assert(transactions[0].id_to == from_id)
+        assert(transactions[0].datetime == datetime(year=2021, month=9, day=3))
+        assert(transactions[-1].type == ETransactionType.A2A)
+        assert(transactions[-1].id_to == to_id)
+        assert(transactions[-1].amount == 7.5)
+
+        assert(self.journal[-1].amount == 7.5)
+        assert(self.journal[-6].id_to == from_id)
+        for position in (6, 100, -7):
+            try:
+                self.journal[position]
+                assert(False)
+            except IndexError:
+                pass
+
+        records = self.journal.array()
+        assert(records['amount'].sum() == 57.5)
+
+        self.journal.close()
+        self.journal = TMappedJournal(self.path, segment_records=4)
+        assert(len(self.journal) == 6)
+        assert([t.id_to for t in self.journal] == [t.id_to for t in transactions])
+
+    def test_torn_tail_is_dropped(self):
+        client_id = self.api.new_client({"name": "Vasya", "surname": "Beliy"})
+        self.api.new_bank({"name": "Sber"})
+        account_id = self.api.new_account(client_id, "Sber", "debit")
+        for _ in range(6):
+            self.api.top_up(account_id, 0)
+        self.journal.close()
+
+        # a crash in the middle of a record and of an account id
+        with open(os.path.join(self.path, TMappedJournal.SEGMENT_NAME.format(1)), "ab") as segment:
+            segment.write(b"\1" * 10)
+        with open(os.path.join(self.path, TMappedJournal.ACCOUNTS_NAME), "a") as accounts:
+            accounts.write("torn")
+
+        self.journal = TMappedJournal(self.path, segment_records=4)
+        assert(len(self.journal) == 6)
+        assert(self.journal.account_ids == [account_id])
+
+        # later records line up with the ones before the crash
+        self.api = API(self.time_manager, self.journal)
+        self.api.new_bank({"name": "Sber"})
+        other_id = self.api.new_account(self.api.new_client({"name": "Vasya", "surname": "Beliy"}), "Sber", "debit")
+        self.api.top_up(other_id, 0)
+        assert(len(self.journal) == 7)
+        assert([transaction.id_to for transaction in self.journal] == [account_id] * 6 + [other_id])
+
+    def test_accounts_reach_the_disk_first(self):
+        client_id = self.api.new_client({"name": "Vasya", "surname": "Beliy"})
+        self.api.new_bank({"name": "Sber"})
+        account_id = self.api.new_account(client_id, "Sber", "debit")
+        assert(self.api.top_up(account_id, 0).IsOk())
+
+        with open(os.path.join(self.path, TMappedJournal.ACCOUNTS_NAME)) as accounts:
+            assert(accounts.read() == account_id + "\n")
+
+    def test_records_of_lost_accounts_are_dropped(self):
+        client_id = self.api.new_client({"name": "Vasya", "surname": "Beliy"})
+        self.api.new_bank({"name": "Sber"})
+        account_ids = [self.api.new_account(client_id, "Sber", "debit") for _ in range(2)]
+        for account_id in account_ids + account_ids[:1]:
+            assert(self.api.top_up(account_id, 0).IsOk())
+        self.journal.close()
+
+        # a crash that kept the records of the second account but not its id
+        with open(os.path.join(self.path, TMappedJournal.ACCOUNTS_NAME), "w") as accounts:
+            accounts.write(account_ids[0] + "\n")
+
+        self.journal = TMappedJournal(self.path, segment_records=4)
+        assert(len(self.journal) == 1)
+        assert([transaction.id_to for transaction in self.journal] == [account_ids[0]])
+        assert(self.journal.index_to_account(1) is None)
@@ -0,0 +1,81 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+from util import money
+
+from datetime import datetime, timedelta
+import numpy as np
+
+
+class TestMoney:
+    START = datetime(year=2021, month=9, day=3)
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def new_world(self):
+        api = API(TToyTimeManager(start_datetime=TestMoney.START, step=timedelta(days=1)))
+
+        client_id = api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        api.new_bank({"name": "Sber", "fixed_point": True})
+        bank = api.bank_manager.get_bank("Sber").Get()
+        bank.set_interest_rate(0.0003)
+        bank.set_credit_dayly_fee(1.25)
+
+        account_ids = [
+            api.new_account(client_id, "Sber", "debit"),
+            api.new_account(client_id, "Sber", "deposit", {"initial_funds": 1000.10}),
+            api.new_account(client_id, "Sber", "credit"),
+        ]
+        api.top_up(account_ids[0], 0.3)
+        api.withdraw(client_id, account_ids[2], 10.05)
+
+        return api, account_ids
+
+    def test_rounding_is_half_even(self):
+        assert(money.to_units(0.125, 1000).item() == 125)
+        assert(money.to_units(np.array([0.5, 1.5, 2.5, -0.5])).tolist() == [50, 150, 250, -50])
+        assert(money.divide_half_even(np.array([5, 15, 25, -5, 14, 16]), 10).tolist() == [0, 2, 2, 0, 1, 2])
+
+    def test_funds_are_exact_minor_units(self):
+        api, (debit_id, deposit_id, credit_id) = self.new_world()
+
+        debit = TAccount.all[debit_id]
+        for _ in range(10):
+            api.top_up(debit_id, 0.1)
+
+        store = api.bank_manager.get_bank("Sber").Get().account_store
+        assert(store.funds.dtype == np.int64)
+        assert(store.funds[debit.index] == 130)
+        assert(debit.funds == 1.3)
+        assert(TAccount.all[credit_id].funds == -10.05)
+
+    def test_fast_forward_is_bit_identical(self):
+        daily, daily_ids = self.new_world()
+        forwarded, forwarded_ids = self.new_world()
+
+        until = TestMoney.START + timedelta(days=2 * 365)
+        bank = daily.bank_manager.get_bank("Sber").Get()
+        while daily.time_manager.get_datetime() < until:
+            daily.time_manager.next()
+            bank.update_accounts()
+
+        forwarded.bank_manager.fast_forward(until)
+
+        daily_store = daily.bank_manager.get_bank("Sber").Get().account_store
+        forwarded_store = forwarded.bank_manager.get_bank("Sber").Get().account_store
+        for name in ("funds", "unpaid_interest"):
+            assert(np.array_equal(daily_store.column(name), forwarded_store.column(name)))
+
+        deposit = TAccount.all[daily_ids[1]]
+        assert(deposit.funds > 1000.10)
+        assert(deposit.withdraw_available)
+        assert(TAccount.all[daily_ids[2]].funds == -10.05 - 1.25 * 2 * 365)
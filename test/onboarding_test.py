@@ -0,0 +1,139 @@
+from bank_system import TAccount
+from client_system import TClient
+from onboarding import onboard_accounts, onboard_clients
+from time_system import TToyTimeManager
+from api import API
+from util.gen import TCounterGenerator, TNoRepetitionGenerator
+
+from datetime import datetime, timedelta
+import json
+import os
+import tempfile
+
+
+FIELDS = ('funds', 'unpaid_interest', 'interest_rate', 'dayly_fee', 'end_datetime', 'withdraw_available')
+
+
+class TestOnboarding:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+        for name, kwargs in (
+            ("Sber", {}),
+            ("Tinkoff", {"columnar": True}),
+            ("Alfa", {"fixed_point": True}),
+            ("VTB", {"scheduled": True}),
+        ):
+            self.api.new_bank({"name": name, **kwargs})
+            bank = self.api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.001)
+            bank.set_credit_dayly_fee(3)
+            bank.set_limit_for_suspicious_accounts(100)
+
+    def teardown(self):
+        TAccount.all = {}
+        TAccount.IdsGen = TNoRepetitionGenerator()
+        TClient.IdsGen = TNoRepetitionGenerator()
+
+    def test_bulk_matches_single(self):
+        client_ids = self.api.new_clients({
+            "name": ["Vasya", "Petya", "Masha"],
+            "surname": ["Beliy", "Cherniy", "Seraya"],
+            "address": ["addr", "", "addr"],
+            "passport": ["pas", "pas", None],
+        })
+        assert(len(client_ids) == 3)
+        assert([self.api.client_manager.is_client_suspicious(client_id) for client_id in client_ids] == [False, True, True])
+
+        types = ["debit", "deposit", "credit", "deposit"]
+        owners = [client_ids[0], client_ids[1], client_ids[2], client_ids[0]]
+        initial_funds = [5, 70, 9, 11]
+
+        for bank_name in ("Sber", "Tinkoff", "Alfa", "VTB"):
+            single = [
+                self.api.new_account(client_id, bank_name, type_str, {"initial_funds": funds})
+                for client_id, type_str, funds in zip(owners, types, initial_funds)
+            ]
+            bulk = self.api.new_accounts({
+                "client_id": owners,
+                "bank": bank_name,
+                "type": types,
+                "initial_funds": initial_funds,
+            })
+            assert(len(set(bulk.tolist()) | set(single)) == 8)
+
+            for single_id, bulk_id in zip(single, bulk.tolist()):
+                expected, account = TAccount.all[single_id], TAccount.all[bulk_id]
+                assert(type(account) is type(expected))
+                assert((account.client_id, account.is_suspicious, account.suspicious_limit) ==
+                       (expected.client_id, expected.is_suspicious, expected.suspicious_limit))
+                for name in FIELDS:
+                    assert(getattr(account, name, None) == getattr(expected, name, None))
+
+            for client_id in client_ids:
+                owned = self.api.client_manager.get_accounts(client_id)
+                assert(set(owned) >= {bulk_id for owner, bulk_id in zip(owners, bulk.tolist()) if owner == client_id})
+
+        # the accounts behave like any other: interest, fees and transfers
+        for _ in range(40):
+            self.time_manager.next()
+            for bank in self.api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+        for bank_name in ("Sber", "Tinkoff", "Alfa", "VTB"):
+            # single debit, single deposit, bulk debit, bulk deposit
+            accounts = self.api.bank_manager.get_bank(bank_name).Get().accounts[client_ids[0]]
+            assert(accounts[3].funds == accounts[1].funds > 11)
+            assert(self.api.send(client_ids[0], accounts[3].id, accounts[2].id, 5).IsOk())
+
+    def test_store_reuses_released_rows(self):
+        client_ids = self.api.new_clients({"name": ["Vasya"], "surname": ["Beliy"]})
+        bank = self.api.bank_manager.get_bank("Tinkoff").Get()
+
+        account_ids = self.api.new_accounts({"client_id": [client_ids[0]] * 3, "bank": "Tinkoff"})
+        released = TAccount.all[account_ids[1]].index
+        assert(self.api.close_account(client_ids[0], account_ids[1]).IsOk())
+
+        reopened = self.api.new_accounts({"client_id": [client_ids[0]] * 2, "bank": "Tinkoff", "type": "credit"})
+        assert(TAccount.all[reopened[0]].index == released)
+        assert(TAccount.all[reopened[1]].index == 3)
+        assert(bank.account_store.size == 4)
+
+    def test_counter_ids(self):
+        TClient.IdsGen = TCounterGenerator()
+        TAccount.IdsGen = TCounterGenerator(scramble=True, key=7)
+        expected_clients = TCounterGenerator()
+        expected_accounts = TCounterGenerator(scramble=True, key=7)
+
+        client_ids = self.api.new_clients({"name": ["Vasya"] * 3, "surname": ["Beliy"] * 3})
+        assert(client_ids.tolist() == [expected_clients.gen(32) for _ in range(3)])
+
+        account_ids = self.api.new_accounts({"client_id": client_ids, "bank": "Sber"})
+        assert(account_ids.tolist() == [expected_accounts.gen(32) for _ in range(3)])
+
+    def test_streamed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            clients_path = os.path.join(directory, "clients.csv")
+            with open(clients_path, "w") as file:
+                file.write("name,surname,address,passport\n")
+                for row in range(25):
+                    file.write(f"Vasya{row},Beliy,addr,{'pas' if row % 5 else ''}\n")
+
+            client_ids = onboard_clients(self.api, clients_path, batch_size=10)
+            assert(len(client_ids) == 25)
+            assert(self.api.client_manager.get_client(client_ids[7]).name == "Vasya7")
+            assert(sum(self.api.client_manager.is_client_suspicious(client_id) for client_id in client_ids) == 5)
+
+            accounts_path = os.path.join(directory, "accounts.jsonl")
+            with open(accounts_path, "w") as file:
+                for row, client_id in enumerate(client_ids.tolist()):
+                    bank = ("Sber", "Tinkoff")[row % 2]
+                    file.write(json.dumps({"client_id": client_id, "bank": bank, "type": "deposit", "initial_funds": row}) + "\n")
+
+            account_ids = onboard_accounts(self.api, accounts_path, batch_size=7)
+            assert(len(account_ids) == 25)
+            assert([TAccount.all[account_id].funds for account_id in account_ids.tolist()] == list(range(25)))
+            assert([TAccount.all[account_id].bank.name for account_id in account_ids[:2].tolist()] == ["Sber", "Tinkoff"])
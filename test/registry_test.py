@@ -0,0 +1,136 @@
+from bank_system import TAccount
+from snapshot import restore_snapshot, write_snapshot
+from time_system import TToyTimeManager
+from api import API
+from util.gen import TCounterGenerator
+
+from datetime import datetime, timedelta
+import gc
+import os
+import tempfile
+import weakref
+
+
+class TestRegistry:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def test_close_account(self):
+        self.api.new_bank({"name": "Sber", "columnar": True})
+        bank = self.api.bank_manager.get_bank("Sber").Get()
+
+        account_id = self.api.new_account(self.client_id, "Sber", "debit")
+        other_id = self.api.new_account(self.client_id, "Sber", "debit")
+        self.api.top_up(account_id, 42)
+        index = TAccount.all[account_id].index
+
+        assert(not self.api.close_account("stranger", account_id).IsOk())
+        assert(self.api.close_account(self.client_id, account_id).IsOk())
+
+        assert(not account_id in TAccount.all)
+        assert(self.api.client_manager.get_accounts(self.client_id) == [other_id])
+        assert([account.id for account in bank.accounts[self.client_id]] == [other_id])
+
+        record = self.api.registry.archive.find(account_id)
+        assert(record["funds"] == 42)
+        assert(record["bank"] == "Sber")
+
+        # the store row is blank and goes to the next account
+        assert(bank.account_store.funds[index] == 0)
+        assert(TAccount.all[self.api.new_account(self.client_id, "Sber", "debit")].index == index)
+
+    def test_closed_account_lets_go_of_its_row(self):
+        self.api.new_bank({"name": "Sber", "columnar": True})
+
+        account_id = self.api.new_account(self.client_id, "Sber", "debit")
+        self.api.top_up(account_id, 42)
+        closed = TAccount.all[account_id]
+        index = closed.index
+        assert(self.api.close_account(self.client_id, account_id).IsOk())
+
+        # the row goes to the next account, a late write to the closed one stays with it
+        reused = TAccount.all[self.api.new_account(self.client_id, "Sber", "debit")]
+        assert(reused.index == index)
+        assert(closed.index is None and closed.funds == 42)
+
+        closed.funds += 5
+        assert(closed.funds == 47)
+        assert(reused.funds == 0)
+
+    def test_bank_holds_account_ids(self):
+        self.api.new_bank({"name": "Sber"})
+        bank = self.api.bank_manager.get_bank("Sber").Get()
+
+        account_ids = [self.api.new_account(self.client_id, "Sber", "debit") for _ in range(2)]
+        assert(bank.accounts[self.client_id].ids() == account_ids)
+
+        closed = weakref.ref(TAccount.all[account_ids[0]])
+        assert(self.api.close_account(self.client_id, account_ids[0]).IsOk())
+        gc.collect()
+        assert(closed() is None)
+
+    def test_close_cancels_scheduled_events(self):
+        self.api.new_bank({"name": "Sber", "scheduled": True})
+        bank = self.api.bank_manager.get_bank("Sber").Get()
+        bank.set_interest_rate(0.001)
+
+        account_id = self.api.new_account(self.client_id, "Sber", "deposit", {"initial_funds": 100})
+        assert(len(bank.scheduler) > 0)
+
+        self.time_manager.set_datetime(datetime(year=2021, month=9, day=13))
+        bank.update_accounts()
+        assert(self.api.close_client(self.client_id).IsOk())
+
+        assert(len(bank.scheduler) == 0)
+        assert(self.api.client_manager.get_client(self.client_id) is None)
+        assert(self.api.registry.archive.find(account_id)["unpaid_interest"] > 0)
+
+    def test_purge_recycles_ids(self):
+        TAccount.IdsGen = TCounterGenerator()
+
+        self.api.new_bank({"name": "Sber"})
+        account_ids = [self.api.new_account(self.client_id, "Sber", "credit") for _ in range(10)]
+
+        assert(self.api.registry.close_accounts(account_ids[:6]).IsOk())
+        self.time_manager.next()
+        assert(self.api.registry.close_accounts(account_ids[6:]).IsOk())
+
+        assert(self.api.registry.purge(self.time_manager.get_datetime()) == 6)
+        assert(len(self.api.registry.archive) == 4)
+        assert(self.api.registry.archive.find(account_ids[0]) is None)
+        assert(self.api.registry.archive.find(account_ids[9]) is not None)
+
+        self.api.registry.recycle()
+        assert(self.api.new_account(self.client_id, "Sber", "credit") in account_ids[:6])
+
+    def test_close_restored_account(self):
+        self.api.new_bank({"name": "Sber"})
+        account_ids = [self.api.new_account(self.client_id, "Sber", "debit") for _ in range(3)]
+
+        path = os.path.join(tempfile.mkdtemp(), "snapshot.bin")
+        write_snapshot(self.api, path)
+
+        api = restore_snapshot(path, self.time_manager)
+        assert(api.close_account(self.client_id, account_ids[1]).IsOk())
+
+        assert(not account_ids[1] in TAccount.all)
+        assert(TAccount.all.get(account_ids[1]) is None)
+        bank = api.bank_manager.get_bank("Sber").Get()
+        assert([account.id for account in bank.accounts[self.client_id]] == [account_ids[0], account_ids[2]])
@@ -0,0 +1,71 @@
+from bank_system import TAccount
+from replay import TReplayer
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import json
+import random
+
+
+class TestReplay:
+    def teardown(self):
+        TAccount.all = {}
+
+    def log(self):
+        rng = random.Random(7)
+        fields = {"address": "addr", "passport": "pas"}
+
+        operations = [
+            {"op": "new_bank", "name": "Sber"},
+            {"op": "new_client", "ref": "vasya", "name": "Vasya", "surname": "Beliy", "optional_fields": fields},
+            {"op": "new_client", "ref": "petya", "name": "Petya", "surname": "Volkov", "optional_fields": fields},
+            {"op": "new_account", "ref": "a", "client": "vasya", "bank": "Sber", "type": "debit"},
+            {"op": "new_account", "ref": "b", "client": "petya", "bank": "Sber", "type": "debit"},
+            {"op": "top_up", "account": "a", "amount": 100},
+            {"op": "top_up", "account": "b", "amount": 100},
+        ]
+        owners = {"a": "vasya", "b": "petya"}
+        for _ in range(200):
+            sender = rng.choice("ab")
+            operations.append({
+                "op": "send",
+                "client": owners[sender],
+                "from": sender,
+                "to": "b" if sender == "a" else "a",
+                "amount": rng.randint(1, 60),
+            })
+        operations += [
+            {"op": "withdraw", "client": "vasya", "account": "a", "amount": 1},
+            {"op": "blacklist", "bank": "Sber", "client": "petya"},
+            {"op": "advance", "days": 3},
+        ]
+
+        return [json.dumps(operation) for operation in operations]
+
+    def replay(self, mode):
+        time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+        replayer = TReplayer(API(time_manager, concurrent=mode == "parallel"), time_manager, mode, chunk=50)
+        return replayer.replay(self.log())
+
+    def test_batched_replay_matches_sequential(self):
+        sequential = self.replay("sequential")
+        batched = self.replay("batched")
+
+        assert(sequential["operations"] == batched["operations"] == 210)
+        assert(sequential["per_operation"]["send"]["rejected"] == batched["per_operation"]["send"]["rejected"])
+        assert(sequential["checksum"] == batched["checksum"])
+
+    def test_parallel_replay_needs_locks(self):
+        time_manager = TToyTimeManager(start_datetime=datetime(year=2021, month=9, day=3), step=timedelta(days=1))
+        try:
+            TReplayer(API(time_manager), time_manager, "parallel")
+            assert(False)
+        except ValueError:
+            pass
+
+        # the workers may reorder sends, so only the operation count is fixed
+        assert(self.replay("parallel")["operations"] == 210)
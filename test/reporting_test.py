@@ -0,0 +1,143 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import random
+
+
+class TestReporting:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+        self.api.new_bank({"name": "Sber"})
+        self.api.new_bank({"name": "Tinkoff", "columnar": True})
+        self.api.new_bank({"name": "Alfa", "fixed_point": True})
+        for bank in self.api.bank_manager.get_all_banks().values():
+            bank.set_interest_rate(0.001)
+            bank.set_credit_dayly_fee(5)
+
+        self.client_ids = [
+            self.api.new_client({
+                "name": "Vasya",
+                "surname": "Beliy",
+                "optional_fields": {
+                    "address": "addr",
+                    "passport": "pas"
+                }
+            })
+            for _ in range(5)
+        ]
+
+        rng = random.Random(0)
+        self.accounts = []
+        for bank in ("Sber", "Tinkoff", "Alfa"):
+            for row in range(30):
+                client_id = self.client_ids[row % 5]
+                type_str = ("debit", "deposit", "credit")[row % 3]
+                account_id = self.api.new_account(client_id, bank, type_str, {"initial_funds": rng.randint(1, 100)})
+                self.accounts.append((client_id, account_id, type_str))
+
+        for client_id, account_id, type_str in self.accounts:
+            if type_str == "debit":
+                self.api.top_up(account_id, rng.randint(1, 1000))
+            elif type_str == "credit":
+                self.api.withdraw(client_id, account_id, rng.randint(1, 100))
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def expected(self, bank_name):
+        bank = self.api.bank_manager.get_bank(bank_name).Get()
+        accounts = [account for accounts in bank.accounts.values() for account in accounts]
+        return {
+            "accounts": len(accounts),
+            "funds": sum(account.funds for account in accounts),
+            "credit_exposure": -sum(min(account.funds, 0) for account in accounts if account.type.value == 3),
+            "unpaid_interest": sum(getattr(account, "unpaid_interest", 0) for account in accounts),
+        }
+
+    def check(self, bank_name):
+        summary = self.api.bank_manager.get_bank(bank_name).Get().report().summary()
+        for name, value in self.expected(bank_name).items():
+            assert(abs(summary[name] - value) < 1e-6)
+        return summary
+
+    def test_summary_matches_accounts(self):
+        for bank in ("Sber", "Tinkoff", "Alfa"):
+            summary = self.check(bank)
+            assert(summary["by_type"]["debit"]["accounts"] == 10)
+            assert(summary["clients"] == 5)
+            assert(summary["flow_counts"]["top_up"] == 10)
+            assert(summary["flow_counts"]["withdraw"] == 10)
+
+    def test_incremental_refresh(self):
+        report = self.api.bank_manager.get_bank("Tinkoff").Get().report()
+        report.summary()
+
+        rng = random.Random(1)
+        for _ in range(200):
+            client_id, account_id, _ = rng.choice(self.accounts)
+            self.api.send(client_id, account_id, rng.choice(self.accounts)[1], rng.randint(1, 50))
+            self.api.withdraw(client_id, account_id, rng.randint(1, 20))
+        revision = report.revision
+        for bank in ("Sber", "Tinkoff", "Alfa"):
+            self.check(bank)
+        assert(report.revision == revision)
+
+        self.time_manager.next()
+        self.api.bank_manager.get_bank("Tinkoff").Get().update_accounts()
+        summary = self.check("Tinkoff")
+        assert(summary["unpaid_interest"] > 0)
+
+        client_id, account_id, _ = self.accounts[35]
+        assert(self.api.close_account(client_id, account_id).IsOk())
+        assert(self.check("Tinkoff")["accounts"] == 29)
+
+    def test_grouped(self):
+        report = self.api.bank_manager.get_bank("Sber").Get().report()
+
+        balances = report.client_balances()
+        for client_id in self.client_ids:
+            owned = [TAccount.all[account_id].funds for owner, account_id, _ in self.accounts[:30] if owner == client_id]
+            assert(abs(balances[client_id] - sum(owned)) < 1e-6)
+
+        top = report.top_clients(2)
+        assert([funds for _, funds in top] == sorted(balances.values(), reverse=True)[:2])
+
+        credit = [TAccount.all[account_id].funds for _, account_id, type_str in self.accounts[:30] if type_str == "credit"]
+        assert(report.percentiles((0, 100), "credit") == {0: min(credit), 100: max(credit)})
+
+        portfolio = self.api.bank_manager.report()
+        summary = portfolio.summary()
+        assert(summary["accounts"] == 90)
+        assert(abs(summary["funds"] - sum(TAccount.all[account_id].funds for _, account_id, _ in self.accounts)) < 1e-6)
+        assert(abs(sum(portfolio.client_balances().values()) - summary["funds"]) < 1e-6)
+        assert(portfolio.percentiles((100,))[100] == max(TAccount.all[account_id].funds for _, account_id, _ in self.accounts))
+
+    def test_scheduled_columnar_bank_settles(self):
+        for name, kwargs in (("VTB", {"scheduled": True}), ("Otkritie", {"scheduled": True, "columnar": True})):
+            self.api.new_bank({"name": name, **kwargs})
+            bank = self.api.bank_manager.get_bank(name).Get()
+            bank.set_credit_dayly_fee(2)
+
+            client_id = self.client_ids[0]
+            debit_id = self.api.new_account(client_id, name, "debit")
+            credit_id = self.api.new_account(client_id, name, "credit")
+            self.api.top_up(debit_id, 1000)
+            self.api.withdraw(client_id, credit_id, 100)
+
+            report = bank.report()
+            for _ in range(20):
+                self.time_manager.next()
+                bank.update_accounts()
+
+            summary = report.summary()
+            assert(summary["funds"] == 860)
+            assert(summary["credit_exposure"] == 140)
+            assert(TAccount.all[credit_id].funds == -140)
+
@@ -0,0 +1,95 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from api import API
+
+from datetime import datetime, timedelta
+import math
+
+
+class TestScheduledBank:
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        self.api = API(self.time_manager)
+
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+
+        for name, scheduled in [("Sber", False), ("Tinkoff", True)]:
+            self.api.new_bank({"name": name, "scheduled": scheduled})
+            bank = self.api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.0001)
+            bank.set_credit_dayly_fee(2)
+
+        self.legacy = self.api.bank_manager.get_bank("Sber").Get()
+        self.scheduled = self.api.bank_manager.get_bank("Tinkoff").Get()
+
+    def teardown(self):
+        TAccount.all = {}
+
+    def open_accounts(self, bank_name):
+        debit_id = self.api.new_account(self.client_id, bank_name, "debit")
+        deposit_id = self.api.new_account(self.client_id, bank_name, "deposit", {"initial_funds": 1000})
+        credit_id = self.api.new_account(self.client_id, bank_name, "credit")
+
+        self.api.top_up(debit_id, 500)
+        return [debit_id, deposit_id, credit_id]
+
+    def assert_same(self, legacy_ids, scheduled_ids):
+        for legacy_id, scheduled_id in zip(legacy_ids, scheduled_ids):
+            legacy = TAccount.all[legacy_id]
+            scheduled = TAccount.all[scheduled_id]
+            assert(math.isclose(legacy.funds, scheduled.funds))
+
+        for legacy_id, scheduled_id in zip(legacy_ids[:2], scheduled_ids[:2]):
+            assert(math.isclose(
+                TAccount.all[legacy_id].unpaid_interest,
+                TAccount.all[scheduled_id].unpaid_interest,
+                abs_tol=1e-9,
+            ))
+
+    def test_scheduled_bank_matches_daily_updates(self):
+        legacy_ids = self.open_accounts("Sber")
+        scheduled_ids = self.open_accounts("Tinkoff")
+
+        for day in range(400):
+            self.time_manager.next()
+            self.legacy.update_accounts()
+            self.scheduled.update_accounts()
+
+            if day == 40:
+                for account_ids in (legacy_ids, scheduled_ids):
+                    self.api.withdraw(self.client_id, account_ids[0], 100)
+                    self.api.withdraw(self.client_id, account_ids[2], 50)
+            if day == 100:
+                for account_ids in (legacy_ids, scheduled_ids):
+                    self.api.top_up(account_ids[2], 80)
+
+        self.assert_same(legacy_ids, scheduled_ids)
+        assert(TAccount.all[scheduled_ids[1]].withdraw_available)
+
+    def test_scheduled_bank_catches_up_skipped_days(self):
+        legacy_ids = self.open_accounts("Sber")
+        scheduled_ids = self.open_accounts("Tinkoff")
+
+        for account_ids in (legacy_ids, scheduled_ids):
+            self.api.withdraw(self.client_id, account_ids[2], 50)
+
+        for day in range(1, 400):
+            self.time_manager.next()
+            self.legacy.update_accounts()
+            if day % 30 == 0:
+                self.scheduled.update_accounts()
+        self.scheduled.update_accounts()
+
+        self.assert_same(legacy_ids, scheduled_ids)
+        assert(len(self.scheduled.scheduler) == 1)
@@ -0,0 +1,105 @@
+from bank_system import ESendResult
+from ring import TSharedRing
+from sharded import TShardedAPI
+from time_system import TToyTimeManager
+
+from datetime import datetime, timedelta
+import math
+import random
+
+
+class TestSharedRing:
+    def test_messages_wrap_around(self):
+        ring = TSharedRing(capacity=256)
+        try:
+            for step in range(100):
+                ring.put(("send", [step] * (step % 7)))
+                assert(ring.get() == ("send", [step] * (step % 7)))
+        finally:
+            ring.close()
+
+
+class TestShardedAPI:
+    BANKS = ("Sber", "Tinkoff", "Alfa", "VTB")
+
+    def setup(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+        self.api = TShardedAPI(self.time_manager, workers=2)
+
+        for name in TestShardedAPI.BANKS:
+            assert(self.api.new_bank({"name": name, "interest_rate": 0.0001}).IsOk())
+
+        self.client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        self.account_ids = [self.api.new_account(self.client_id, name, "debit") for name in TestShardedAPI.BANKS]
+        for account_id in self.account_ids:
+            assert(self.api.top_up(account_id, 100).IsOk())
+
+    def teardown(self):
+        self.api.close()
+
+    def test_cross_shard_send(self):
+        sber_id, tinkoff_id = self.account_ids[:2]
+        assert(self.api.accounts[sber_id][0] != self.api.accounts[tinkoff_id][0])
+
+        assert(self.api.send(self.client_id, sber_id, tinkoff_id, 30).IsOk())
+        assert(not self.api.send(self.client_id, sber_id, tinkoff_id, 100).IsOk())
+
+        assert(self.api.funds(sber_id) == 70)
+        assert(self.api.funds(tinkoff_id) == 130)
+        # both sides journal a cross-shard transfer
+        assert(self.api.transactions_count() == len(self.account_ids) + 2)
+
+    def test_black_list_on_the_receiving_shard(self):
+        sber_id, tinkoff_id = self.account_ids[:2]
+        self.api.add_to_black_list("Tinkoff", self.client_id)
+
+        status = self.api.send(self.client_id, sber_id, tinkoff_id, 10)
+        assert(status.GetError() == "not verified")
+        assert(self.api.funds(sber_id) == 100)
+
+    def test_send_many_keeps_row_order(self):
+        sber_id, tinkoff_id = self.account_ids[:2]
+        other_id = self.api.new_account(self.client_id, "Sber", "debit")
+        assert(self.api.accounts[other_id][0] == self.api.accounts[sber_id][0])
+
+        # the cross-shard row takes the whole balance before the local one is tried
+        results = self.api.send_many([self.client_id] * 2, [sber_id, sber_id], [tinkoff_id, other_id], [100, 50])
+        assert(results.tolist() == [ESendResult.OK.value, ESendResult.NOT_ENOUGH_FUNDS.value])
+        assert(self.api.funds(sber_id) == 0 and self.api.funds(other_id) == 0)
+
+        # money received across shards can be passed on in the same batch
+        results = self.api.send_many([self.client_id] * 2, [tinkoff_id, sber_id], [sber_id, tinkoff_id], [200, 150])
+        assert(results.tolist() == [ESendResult.OK.value, ESendResult.OK.value])
+        assert(self.api.funds(sber_id) == 50 and self.api.funds(tinkoff_id) == 150)
+
+    def test_money_is_conserved(self):
+        rng = random.Random(0)
+        transfers = [
+            (rng.choice(self.account_ids), rng.choice(self.account_ids), rng.randint(1, 60))
+            for _ in range(500)
+        ]
+
+        for offset in range(0, len(transfers), 50):
+            batch = transfers[offset:offset + 50]
+            results = self.api.send_many(
+                [self.client_id] * len(batch),
+                [from_id for from_id, _, _ in batch],
+                [to_id for _, to_id, _ in batch],
+                [amount for _, _, amount in batch],
+            )
+            assert(set(results.tolist()) <= {ESendResult.OK.value, ESendResult.NOT_ENOUGH_FUNDS.value})
+
+        assert(math.isclose(self.api.total_funds(), 100 * len(self.account_ids)))
+
+        self.api.advance(30)
+        assert(self.api.total_funds() > 100 * len(self.account_ids))
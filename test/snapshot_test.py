@@ -0,0 +1,185 @@
+from bank_system import TAccount
+from snapshot import TLazyAccountRegistry, restore_snapshot, write_snapshot
+from time_system import TToyTimeManager
+from transaction import TInMemoryJournal
+from api import API
+from wal import TWriteAheadLog
+
+from datetime import datetime, timedelta
+import math
+import os
+import shutil
+import tempfile
+
+
+class TestSnapshot:
+    BANKS = [("Sber", {}), ("Tinkoff", {"columnar": True}), ("Alfa", {"scheduled": True})]
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "state.snapshot")
+
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+        self.journal = TInMemoryJournal()
+        self.api = API(self.time_manager, self.journal)
+
+    def teardown(self):
+        TAccount.all = {}
+        shutil.rmtree(self.directory)
+
+    def populate(self):
+        client_id = self.api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        stranger_id = self.api.new_client({
+            "name": "Petya",
+            "surname": "Volkov",
+        })
+
+        account_ids = []
+        for name, kwargs in TestSnapshot.BANKS:
+            self.api.new_bank({"name": name, **kwargs})
+            bank = self.api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.001)
+            bank.set_credit_dayly_fee(1)
+            bank.add_to_black_list(stranger_id)
+
+            debit_id = self.api.new_account(client_id, name, "debit")
+            self.api.top_up(debit_id, 100)
+            account_ids += [
+                debit_id,
+                self.api.new_account(client_id, name, "deposit", {"initial_funds": 50}),
+                self.api.new_account(client_id, name, "credit"),
+            ]
+            self.api.withdraw(client_id, account_ids[-1], 20)
+
+        for _ in range(40):
+            self.time_manager.next()
+            for bank in self.api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+
+        return client_id, stranger_id, account_ids
+
+    def test_restore_reproduces_state(self):
+        client_id, stranger_id, account_ids = self.populate()
+        expected = {
+            account_id: (TAccount.all[account_id].funds, getattr(TAccount.all[account_id], "unpaid_interest", None))
+            for account_id in account_ids
+        }
+
+        write_snapshot(self.api, self.path)
+
+        self.api.send(client_id, account_ids[0], account_ids[3], 30)
+        self.api.top_up(account_ids[6], 5)
+        expected[account_ids[0]] = (TAccount.all[account_ids[0]].funds, expected[account_ids[0]][1])
+        expected[account_ids[3]] = (TAccount.all[account_ids[3]].funds, expected[account_ids[3]][1])
+        expected[account_ids[6]] = (TAccount.all[account_ids[6]].funds, expected[account_ids[6]][1])
+
+        TAccount.all = {}
+        time_manager = TToyTimeManager(start_datetime=datetime(year=2000, month=1, day=1), step=timedelta(days=1))
+        api = restore_snapshot(self.path, time_manager, self.journal)
+
+        assert(time_manager.get_datetime() == self.time_manager.get_datetime())
+        assert(isinstance(TAccount.all, TLazyAccountRegistry))
+        assert(api.client_manager.get_client(client_id).surname == "Beliy")
+        assert(not api.client_manager.is_client_suspicious(client_id))
+
+        sber = api.bank_manager.get_bank("Sber").Get()
+        assert(stranger_id in sber.black_list)
+        assert(math.isclose(sber.interest_rate, 0.001))
+
+        for account_id, (funds, unpaid_interest) in expected.items():
+            account = TAccount.all[account_id]
+            assert(math.isclose(account.funds, funds))
+            if unpaid_interest is not None:
+                assert(math.isclose(account.unpaid_interest, unpaid_interest))
+
+        tinkoff = api.bank_manager.get_bank("Tinkoff").Get()
+        assert(TAccount.all[account_ids[3]].store is tinkoff.account_store)
+
+        assert(len(api.client_manager.get_accounts(client_id)) == 9)
+        assert(api.client_manager.get_accounts(stranger_id) == [])
+
+        new_id = api.new_account(client_id, "Tinkoff", "debit")
+        assert(api.client_manager.get_accounts(client_id)[-1] == new_id)
+        assert(len(tinkoff.accounts[client_id]) == 4)
+        assert(TAccount.all[new_id].index == 3)
+
+        for _ in range(30):
+            time_manager.next()
+            for bank in api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+        assert(TAccount.all[account_ids[3]].funds > expected[account_ids[3]][0])
+
+    def state(self, account_ids):
+        return {
+            account_id: (
+                TAccount.all[account_id].funds,
+                getattr(TAccount.all[account_id], "unpaid_interest", None),
+                getattr(TAccount.all[account_id], "withdraw_available", None),
+            )
+            for account_id in account_ids
+        }
+
+    def test_journal_tail_reproduces_state(self):
+        wal_path = os.path.join(self.directory, "wal")
+        self.api = API(self.time_manager, TWriteAheadLog(wal_path))
+        client_id, stranger_id, account_ids = self.populate()
+        write_snapshot(self.api, self.path)
+
+        # after the snapshot: a new bank and new accounts, nightly accruals, a fast_forward, a closed account
+        self.api.new_bank({"name": "VTB", "scheduled": True, "columnar": True})
+        vtb = self.api.bank_manager.get_bank("VTB").Get()
+        vtb.set_interest_rate(0.002)
+        vtb.set_credit_dayly_fee(2)
+        vtb.add_to_black_list(stranger_id)
+
+        opened = [
+            self.api.new_account(client_id, "VTB", "debit"),
+            self.api.new_account(client_id, "VTB", "credit"),
+            self.api.new_account(client_id, "Tinkoff", "deposit", {"initial_funds": 300}),
+        ]
+        opened += self.api.new_accounts({"client_id": [client_id] * 2, "bank": "Sber", "type": ["debit", "credit"]}).tolist()
+        self.api.top_up(opened[0], 1000)
+        self.api.send(client_id, account_ids[0], opened[3], 25)
+        self.api.withdraw(client_id, opened[1], 40)
+        self.api.withdraw(client_id, opened[4], 15)
+
+        for day in range(45):
+            self.time_manager.next()
+            for bank in self.api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+            if day == 20:
+                self.api.send(client_id, opened[0], account_ids[3], 100)
+                self.api.close_account(client_id, account_ids[2])
+
+        self.api.bank_manager.get_bank("Sber").Get().fast_forward(self.time_manager.get_datetime() + timedelta(days=60))
+        self.api.bank_manager.fast_forward(self.time_manager.get_datetime() + timedelta(days=10))
+
+        alive = [account_id for account_id in account_ids + opened if account_id != account_ids[2]]
+        expected = self.state(alive)
+        now = self.time_manager.get_datetime()
+
+        # the process dies
+        TAccount.all = {}
+        time_manager = TToyTimeManager(start_datetime=datetime(year=2000, month=1, day=1), step=timedelta(days=1))
+        api = restore_snapshot(self.path, time_manager, TWriteAheadLog(wal_path))
+
+        assert(time_manager.get_datetime() == now)
+        assert(self.state(alive) == expected)
+        assert(not account_ids[2] in TAccount.all)
+        assert(stranger_id in api.bank_manager.get_bank("VTB").Get().black_list)
+        assert(len(api.client_manager.get_accounts(client_id)) == 8 + len(opened))
+
+        # unpaid interest and fees kept accruing after the snapshot
+        assert(expected[opened[0]][1] > 0)
+        assert(expected[opened[1]][0] < -40 - 44 * 2)
+
@@ -0,0 +1,38 @@
+from bank_system import TAccount
+from bench.suite import HIGHER, LOWER, compare, metric
+from bench.workload import new_api, new_clients, open_accounts, parse_mix
+
+import random
+
+
+class TestBenchmarkSuite:
+    def teardown(self):
+        TAccount.all = {}
+
+    def test_compare(self):
+        baseline = {"metrics": {
+            "send_p50_us": metric(10, "us", LOWER),
+            "accounts_per_second": metric(1000, "1/s", HIGHER),
+            "account_bytes": metric(500, "B", LOWER),
+        }}
+        results = {"metrics": {
+            "send_p50_us": metric(14, "us", LOWER),
+            "accounts_per_second": metric(900, "1/s", HIGHER),
+            "account_bytes": metric(300, "B", LOWER),
+            "new_metric": metric(1, "s", LOWER),
+        }}
+
+        regressions = compare(results, baseline, 0.25)
+        assert(len(regressions) == 1)
+        assert(regressions[0].startswith("send_p50_us"))
+
+        assert(compare(results, baseline, 0.5) == [])
+
+    def test_account_mix(self):
+        mix = parse_mix("debit=1, credit=0")
+        api = new_api()
+        rng = random.Random(0)
+
+        opened = open_accounts(api, new_clients(api, 3, rng), 50, mix, rng)
+        assert(len(opened) == 50)
+        assert({type_str for _, _, type_str in opened} == {"debit"})
@@ -0,0 +1,164 @@
+from bank_system import TAccount
+from time_system import TToyTimeManager
+from tiered import TTieredStorage
+from api import API
+
+from datetime import datetime, timedelta
+import os
+import random
+import tempfile
+
+
+class TestTiered:
+    def teardown(self):
+        TAccount.all = {}
+
+    def new_api(self):
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+        api = API(self.time_manager)
+        for name, kwargs in (("Sber", {}), ("Tinkoff", {"columnar": True}), ("Alfa", {"fixed_point": True})):
+            api.new_bank({"name": name, **kwargs})
+            bank = api.bank_manager.get_bank(name).Get()
+            bank.set_interest_rate(0.001)
+            bank.set_credit_dayly_fee(3)
+            bank.set_limit_for_suspicious_accounts(100)
+        return api
+
+    def run(self, tiered):
+        api = self.new_api()
+        storage = TTieredStorage(api, accounts=6, clients=3) if tiered else None
+
+        rng = random.Random(0)
+        client_ids = [api.new_client({"name": "Vasya", "surname": "Beliy"}) for _ in range(10)]
+        accounts = []
+        for row in range(45):
+            client_id = client_ids[row % 10]
+            bank = ("Sber", "Tinkoff", "Alfa")[row % 3]
+            type_str = ("debit", "deposit", "credit")[row // 3 % 3]
+            accounts.append((client_id, api.new_account(client_id, bank, type_str, {"initial_funds": rng.randint(1, 50)})))
+
+        for client_id in client_ids[::2]:
+            api.update_client_optional_info(client_id, {"address": "addr", "passport": "pas"})
+
+        for day in range(40):
+            for _ in range(20):
+                (client_id, account_id), (_, receiver_id) = rng.choice(accounts), rng.choice(accounts)
+                action = rng.randrange(3)
+                if action == 0:
+                    api.top_up(account_id, rng.randint(1, 100))
+                elif action == 1:
+                    api.withdraw(client_id, account_id, rng.randint(1, 100))
+                else:
+                    api.send(client_id, account_id, receiver_id, rng.randint(1, 100))
+
+            if day == 20:
+                assert(api.close_account(*accounts.pop(7)).IsOk())
+
+            self.time_manager.next()
+            for bank in api.bank_manager.get_all_banks().values():
+                bank.update_accounts()
+
+        return api, storage, [TAccount.all[account_id].funds for _, account_id in accounts]
+
+    def test_matches_in_memory(self):
+        _, _, expected = self.run(tiered=False)
+        TAccount.all = {}
+
+        api, storage, funds = self.run(tiered=True)
+        assert(funds == expected)
+
+        stats = storage.stats()
+        for name in ("accounts", "clients"):
+            assert(stats[name]["size"] <= stats[name]["capacity"])
+            assert(stats[name]["evictions"] > 0 and stats[name]["writebacks"] > 0 and stats[name]["misses"] > 0)
+
+        # the dormant tail lives on disk, only the hot entries are objects
+        assert(len(TAccount.all) == 44)
+        assert(dict.__len__(TAccount.all) <= 6)
+        assert(sum(api.client_manager.is_client_suspicious(client_id) for client_id in api.client_manager.clients) == 5)
+
+    def test_writeback_on_eviction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            api = self.new_api()
+            storage = TTieredStorage(api, os.path.join(directory, "cold.sqlite"), accounts=2, clients=2)
+
+            client_id = api.new_client({"name": "Vasya", "surname": "Beliy"})
+            account_ids = [api.new_account(client_id, "Sber", "debit") for _ in range(5)]
+            storage.flush()
+            assert(api.top_up(account_ids[0], 10).IsOk())
+
+            # written back once when pushed out, a clean reload costs no write
+            writebacks = storage.accounts.writebacks
+            for account_id in account_ids[1:]:
+                TAccount.all[account_id]
+            assert(storage.accounts.writebacks == writebacks + 1)
+            assert(not dict.__contains__(TAccount.all, account_ids[0]))
+
+            for account_id in account_ids:
+                TAccount.all[account_id]
+            assert(storage.accounts.writebacks == writebacks + 1)
+            assert(TAccount.all[account_ids[0]].funds == 10)
+
+            # an account somebody still holds is not evicted, or the holder's writes would be lost
+            held = TAccount.all[account_ids[1]]
+            for account_id in account_ids[2:] * 2:
+                TAccount.all[account_id]
+            assert(TAccount.all[account_ids[1]] is held)
+            assert(storage.accounts.pinned > 0)
+
+            assert(api.close_account(client_id, account_ids[2]).IsOk())
+            assert(not account_ids[2] in TAccount.all)
+            assert(len(TAccount.all) == 4)
+
+            storage.close()
+
+    def test_scheduled_accounts_are_evicted(self):
+        expected = None
+        for tiered in (False, True):
+            TAccount.all = {}
+            api = self.new_api()
+            api.new_bank({"name": "VTB", "scheduled": True})
+            api.bank_manager.get_bank("VTB").Get().set_interest_rate(0.001)
+            storage = TTieredStorage(api, accounts=2, clients=2) if tiered else None
+
+            client_id = api.new_client({"name": "Vasya", "surname": "Beliy", "optional_fields": {"address": "addr", "passport": "pas"}})
+            account_ids = [api.new_account(client_id, "VTB", "debit") for _ in range(6)]
+            account_ids.append(api.new_account(client_id, "VTB", "deposit", {"initial_funds": 100}))
+            for account_id in account_ids[:6]:
+                assert(api.top_up(account_id, 100).IsOk())
+
+            # the pending capitalisations hold account ids, not the accounts, so nothing stays pinned
+            if tiered:
+                assert(dict.__len__(TAccount.all) <= 2)
+                assert(storage.accounts.pinned == 0)
+
+            for _ in range(70):
+                self.time_manager.next()
+                api.bank_manager.get_bank("VTB").Get().update_accounts()
+            funds = [TAccount.all[account_id].funds for account_id in account_ids]
+
+            if expected is None:
+                expected = funds
+        assert(funds == expected)
+        assert(storage.accounts.evictions > 0 and storage.accounts.misses > 0)
+
+    def test_len_and_iter_do_not_write(self):
+        api = self.new_api()
+        storage = TTieredStorage(api, accounts=4, clients=4)
+
+        client_id = api.new_client({"name": "Vasya", "surname": "Beliy"})
+        account_ids = [api.new_account(client_id, "Sber", "debit") for _ in range(10)]
+        written = storage.store.count("accounts"), storage.accounts.writebacks
+
+        assert(len(TAccount.all) == 10)
+        assert(sorted(TAccount.all) == sorted(account_ids))
+        assert((storage.store.count("accounts"), storage.accounts.writebacks) == written)
+
+        # a flushed store counts each account once
+        storage.flush()
+        assert(len(TAccount.all) == 10)
+        assert(sorted(TAccount.all) == sorted(account_ids))
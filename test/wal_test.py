@@ -0,0 +1,170 @@
+from bank_system import TAccount
+from snapshot import restore_snapshot, write_snapshot
+from time_system import TToyTimeManager
+from api import API
+from wal import TWriteAheadLog
+
+from datetime import datetime, timedelta
+import os
+import tempfile
+
+
+class TestWriteAheadLog:
+    def setup(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "wal")
+
+        self.time_manager = TToyTimeManager(
+            start_datetime=datetime(year=2021, month=9, day=3),
+            step=timedelta(days=1),
+        )
+
+    def teardown(self):
+        TAccount.all = {}
+        self.directory.cleanup()
+
+    def new_api(self, wal):
+        api = API(self.time_manager, wal)
+        api.new_bank({"name": "Sber"})
+
+        client_id = api.new_client({
+            "name": "Vasya",
+            "surname": "Beliy",
+            "optional_fields": {
+                "address": "addr",
+                "passport": "pas"
+            }
+        })
+        account_ids = [api.new_account(client_id, "Sber", "debit") for _ in range(3)]
+        return api, client_id, account_ids
+
+    def test_torn_tail_is_dropped(self):
+        wal = TWriteAheadLog(self.path)
+        api, client_id, account_ids = self.new_api(wal)
+        api.top_up(account_ids[0], 100)
+        api.send(client_id, account_ids[0], account_ids[1], 30.5)
+        wal.close()
+
+        # a crash in the middle of the next record
+        with open(self.path, "ab") as file:
+            file.write(b"\1" * (TWriteAheadLog.RECORD.size // 2))
+
+        reopened = TWriteAheadLog(self.path)
+        assert(len(reopened) == 2)
+        assert(os.path.getsize(self.path) == 2 * TWriteAheadLog.RECORD.size)
+
+        transfer = reopened[1]
+        assert((transfer.id_from, transfer.id_to, transfer.amount) == (account_ids[0], account_ids[1], 30.5))
+        assert(transfer.datetime == self.time_manager.get_datetime())
+        assert(reopened[0].id_from is None)
+        reopened.close()
+
+    def test_recovery_replays_balances(self):
+        wal = TWriteAheadLog(self.path)
+        api, client_id, account_ids = self.new_api(wal)
+        api.top_up(account_ids[0], 100)
+
+        snapshot_path = os.path.join(self.directory.name, "snapshot")
+        write_snapshot(api, snapshot_path)
+
+        api.send(client_id, account_ids[0], account_ids[1], 40)
+        api.top_up(account_ids[2], 7)
+        api.withdraw(client_id, account_ids[1], 15)
+        funds = [TAccount.all[account_id].funds for account_id in account_ids]
+
+        # the process dies without closing the log
+        TAccount.all = {}
+
+        recovered = TWriteAheadLog(self.path)
+        restore_snapshot(snapshot_path, self.time_manager, recovered)
+        assert([TAccount.all[account_id].funds for account_id in account_ids] == funds)
+        recovered.close()
+
+    def test_group_size_batches_syncs(self):
+        wal = TWriteAheadLog(self.path, group_size=10, wait=False)
+        api, client_id, account_ids = self.new_api(wal)
+        for _ in range(95):
+            api.top_up(account_ids[0], 1)
+
+        assert(wal.syncs == 9)
+        assert(wal.durable == 90)
+        assert(os.path.getsize(self.path) == 90 * TWriteAheadLog.RECORD.size)
+
+        wal.commit()
+        assert(wal.syncs == 10)
+        assert(os.path.getsize(self.path) == 95 * TWriteAheadLog.RECORD.size)
+        wal.close()
+
+    def test_snapshot_counts_only_durable_records(self):
+        wal = TWriteAheadLog(self.path, group_size=10, wait=False)
+        api, client_id, account_ids = self.new_api(wal)
+        for _ in range(5):
+            api.top_up(account_ids[0], 1)
+
+        snapshot_path = os.path.join(self.directory.name, "snapshot")
+        write_snapshot(api, snapshot_path)
+
+        # crash, recover, commit more transfers, crash again
+        TAccount.all = {}
+        recovered = TWriteAheadLog(self.path, group_size=10, wait=False)
+        api = restore_snapshot(snapshot_path, self.time_manager, recovered)
+        assert(TAccount.all[account_ids[0]].funds == 5)
+
+        for _ in range(3):
+            api.top_up(account_ids[0], 100)
+        recovered.commit()
+
+        TAccount.all = {}
+        recovered = TWriteAheadLog(self.path)
+        restore_snapshot(snapshot_path, self.time_manager, recovered)
+        assert(TAccount.all[account_ids[0]].funds == 305)
+        recovered.close()
+
+    def test_recovery_replays_new_accounts(self):
+        wal = TWriteAheadLog(self.path)
+        api, client_id, account_ids = self.new_api(wal)
+        api.top_up(account_ids[0], 100)
+
+        snapshot_path = os.path.join(self.directory.name, "snapshot")
+        write_snapshot(api, snapshot_path)
+
+        # a client and accounts the snapshot has never seen, used right away
+        new_client_id = api.new_client({"name": "Petya", "surname": "Cherniy"})
+        api.update_client_optional_info(new_client_id, {"address": "addr", "passport": "pas"})
+        debit_id = api.new_account(new_client_id, "Sber", "debit")
+        deposit_id = api.new_account(new_client_id, "Sber", "deposit", {"initial_funds": 500})
+        bulk_ids = api.new_accounts({"client_id": [client_id] * 2, "bank": "Sber", "type": "credit"}).tolist()
+
+        api.top_up(debit_id, 70)
+        api.send(client_id, account_ids[0], debit_id, 30)
+        api.send(new_client_id, debit_id, bulk_ids[1], 45)
+        opened = [debit_id, deposit_id] + bulk_ids
+        funds = [TAccount.all[account_id].funds for account_id in account_ids + opened]
+
+        TAccount.all = {}
+        recovered = TWriteAheadLog(self.path)
+        api = restore_snapshot(snapshot_path, self.time_manager, recovered)
+
+        assert([TAccount.all[account_id].funds for account_id in account_ids + opened] == funds)
+        assert(not api.client_manager.get_client(new_client_id).is_suspicious)
+        assert(api.client_manager.get_accounts(new_client_id) == [debit_id, deposit_id])
+        assert(api.client_manager.get_accounts(client_id)[-2:] == bulk_ids)
+
+        # the replayed ids are taken, and neither the restore nor the replay was logged again:
+        # five events before the snapshot, five after it and the account opened now
+        assert(not api.new_account(client_id, "Sber", "debit") in opened)
+        assert(len(recovered.events) == 11)
+        recovered.close()
+
+    def test_torn_event_is_dropped(self):
+        wal = TWriteAheadLog(self.path)
+        api, client_id, account_ids = self.new_api(wal)
+        wal.close()
+
+        with open(self.path + ".events", "ab") as file:
+            file.write(b'{"kind": "accounts", "ban')
+
+        reopened = TWriteAheadLog(self.path)
+        assert([event["kind"] for event in reopened.events] == ["bank", "clients"] + ["accounts"] * 3)
+        reopened.close()
+
@@ -0,0 +1,392 @@
+from bank_system import ACCOUNT_CLASSES, EAccountType, TAccount
+from client_system import TClient
+from history import EPOCH, MICROSECOND, to_timestamp
+
+from collections import OrderedDict
+from datetime import date
+import json
+import sqlite3
+import threading
+import weakref
+
+
+class TSqliteStore(object):
+    COMMIT_EVERY = 4096
+
+    TABLES = {
+        "accounts": (
+            "id", "client_id", "bank", "type", "idx", "is_suspicious", "suspicious_limit", "settled_date",
+            "funds", "unpaid_interest", "interest_rate", "dayly_fee", "end_datetime", "withdraw_available",
+        ),
+        "clients": ("id", "name", "surname", "optional_fields", "is_suspicious"),
+    }
+
+    def __init__(self, path=":memory:"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # a write-back cache, durability of the money is the journal's job
+        self.connection.execute("PRAGMA synchronous=OFF")
+
+        for table, columns in TSqliteStore.TABLES.items():
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ({columns[0]} TEXT PRIMARY KEY, {', '.join(columns[1:])})"
+            )
+
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def put(self, table, rows):
+        placeholders = ", ".join("?" * len(TSqliteStore.TABLES[table]))
+        with self.lock:
+            self.connection.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", rows)
+            self.pending += len(rows)
+            if self.pending >= TSqliteStore.COMMIT_EVERY:
+                self._commit()
+
+    def get(self, table, key):
+        with self.lock:
+            return self.connection.execute(f"SELECT * FROM {table} WHERE id = ?", (key,)).fetchone()
+
+    def contains(self, table, key) -> bool:
+        with self.lock:
+            return self.connection.execute(f"SELECT 1 FROM {table} WHERE id = ?", (key,)).fetchone() is not None
+
+    def delete(self, table, key):
+        with self.lock:
+            self.connection.execute(f"DELETE FROM {table} WHERE id = ?", (key,))
+            self.pending += 1
+
+    def keys(self, table):
+        with self.lock:
+            return [key for key, in self.connection.execute(f"SELECT id FROM {table}")]
+
+    def count(self, table) -> int:
+        with self.lock:
+            return self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _commit(self):
+        self.connection.commit()
+        self.pending = 0
+
+    def commit(self):
+        with self.lock:
+            self._commit()
+
+    def close(self):
+        with self.lock:
+            self._commit()
+            self.connection.close()
+
+
+class TLruCache(OrderedDict):
+    # pinned entries looked at per eviction before giving up and staying over capacity
+    SCAN = 16
+
+    # hot entries in recency order, the least recently used first; everything else lives in the store
+    def __init__(self, store: TSqliteStore, table, capacity):
+        OrderedDict.__init__(self)
+
+        self.store = store
+        self.table = table
+        self.capacity = capacity
+        self.lock = threading.Lock()
+
+        # the state of each hot entry as the store has it, None when the store has not seen it
+        self.stored = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+        self.pinned = 0
+
+    def state(self, value):
+        raise NotImplementedError("state must be implemented")
+
+    def record(self, value):
+        raise NotImplementedError("record must be implemented")
+
+    def restore(self, row):
+        raise NotImplementedError("restore must be implemented")
+
+    def __getitem__(self, key):
+        with self.lock:
+            value = dict.get(self, key)
+            if value is None:
+                return self._miss(key)
+
+            self.hits += 1
+            self.move_to_end(key)
+            return value
+
+    def _miss(self, key):
+        row = self.store.get(self.table, key)
+        if row is None:
+            raise KeyError(key)
+
+        self.misses += 1
+        value = self.restore(row)
+        self.stored[key] = self.state(value)
+        OrderedDict.__setitem__(self, key, value)
+        self._evict()
+        return value
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            self._put(key, value)
+            self._evict()
+
+    def _put(self, key, value):
+        if not dict.__contains__(self, key):
+            self.stored[key] = None
+        OrderedDict.__setitem__(self, key, value)
+        self.move_to_end(key)
+
+    def update(self, items=(), **kwargs):
+        if hasattr(items, "keys"):
+            items = ((key, items[key]) for key in items.keys())
+
+        with self.lock:
+            for key, value in items:
+                self._put(key, value)
+            for key, value in kwargs.items():
+                self._put(key, value)
+            self._evict()
+
+    def _evict(self):
+        budget = TLruCache.SCAN
+        rows = []
+
+        while dict.__len__(self) > self.capacity and budget > 0:
+            key, value = OrderedDict.popitem(self, last=False)
+            stored = self.stored[key]
+            state = self.state(value)
+            row = self.record(value) if stored is None or state != stored else None
+
+            # still referenced outside the cache once the cache lets go of it:
+            # whoever holds it may write to it after it is gone, so it stays
+            held = weakref.ref(value)
+            del value
+            value = held()
+            if value is not None:
+                budget -= 1
+                self.pinned += 1
+                OrderedDict.__setitem__(self, key, value)
+                continue
+
+            del self.stored[key]
+            self.evictions += 1
+            if row is not None:
+                rows.append(row)
+
+        if rows:
+            self.writebacks += len(rows)
+            self.store.put(self.table, rows)
+
+    def trim(self):
+        with self.lock:
+            self._evict()
+
+    def flush(self):
+        with self.lock:
+            rows = []
+            for key, value in OrderedDict.items(self):
+                state = self.state(value)
+                if state != self.stored[key]:
+                    rows.append(self.record(value))
+                    self.stored[key] = state
+
+            if rows:
+                self.writebacks += len(rows)
+                self.store.put(self.table, rows)
+            self.store.commit()
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self.store.contains(self.table, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *default):
+        with self.lock:
+            value = dict.get(self, key)
+            if value is not None:
+                OrderedDict.__delitem__(self, key)
+                self.stored.pop(key)
+            else:
+                row = self.store.get(self.table, key)
+                if row is None:
+                    if default:
+                        return default[0]
+                    raise KeyError(key)
+                value = self.restore(row)
+
+            self.store.delete(self.table, key)
+            return value
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    # the whole population, hot and cold: the entries the store has not seen yet and then the store
+    def keys(self):
+        return self
+
+    def _unseen(self):
+        return [key for key, stored in self.stored.items() if stored is None]
+
+    def __iter__(self):
+        with self.lock:
+            unseen = self._unseen()
+            keys = self.store.keys(self.table)
+
+        yield from unseen
+        unseen = set(unseen)
+        yield from (key for key in keys if not key in unseen)
+
+    def __len__(self):
+        with self.lock:
+            return len(self._unseen()) + self.store.count(self.table)
+
+    def values(self):
+        return (self[key] for key in self)
+
+    def items(self):
+        return ((key, self[key]) for key in self)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": dict.__len__(self),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+            "pinned": self.pinned,
+        }
+
+
+class TAccountCache(TLruCache):
+    # every slot an account may change after it is created, unset slots read as None
+    STATE = (
+        "is_suspicious", "suspicious_limit", "settled_date",
+        "_funds", "_unpaid_interest", "_interest_rate", "_dayly_fee", "_end_datetime", "_withdraw_available",
+    )
+
+    def __init__(self, store: TSqliteStore, banks: dict, capacity):
+        TLruCache.__init__(self, store, "accounts", capacity)
+        self.banks = banks
+
+    def state(self, account):
+        return tuple(getattr(account, slot, None) for slot in TAccountCache.STATE)
+
+    def record(self, account):
+        settled_date = account.settled_date
+        end_datetime = getattr(account, "_end_datetime", None)
+        return (
+            account.id,
+            account.client_id,
+            account.bank.name,
+            account.type.value,
+            account.index,
+            account.is_suspicious,
+            account.suspicious_limit,
+            settled_date.toordinal() if settled_date is not None else None,
+            getattr(account, "_funds", None),
+            getattr(account, "_unpaid_interest", None),
+            getattr(account, "_interest_rate", None),
+            getattr(account, "_dayly_fee", None),
+            to_timestamp(end_datetime) if end_datetime is not None else None,
+            getattr(account, "_withdraw_available", None),
+        )
+
+    def restore(self, row):
+        (account_id, client_id, bank_name, type, index, is_suspicious, suspicious_limit, settled_date,
+         funds, unpaid_interest, interest_rate, dayly_fee, end_datetime, withdraw_available) = row
+
+        bank = self.banks[bank_name]
+        fields = ()
+        if bank.account_store is None:
+            fields = [
+                (slot, value) for slot, value in (
+                    ("_funds", funds),
+                    ("_unpaid_interest", unpaid_interest),
+                    ("_interest_rate", interest_rate),
+                    ("_dayly_fee", dayly_fee),
+                    ("_end_datetime", EPOCH + end_datetime * MICROSECOND if end_datetime is not None else None),
+                    ("_withdraw_available", bool(withdraw_available) if withdraw_available is not None else None),
+                )
+                if value is not None
+            ]
+
+        return ACCOUNT_CLASSES[type].restore(
+            bank, client_id, EAccountType(type), account_id, index,
+            date.fromordinal(settled_date) if settled_date is not None else None,
+            bool(is_suspicious), suspicious_limit, fields,
+        )
+
+
+class TClientCache(TLruCache):
+    def __init__(self, store: TSqliteStore, capacity):
+        TLruCache.__init__(self, store, "clients", capacity)
+
+    def state(self, client):
+        return (client.name, client.surname, client.is_suspicious, tuple(client.optional_fields.items()))
+
+    def record(self, client):
+        return (client.id, client.name, client.surname, json.dumps(client.optional_fields), client.is_suspicious)
+
+    def restore(self, row):
+        client_id, name, surname, optional_fields, is_suspicious = row
+
+        return TClient.restore(client_id, name, surname, json.loads(optional_fields), bool(is_suspicious))
+
+
+class TTieredStorage(object):
+    # accounts held by someone else stay hot
+    def __init__(self, api, path=":memory:", accounts=65536, clients=65536):
+        self.bank_manager = api.bank_manager
+        self.client_manager = api.client_manager
+
+        self.store = TSqliteStore(path)
+        self.accounts = TAccountCache(self.store, self.bank_manager.banks, accounts)
+        self.clients = TClientCache(self.store, clients)
+
+        previous, TAccount.all = TAccount.all, self.accounts
+        for bank in self.bank_manager.banks.values():
+            self._add_bank(bank, previous)
+
+        previous, self.client_manager.clients = self.client_manager.clients, self.clients
+        self.clients.update((client_id, previous.pop(client_id)) for client_id in list(previous.keys()))
+
+    def _add_bank(self, bank, previous=None):
+        # a bank holds its accounts by id, loaded here once if the bank is a lazily restored one
+        bank.accounts = dict(bank.accounts.items())
+        if previous is None:
+            return
+
+        # popped one by one, so that nothing but the cache holds a moved account
+        self.accounts.update(
+            (account_id, previous.pop(account_id)) for owned in bank.accounts.values() for account_id in owned.ids()
+        )
+
+    def add_bank(self, bank):
+        # a bank created after the storage was set up, its accounts are already in the cache
+        self._add_bank(bank)
+
+    def flush(self):
+        self.accounts.trim()
+        self.clients.trim()
+        self.accounts.flush()
+        self.clients.flush()
+
+    def close(self):
+        self.flush()
+        self.store.close()
+
+    def stats(self) -> dict:
+        return {"accounts": self.accounts.stats(), "clients": self.clients.stats()}
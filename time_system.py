@@ -5,6 +5,9 @@ class ITimeManager(object):
     def get_datetime(self):
         raise NotImplementedError("get_datetime must be implemented")
 
+    def set_datetime(self, datetime):
+        raise NotImplementedError("set_datetime must be implemented")
+
 
 class TToyTimeManager(ITimeManager):
     def __init__(self, start_datetime: datetime, step: timedelta):
@@ -13,6 +16,9 @@ class TToyTimeManager(ITimeManager):
 
     def get_datetime(self):
         return self.datetime
-    
+
+    def set_datetime(self, datetime):
+        self.datetime = datetime
+
     def next(self):
         self.datetime += self.step
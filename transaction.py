@@ -1,5 +1,9 @@
 from enum import Enum
+import contextlib
+import threading
 
+from concurrency import TNoLocks
+from verification import TBlackListIndex
 from util.status import Status
 
 
@@ -10,6 +14,8 @@ class ETransactionType(Enum):
 
 
 class TTransaction(object):
+    __slots__ = ("id_from", "id_to", "amount", "type", "datetime")
+
     def __init__(self, id_from, id_to, amount, type: ETransactionType, datetime):
         self.id_from = id_from
         self.id_to = id_to
@@ -18,11 +24,49 @@ class TTransaction(object):
         self.datetime = datetime
 
 
+class TInMemoryJournal(list):
+    pass
+
+
 class TTransactionManager(object):
-    def __init__(self, time_manager):
+    def __init__(self, time_manager, journal=None, locks=None):
         self.time_manager = time_manager
 
-        self.all_transactions = []
+        self.journal = journal if journal is not None else TInMemoryJournal()
+        self.locks = locks if locks is not None else TNoLocks()
+        self.black_lists = TBlackListIndex()
+
+        self.listeners = []
+        self.gates = []
+
+        # positions are assigned under the same lock as the append, so listeners see the journal's order
+        self.journal_lock = threading.Lock()
+        # a journal that can buffer now and wait for the disk later, e.g. wal.TWriteAheadLog
+        self.staged = hasattr(self.journal, "stage")
+        # a journal that also keeps the changes a snapshot's tail cannot do without, e.g. new accounts
+        self.logged = hasattr(self.journal, "log_event")
+
+    def subscribe(self, listener):
+        # listener(transaction, position) runs once per transaction, in journal order
+        self.listeners.append(listener)
+
+    def add_gate(self, gate):
+        # a gate sees every transaction before it is journaled and may reject it
+        self.gates.append(gate)
+
+    @property
+    def all_transactions(self):
+        return self.journal
+
+    def verify(self, account_from, account_to) -> bool:
+        return self.black_lists.verify(account_from, account_to)
+
+    def admit(self, transaction, account_from, account_to) -> Status:
+        for gate in self.gates:
+            status = gate.admit(transaction, account_from, account_to)
+            if not status.IsOk():
+                return status
+        return Status.Ok()
 
     def new_transaction(self, account_from, account_to, amount, type) -> Status:
         id_from = account_from.id if account_from is not None else None
@@ -35,15 +79,53 @@ class TTransactionManager(object):
             self.time_manager.get_datetime()
         )
 
-        if type == ETransactionType.A2A:
-            verifiers = [
-                account_from.bank,
-                account_to.bank,
-            ]
+        if type == ETransactionType.A2A and not self.verify(account_from, account_to):
+            return Status.Error("not verified")
 
-            for verifier in verifiers:
-                if not verifier.verify(transaction):
-                    return Status.Error("not verified")
+        if self.gates:
+            status = self.admit(transaction, account_from, account_to)
+            if not status.IsOk():
+                return status
 
-        self.all_transactions.append(transaction)
+        self._append([transaction])
         return Status.Ok()
+
+    def _append(self, transactions):
+        with self.journal_lock:
+            position = len(self.journal)
+            if self.staged:
+                end = self.journal.stage(transactions)
+            else:
+                self.journal.extend(transactions)
+
+            for listener in self.listeners:
+                for offset, transaction in enumerate(transactions):
+                    listener(transaction, position + offset)
+
+        # waited on outside the lock, so concurrent writers still share a sync
+        if self.staged:
+            self.journal.settle(end)
+
+    def record(self, kind, **fields):
+        # under the journal lock, so the event's position splits the transactions where it happened
+        if self.logged:
+            with self.journal_lock:
+                self.journal.log_event({"kind": kind, **fields})
+
+    @contextlib.contextmanager
+    def unlogged(self):
+        logged, self.logged = self.logged, False
+        try:
+            yield
+        finally:
+            self.logged = logged
+
+    def new_transactions(self, ids_from, ids_to, amounts, type):
+        datetime = self.time_manager.get_datetime()
+
+        transactions = [
+            TTransaction(id_from, id_to, amount, type, datetime)
+            for id_from, id_to, amount in zip(ids_from, ids_to, amounts)
+        ]
+
+        self._append(transactions)
@@ -0,0 +1,14 @@
+import contextlib
+import gc
+
+
+@contextlib.contextmanager
+def paused_gc():
+    # building many long-lived objects makes every collection rescan all of them for nothing
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -1,27 +1,269 @@
 import numpy as np
 
+import threading
+
+CHARS = [
+    'a', 'A', 'b', 'B', 'c', 'C', 'd', 'D', 'e', 'E', 'f', 'F',
+    'g', 'G', 'h', 'H', 'i', 'I', 'j', 'J', 'k', 'K', 'l', 'L',
+    'm', 'M', 'n', 'N', 'o', 'O', 'p', 'P', 'q', 'Q', 'r', 'R',
+    's', 'S', 't', 'T', 'u', 'U', 'v', 'V', 'w', 'W', 'x', 'X',
+    'y', 'Y', 'z', 'Z', '1', '2', '3', '4', '5', '6', '7', '8',
+    '9'
+]
+
+BASE = len(CHARS)
+CHAR_CODES = {char: code for code, char in enumerate(CHARS)}
+
+MASK_64 = (1 << 64) - 1
+# multiplicative inverses of the scramble_64 constants modulo 2 ** 64
+INVERSE_1 = pow(0xbf58476d1ce4e5b9, -1, 1 << 64)
+INVERSE_2 = pow(0x94d049bb133111eb, -1, 1 << 64)
+
+
+def encode_id(value: int, size: int) -> str:
+    digits = []
+    while value > 0:
+        value, code = divmod(value, BASE)
+        digits.append(CHARS[code])
+
+    if len(digits) > size:
+        raise ValueError(f"value does not fit into {size} characters")
+
+    digits.reverse()
+    return CHARS[0] * (size - len(digits)) + ''.join(digits)
+
+
+def encode_ids(values, size: int):
+    values = np.array(values, dtype=np.uint64)
+    codes = np.zeros((len(values), size), dtype=np.int64)
+    for position in range(size - 1, -1, -1):
+        codes[:, position] = values % np.uint64(BASE)
+        values //= np.uint64(BASE)
+
+    if values.any():
+        raise ValueError(f"value does not fit into {size} characters")
+
+    return np.array(CHARS)[codes].view(f'<U{size}').ravel().tolist()
+
+
+def decode_id(seq: str) -> int:
+    value = 0
+    for char in seq:
+        value = value * BASE + CHAR_CODES[char]
+    return value
+
+
+def scramble_64(value: int, key=0) -> int:
+    # splitmix64 finalizer: every step is invertible, so distinct inputs never collide
+    value = (value ^ key) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & MASK_64
+    return value ^ (value >> 31)
+
+
+def unscramble_64(value: int, key=0) -> int:
+    # the steps of scramble_64 undone in reverse order
+    value = value ^ (value >> 31) ^ (value >> 62)
+    value = (value * INVERSE_2) & MASK_64
+    value = value ^ (value >> 27) ^ (value >> 54)
+    value = (value * INVERSE_1) & MASK_64
+    value = value ^ (value >> 30) ^ (value >> 60)
+    return value ^ key
+
+
+def scramble_64_many(values, key=0):
+    # uint64 arithmetic wraps around, which is the masking scramble_64 does by hand
+    values = np.asarray(values, dtype=np.uint64) ^ np.uint64(key)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
 class TNoRepetitionGenerator(object):
-    def __init__(self):
-        self.chars = [
-            'a', 'A', 'b', 'B', 'c', 'C', 'd', 'D', 'e', 'E', 'f', 'F',
-            'g', 'G', 'h', 'H', 'i', 'I', 'j', 'J', 'k', 'K', 'l', 'L',
-            'm', 'M', 'n', 'N', 'o', 'O', 'p', 'P', 'q', 'Q', 'r', 'R',
-            's', 'S', 't', 't', 'T', 'u', 'U', 'v', 'V', 'w', 'W', 'x',
-            'X', 'y', 'Y', 'z', 'Z', '1', '2', '3' , '4', '5', '6', '7',
-            '8', '9'
-        ]
+    BATCH_SIZE = 4096
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.chars = np.array(CHARS)
+        self.batch_size = batch_size
 
+        self.pools = {}
         self.was = set()
-    
+
+    def _refill(self, len: int):
+        codes = np.random.randint(0, BASE, size=(self.batch_size, len))
+        pool = self.chars[codes].view(f'<U{len}').ravel().tolist()
+        self.pools[len] = pool
+        return pool
+
     def gen(self, len: int):
+        pool = self.pools.get(len)
         while True:
-            seq = ''.join(np.random.choice(self.chars, size=len, replace=True))
+            if not pool:
+                pool = self._refill(len)
+            seq = pool.pop()
             if not seq in self.was:
                 break
 
         self.was.add(seq)
         return seq
 
+    def gen_many(self, size: int, count: int):
+        ids = []
+        while count > 0:
+            codes = np.random.randint(0, BASE, size=(count, size))
+            batch = self.chars[codes].view(f'<U{size}').ravel().tolist()
+
+            fresh = [seq for seq in dict.fromkeys(batch) if not seq in self.was]
+            self.was.update(fresh)
+            ids.extend(fresh)
+            count -= len(fresh)
+        return ids
+
     def free(self, seq):
         if seq in self.was:
             self.was.remove(seq)
+
+    def free_many(self, seqs):
+        self.was.difference_update(seqs)
+
+    def reserve(self, seqs):
+        # ids issued before, e.g. ones a journal replays, are not given out again
+        self.was.update(seqs)
+
+    def get_state(self):
+        # issued ids live in the snapshot itself, only the kind is kept
+        return {"kind": "random"}
+
+
+class TCounterGenerator(object):
+    def __init__(self, scramble=False, key=0):
+        self.scramble = scramble
+        self.key = key
+
+        self.counter = 0
+        self.released = []
+        self.freed = set()
+
+    def gen_int(self) -> int:
+        if self.released:
+            value = self.released.pop()
+            self.freed.discard(value)
+            return value
+
+        value = self.counter
+        self.counter += 1
+
+        if self.scramble:
+            return scramble_64(value, self.key)
+        return value
+
+    def gen(self, len: int):
+        return encode_id(self.gen_int(), len)
+
+    def gen_many(self, size: int, count: int):
+        # released values first, newest first, like gen()
+        reused = self.released[max(len(self.released) - count, 0):]
+        del self.released[len(self.released) - len(reused):]
+        self.freed.difference_update(reused)
+        reused.reverse()
+
+        fresh = np.arange(self.counter, self.counter + count - len(reused), dtype=np.uint64)
+        self.counter += len(fresh)
+        if self.scramble:
+            fresh = scramble_64_many(fresh, self.key)
+
+        return [encode_id(value, size) for value in reused] + encode_ids(fresh, size)
+
+    def _issued(self, value: int) -> bool:
+        if value > MASK_64:
+            return False
+        if self.scramble:
+            value = unscramble_64(value, self.key)
+        return value < self.counter
+
+    def free(self, seq):
+        # an id freed twice or never given out would be handed to two owners
+        value = decode_id(seq)
+        if not value in self.freed and self._issued(value):
+            self.released.append(value)
+            self.freed.add(value)
+
+    def free_many(self, seqs):
+        for seq in seqs:
+            self.free(seq)
+
+    def reserve(self, seqs):
+        # ids issued before, e.g. ones a journal replays, are not given out again
+        for seq in seqs:
+            value = decode_id(seq)
+            if value in self.freed:
+                self.freed.remove(value)
+                self.released.remove(value)
+            elif value <= MASK_64:
+                self.counter = max(self.counter, (unscramble_64(value, self.key) if self.scramble else value) + 1)
+
+    def get_state(self):
+        return {
+            "kind": "counter",
+            "scramble": self.scramble,
+            "key": self.key,
+            "counter": self.counter,
+            "released": self.released,
+        }
+
+
+class TThreadSafeGenerator(object):
+    def __init__(self, generator):
+        self.generator = generator
+        self.lock = threading.Lock()
+
+    def gen(self, len: int):
+        with self.lock:
+            return self.generator.gen(len)
+
+    def gen_many(self, size: int, count: int):
+        with self.lock:
+            return self.generator.gen_many(size, count)
+
+    def free(self, seq):
+        with self.lock:
+            self.generator.free(seq)
+
+    def free_many(self, seqs):
+        with self.lock:
+            self.generator.free_many(seqs)
+
+    def reserve(self, seqs):
+        with self.lock:
+            self.generator.reserve(seqs)
+
+    def get_state(self):
+        with self.lock:
+            return dict(self.generator.get_state(), thread_safe=True)
+
+
+GENERATORS = {
+    "random": TNoRepetitionGenerator,
+    "counter": TCounterGenerator,
+    "scrambled": lambda: TCounterGenerator(scramble=True, key=int(np.random.randint(0, 2 ** 63))),
+}
+
+
+def new_generator(kind: str):
+    if not kind in GENERATORS:
+        raise ValueError(f"unknown id generator '{kind}'")
+    return GENERATORS[kind]()
+
+
+def restore_generator(state: dict):
+    if state["kind"] == "counter":
+        generator = TCounterGenerator(scramble=state["scramble"], key=state["key"])
+        generator.counter = state["counter"]
+        generator.released = list(state["released"])
+        generator.freed = set(generator.released)
+    else:
+        generator = new_generator(state["kind"])
+
+    if state.get("thread_safe"):
+        return TThreadSafeGenerator(generator)
+    return generator
@@ -0,0 +1,35 @@
+import numpy as np
+
+
+# funds and fees are kept in minor units (cents)
+MINOR_UNITS = 100
+
+# accrued but unpaid interest keeps extra precision, so that small balances still earn something
+ACCRUAL_UNITS = 10000 * MINOR_UNITS
+
+
+def to_units(amount, units=MINOR_UNITS):
+    # round half to even, both for python numbers and numpy arrays
+    return np.rint(np.multiply(amount, units)).astype(np.int64)
+
+
+def from_units(value, units=MINOR_UNITS):
+    return np.divide(value, units)
+
+
+def divide_half_even(value, divisor):
+    # integer division rounding half to even, without going through floats
+    quotient, remainder = np.divmod(value, divisor)
+    twice = 2 * remainder
+    round_up = (twice > divisor) | ((twice == divisor) & (quotient % 2 == 1))
+    return quotient + round_up
+
+
+def accrual(funds, interest_rate):
+    # one day of interest on funds in minor units, in accrual units
+    return to_units(funds * interest_rate, ACCRUAL_UNITS // MINOR_UNITS)
+
+
+def capitalisation(unpaid_interest):
+    # accrued interest in accrual units, rounded to minor units
+    return divide_half_even(unpaid_interest, ACCRUAL_UNITS // MINOR_UNITS)
@@ -1,10 +1,13 @@
 class Status(object):
+    __slots__ = ("error",)
+
     def __init__(self, error=None):
         self.error = error
 
     @staticmethod
     def Ok():
-        return Status()
+        # statuses are never modified, so every success shares one instance
+        return OK
     
     @staticmethod
     def Error(error_msg: str):
@@ -16,7 +19,13 @@ class Status(object):
     def GetError(self) -> str:
         return self.error
 
+
+OK = Status()
+
+
 class ValueHolder(Status):
+    __slots__ = ("value",)
+
     def __init__(self, value=None, error=None):
         Status.__init__(self, error=error)
 
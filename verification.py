@@ -0,0 +1,44 @@
+import numpy as np
+
+
+class TBlackListIndex(object):
+    def __init__(self):
+        self.bank_bits = {}
+
+        # client id -> bitmap of the banks that black listed the client
+        self.client_masks = {}
+
+    def register_bank(self, bank_name) -> int:
+        if not bank_name in self.bank_bits:
+            self.bank_bits[bank_name] = 1 << len(self.bank_bits)
+        return self.bank_bits[bank_name]
+
+    def add(self, bank, client_id):
+        self.client_masks[client_id] = self.client_masks.get(client_id, 0) | bank.black_list_bit
+
+    def is_blocked(self, bank, client_id) -> bool:
+        return bool(self.client_masks.get(client_id, 0) & bank.black_list_bit)
+
+    def verify(self, account_from, account_to) -> bool:
+        masks = self.client_masks
+        if not masks:
+            return True
+
+        blocked = masks.get(account_from.client_id, 0) | masks.get(account_to.client_id, 0)
+        return not blocked & (account_from.bank.black_list_bit | account_to.bank.black_list_bit)
+
+    def verify_many(self, accounts_from, accounts_to):
+        verified = np.ones(len(accounts_from), dtype=np.bool_)
+
+        masks = self.client_masks
+        if not masks:
+            return verified
+
+        for row, (account_from, account_to) in enumerate(zip(accounts_from, accounts_to)):
+            if account_from is None or account_to is None:
+                continue
+            blocked = masks.get(account_from.client_id, 0) | masks.get(account_to.client_id, 0)
+            if blocked & (account_from.bank.black_list_bit | account_to.bank.black_list_bit):
+                verified[row] = False
+
+        return verified
@@ -0,0 +1,220 @@
+from transaction import ETransactionType, TInMemoryJournal, TTransaction
+
+from datetime import datetime, timedelta
+import json
+import os
+import struct
+import threading
+import zlib
+
+
+class TWriteAheadLog(object):
+    # crc32 of the rest, id_from, id_to, amount, timestamp in microseconds since 1970, type
+    RECORD = struct.Struct("<I32s32sdqB")
+
+    EPOCH = datetime(year=1970, month=1, day=1)
+    MICROSECOND = timedelta(microseconds=1)
+
+    GROUP_SIZE = 64
+
+    def __init__(self, path: str, journal=None, group_size=GROUP_SIZE, group_timeout=0.0, wait=True, fsync=True):
+        # wait: a transaction is appended only once it is on disk, otherwise up to group_size - 1 may be lost.
+        # group_timeout: how long the first writer of a group waits for others to join it
+        self.path = path
+        self.journal = journal if journal is not None else TInMemoryJournal()
+
+        self.group_size = group_size
+        self.group_timeout = group_timeout
+        self.wait = wait
+        self.fsync = fsync
+
+        recovered = self._recover()
+        # the journal may trail the log, e.g. when it lives in memory
+        if len(self.journal) < len(recovered):
+            self.journal.extend(recovered[len(self.journal):])
+
+        # everything else that changes state, e.g. new accounts, one JSON line each with the journal position
+        self.events_path = path + ".events"
+        self.events = self._recover_events()
+
+        self.file = open(path, "ab")
+        self.events_file = open(self.events_path, "ab")
+
+        self.lock = threading.Lock()
+        self.synced = threading.Condition(self.lock)
+
+        self.written = self.durable = len(recovered)
+        self.buffer = bytearray()
+        self.events_buffer = bytearray()
+        self.syncing = False
+        self.writers = 0
+        self.syncs = 0
+
+    @staticmethod
+    def _encode(transaction: TTransaction) -> bytes:
+        body = TWriteAheadLog.RECORD.pack(
+            0,
+            (transaction.id_from or "").encode(),
+            (transaction.id_to or "").encode(),
+            transaction.amount,
+            (transaction.datetime - TWriteAheadLog.EPOCH) // TWriteAheadLog.MICROSECOND,
+            transaction.type.value,
+        )[4:]
+        return struct.pack("<I", zlib.crc32(body)) + body
+
+    @staticmethod
+    def _decode(record) -> TTransaction:
+        crc, id_from, id_to, amount, timestamp, type = TWriteAheadLog.RECORD.unpack(record)
+        if crc != zlib.crc32(record[4:]):
+            return None
+
+        return TTransaction(
+            id_from.rstrip(b"\0").decode() or None,
+            id_to.rstrip(b"\0").decode() or None,
+            amount,
+            ETransactionType(type),
+            TWriteAheadLog.EPOCH + timestamp * TWriteAheadLog.MICROSECOND,
+        )
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, "rb") as file:
+            data = file.read()
+
+        transactions = []
+        size = TWriteAheadLog.RECORD.size
+        for offset in range(0, len(data) - size + 1, size):
+            transaction = TWriteAheadLog._decode(data[offset:offset + size])
+            if transaction is None:
+                break
+            transactions.append(transaction)
+
+        # a torn or corrupt tail was never acknowledged, it is cut off
+        if len(data) != len(transactions) * size:
+            os.truncate(self.path, len(transactions) * size)
+
+        return transactions
+
+    def _recover_events(self):
+        if not os.path.exists(self.events_path):
+            return []
+
+        with open(self.events_path, "rb") as file:
+            lines = file.read().split(b"\n")
+
+        # the last piece is either empty or a line that never reached the disk whole
+        events = []
+        size = 0
+        for line in lines[:-1]:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                break
+            size += len(line) + 1
+
+        if size != sum(len(line) + 1 for line in lines) - 1:
+            os.truncate(self.events_path, size)
+
+        return events
+
+    def log_event(self, event: dict):
+        # an event goes to disk before any transaction staged after it, e.g. one into the account it opened
+        with self.lock:
+            event = {**event, "position": self.written}
+            self.events.append(event)
+            self.events_buffer += (json.dumps(event) + "\n").encode()
+
+            if self.wait:
+                self._sync_events()
+
+    def _sync_events(self):
+        if self.events_buffer:
+            self.events_file.write(self.events_buffer)
+            self.events_file.flush()
+            if self.fsync:
+                os.fsync(self.events_file.fileno())
+            self.events_buffer = bytearray()
+
+    def append(self, transaction: TTransaction):
+        self.extend([transaction])
+
+    def extend(self, transactions):
+        self.settle(self.stage(transactions))
+
+    def stage(self, transactions) -> int:
+        # buffers the transactions and returns the position settle() waits for
+        transactions = list(transactions)
+        data = b"".join(TWriteAheadLog._encode(transaction) for transaction in transactions)
+
+        with self.lock:
+            self.journal.extend(transactions)
+            self.buffer += data
+            self.written += len(transactions)
+
+            if not self.wait and self.written - self.durable >= self.group_size and not self.syncing:
+                self._sync()
+            return self.written
+
+    def settle(self, position):
+        if self.wait:
+            with self.lock:
+                self._wait_durable(position)
+
+    def _wait_durable(self, position):
+        # group commit: whoever finds no sync running writes out everything buffered so far,
+        # the others wait for that sync instead of issuing their own
+        self.writers += 1
+        waited = False
+        try:
+            while self.durable < position:
+                if self.syncing:
+                    self.synced.wait()
+                elif not waited and self.writers > 1 and self.group_timeout and self.written - self.durable < self.group_size:
+                    waited = True
+                    self.synced.wait(self.group_timeout)
+                else:
+                    self._sync()
+        finally:
+            self.writers -= 1
+
+    def _sync(self):
+        # called and returns with the lock held, which is released for the disk work
+        self.syncing = True
+        self._sync_events()
+        data, self.buffer = self.buffer, bytearray()
+        position = self.written
+
+        self.lock.release()
+        try:
+            self.file.write(data)
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+        finally:
+            self.lock.acquire()
+            self.syncing = False
+
+        self.durable = position
+        self.syncs += 1
+        self.synced.notify_all()
+
+    def commit(self):
+        with self.lock:
+            self._wait_durable(self.written)
+            self._sync_events()
+
+    def close(self):
+        self.commit()
+        self.file.close()
+        self.events_file.close()
+
+    def __getitem__(self, position):
+        return self.journal[position]
+
+    def __iter__(self):
+        return iter(self.journal)
+
+    def __len__(self):
+        return len(self.journal)